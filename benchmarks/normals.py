@@ -0,0 +1,161 @@
+"""
+normals.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+Benchmarks the Foundation normal vector estimators selectable with ICP_NORMALS
+on a synthetic DSM of rolling terrain with buildings and voids. For each
+estimator the time to compute the normals is reported, along with the error of
+a point-to-plane ICP registration of randomly sampled AOI points displaced by a
+known rigid transformation.
+
+Usage:
+    python benchmarks/normals.py [--size 1000] [--aoi_points 200000]
+"""
+import argparse
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+import numpy as np
+from codem.preprocessing.normals import NORMAL_METHODS
+from codem.preprocessing.preprocess import GeoData
+from codem.registration.icp import IcpRegistration
+from rasterio import Affine
+
+
+def surface(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Rolling terrain with 20 m square, 8 m tall buildings on a 60 m pitch.
+    """
+    terrain = 10 * np.sin(x / 150) + 6 * np.cos(y / 90) + 0.02 * x
+    buildings = 8.0 * (((x % 60) < 20) & ((y % 60) < 20))
+    return terrain + buildings
+
+
+def foundation(size: int) -> SimpleNamespace:
+    """
+    Grids the surface at 1 m with 5% random voids and converts it to points
+    the same way GeoData.prep does.
+    """
+    rng = np.random.default_rng(0)
+    transform = Affine(1.0, 0.0, 500000.0, 0.0, -1.0, 4000000.0 + size)
+    v, u = np.mgrid[0:size, 0:size] + 0.5
+    x, y = transform * (u, v)
+    mask = (rng.random((size, size)) > 0.05).astype(np.uint8)
+    dsm = np.where(mask == 1, surface(x - 500000.0, y - 4000000.0), -9999.0)
+
+    fnd = SimpleNamespace(
+        dsm=dsm,
+        nodata_mask=mask,
+        transform=transform,
+        area_or_point="Area",
+        point_dtype=np.float64,
+        normals_method=None,
+    )
+    GeoData._dsm2pc(fnd)  # type: ignore[arg-type]
+    return fnd
+
+
+def aoi(size: int, n_points: int, truth: np.ndarray) -> SimpleNamespace:
+    """
+    Samples the surface at random locations within the foundation, leaving a
+    margin for the displacement, and moves the samples by the inverse of the
+    true transformation.
+    """
+    rng = np.random.default_rng(1)
+    x = rng.uniform(size * 0.1, size * 0.9, n_points)
+    y = rng.uniform(size * 0.1, size * 0.9, n_points)
+    xyz = np.column_stack((x + 500000.0, y + 4000000.0, surface(x, y)))
+    xyz += rng.normal(0, 0.05, xyz.shape)
+    moved = (np.linalg.inv(truth) @ np.column_stack((xyz, np.ones(n_points))).T).T
+    return SimpleNamespace(
+        point_cloud=moved[:, :3], point_origin=np.zeros(3), resolution=1.0
+    )
+
+
+def true_transform(size: int) -> np.ndarray:
+    """
+    A 0.5 degree rotation about the vertical axis through the center of the
+    foundation followed by a (1.5, -0.8, 0.3) m translation.
+    """
+    angle = np.deg2rad(0.5)
+    rotation = np.array(
+        [[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]
+    )
+    center = np.array([500000.0, 4000000.0]) + size / 2
+    transform = np.eye(4)
+    transform[:2, :2] = rotation
+    transform[:2, 3] = center - rotation @ center
+    transform[:3, 3] += [1.5, -0.8, 0.3]
+    return transform
+
+
+def normals(fnd: SimpleNamespace, method: str) -> float:
+    """
+    Computes the foundation normal vectors in place and returns the run time.
+    """
+    fnd.normals_method = method
+    start = time.perf_counter()
+    GeoData._generate_vectors(fnd)  # type: ignore[arg-type]
+    return time.perf_counter() - start
+
+
+def icp_error(
+    fnd: SimpleNamespace, moving: SimpleNamespace, truth: np.ndarray, output_dir: str
+) -> Tuple[float, float]:
+    """
+    Registers the AOI points to the foundation, starting from the identity,
+    and returns the translation (m) and rotation (deg) errors at the center
+    of the foundation.
+    """
+    config: Dict[str, Any] = {
+        "ICP_MAX_ITER": 100,
+        "ICP_RMSE_THRESHOLD": 0.0001,
+        "ICP_ANGLE_THRESHOLD": 0.001,
+        "ICP_DISTANCE_THRESHOLD": 0.001,
+        "ICP_SOLVE_SCALE": False,
+        "ICP_ROBUST": True,
+        "ICP_SAVE_RESIDUALS": False,
+        "OUTPUT_DIR": output_dir,
+    }
+    dsm_reg = SimpleNamespace(
+        registration_parameters={"matrix": np.eye(4), "rmse_3d": 5.0}
+    )
+    icp = IcpRegistration(fnd, moving, dsm_reg, config)  # type: ignore[arg-type]
+    icp.register()
+    error = np.linalg.inv(truth) @ icp.transformation
+    center = np.append(np.mean(fnd.point_cloud, axis=0), 1.0)
+    translation = float(np.linalg.norm((error @ center - center)[:3]))
+    rotation = np.clip((np.trace(error[:3, :3]) - 1) / 2, -1, 1)
+    return translation, float(np.rad2deg(np.arccos(rotation)))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark normal vector estimators")
+    ap.add_argument("--size", type=int, default=1000, help="DSM size in pixels")
+    ap.add_argument(
+        "--aoi_points", type=int, default=200000, help="number of AOI points"
+    )
+    args = ap.parse_args()
+
+    fnd = foundation(args.size)
+    truth = true_transform(args.size)
+    moving = aoi(args.size, args.aoi_points, truth)
+
+    print(f"{args.size} x {args.size} DSM, {fnd.point_cloud.shape[0]} points")
+    print(f"{'method':>8} {'time (s)':>10} {'shift (m)':>10} {'rot (deg)':>10}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for method in NORMAL_METHODS:
+            elapsed = normals(fnd, method)
+            translation, rotation = icp_error(fnd, moving, truth, output_dir)
+            print(
+                f"{method:>8} {elapsed:>10.2f} {translation:>10.4f} {rotation:>10.5f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@ setuptools.setup(
     entry_points={
         "console_scripts": [
             "codem = codem.main:main",
+            "codem-overviews = codem.preprocessing.overviews:main",
+            "codem-index = codem.registration.feature_index:main",
         ]
     },
 )
@@ -5,4 +5,5 @@ from codem.main import apply_registration
 from codem.main import coarse_registration
 from codem.main import CodemRunConfig
 from codem.main import fine_registration
+from codem.main import prep
 from codem.main import preprocess
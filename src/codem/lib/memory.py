@@ -0,0 +1,184 @@
+"""
+memory.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains tools for bounding and reporting the memory used by a
+registration run. Each pipeline stage declares the prepared products it
+consumes; once a stage has finished, products that no remaining stage
+consumes are released, and the largest remaining products are moved to
+memory-mapped scratch files until the resident products fit in the budget.
+
+This module contains the following methods/class:
+
+* peak_rss - peak resident set size of the process
+* reset_peak_rss - resets the peak resident set size, where supported
+* track_peak_memory - logs the peak resident memory of a pipeline stage
+* MemoryBudget - releases and offloads prepared products to fit a budget
+"""
+import contextlib
+import logging
+import sys
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None  # type: ignore[assignment]
+
+_STATUS_PATH = "/proc/self/status"
+_CLEAR_REFS_PATH = "/proc/self/clear_refs"
+
+
+def peak_rss() -> Optional[int]:
+    """
+    Returns the peak resident set size of the process in bytes, read from
+    VmHWM in /proc/self/status on Linux and from getrusage elsewhere.
+
+    Returns
+    -------
+    peak: int or None
+        Peak resident set size in bytes, None when it cannot be determined
+    """
+    try:
+        with open(_STATUS_PATH) as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size to the current resident set size by
+    writing to /proc/self/clear_refs. Only supported on Linux.
+
+    Returns
+    -------
+    reset: bool
+        Whether the peak was reset
+    """
+    try:
+        with open(_CLEAR_REFS_PATH, "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def track_peak_memory(stage: str) -> Iterator[None]:
+    """
+    Logs the peak resident memory of the process while a pipeline stage runs.
+    Where the peak cannot be reset, the reported value is the peak since the
+    process started.
+
+    Parameters
+    ----------
+    stage: str
+        Name of the pipeline stage
+    """
+    logger = logging.getLogger(__name__)
+    reset = reset_peak_rss()
+    yield
+    peak = peak_rss()
+    if peak is None:
+        return None
+    scope = "during" if reset else "up to the end of"
+    logger.info(f"Peak resident memory {scope} {stage}: {peak / 1024**2:.0f} MB")
+
+
+class MemoryBudget:
+    """
+    A class for holding the prepared products of a run within a memory budget
+
+    Parameters
+    ----------
+    max_memory: float
+        Budget for the resident prepared products in gigabytes
+
+    Methods
+    -------
+    fit
+    _release
+    _offload
+    """
+
+    def __init__(self, max_memory: float) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.max_bytes = int(max_memory * 1024**3)
+
+    def fit(self, data: Iterable[Any], remaining: Sequence[Sequence[str]]) -> None:
+        """
+        Releases the prepared products of GeoData objects that no remaining
+        stage consumes, then offloads the largest resident products to
+        memory-mapped scratch files until the rest fit in the budget.
+
+        Parameters
+        ----------
+        data: iterable of GeoData
+            Prepared data objects
+        remaining: sequence
+            The products consumed by each pipeline stage still to be run
+        """
+        data = list(data)
+        consumed = {name for products in remaining for name in products}
+        for geo_data in data:
+            self._release(geo_data, consumed)
+        self._offload(data)
+
+    def _release(self, geo_data: Any, consumed: Iterable[str]) -> None:
+        """
+        Releases the products of a GeoData object that are not consumed.
+        """
+        released = geo_data.release(consumed)
+        if released:
+            tag = ["AOI", "Foundation"][int(geo_data.fnd)]
+            self.logger.debug(
+                f"Released {tag}-{geo_data.type.upper()} products: "
+                f"{', '.join(released)}"
+            )
+
+    def _offload(self, data: List[Any]) -> None:
+        """
+        Moves the largest resident products to memory-mapped scratch files
+        until the resident products fit in the budget.
+        """
+        resident: List[Tuple[int, Any, str]] = []
+        for geo_data in data:
+            for name in geo_data.cached_arrays:
+                array = getattr(geo_data, name, None)
+                if (
+                    isinstance(array, np.ndarray)
+                    and not isinstance(array, np.memmap)
+                    and array.nbytes > 0
+                ):
+                    resident.append((array.nbytes, geo_data, name))
+        total = sum(nbytes for nbytes, _, _ in resident)
+
+        for nbytes, geo_data, name in sorted(
+            resident, key=lambda item: item[0], reverse=True
+        ):
+            if total <= self.max_bytes:
+                break
+            geo_data.offload(name)
+            total -= nbytes
+            tag = ["AOI", "Foundation"][int(geo_data.fnd)]
+            self.logger.info(
+                f"Moved {tag}-{geo_data.type.upper()} {name} "
+                f"({nbytes / 1024**2:.0f} MB) to a memory-mapped scratch file"
+            )
@@ -6,6 +6,8 @@ Date: February 2021
 Supported filetypes
 """
 
-dsm_filetypes = [".tif"]
+dsm_filetypes = [".tif", ".vrt"]
+# COPC (.copc.laz) files are matched as .laz point clouds
 pcloud_filetypes = [".las", ".laz", ".bpf"]
 mesh_filetypes = [".ply", ".obj"]
+array_filetypes = [".npy", ".zarr"]
@@ -0,0 +1,155 @@
+"""
+scheduler.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a small task graph executor for overlapping independent
+pipeline work. Tasks are added with the names of the tasks they depend on and
+run on a thread pool as soon as their dependencies have finished. OpenCV,
+PDAL, rasterio, and most NumPy and SciPy routines release the GIL, so the
+preparation of the Foundation and AOI, or the extraction of their features,
+run in parallel on threads. With a single worker, tasks run in the order they
+were added, exactly as the equivalent sequential code.
+
+This module contains the following class:
+
+* TaskGraph - runs tasks on a thread pool in dependency order
+"""
+import logging
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+
+
+class TaskGraph:
+    """
+    A class for running dependent tasks concurrently
+
+    Parameters
+    ----------
+    workers: int
+        Maximum number of tasks run at the same time
+
+    Methods
+    -------
+    add
+    run
+    _run_sequential
+    _run_concurrent
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        self.logger = logging.getLogger(__name__)
+        self.workers = workers
+        self.tasks: Dict[
+            str, Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+        ] = {}
+        self.dependencies: Dict[str, Tuple[str, ...]] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        after: Sequence[str] = (),
+        **kwargs: Any,
+    ) -> str:
+        """
+        Adds a task to the graph. Dependencies must have been added before, so
+        the graph cannot contain cycles.
+
+        Parameters
+        ----------
+        name: str
+            Unique name of the task
+        func: callable
+            Function run by the task
+        *args, **kwargs
+            Arguments passed to func
+        after: sequence of str
+            Names of the tasks that must finish before this task starts
+
+        Returns
+        -------
+        name: str
+            Name of the task
+        """
+        if name in self.tasks:
+            raise ValueError(f"Task {name} has already been added.")
+        unknown = [dependency for dependency in after if dependency not in self.tasks]
+        if unknown:
+            raise ValueError(f"Task {name} depends on unknown tasks {unknown}.")
+        self.tasks[name] = (func, args, kwargs)
+        self.dependencies[name] = tuple(after)
+        return name
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Runs every task once its dependencies have finished. If a task raises,
+        no further tasks are started and the exception is re-raised once the
+        running tasks have finished.
+
+        Returns
+        -------
+        results: dict
+            Return value of each task by name
+        """
+        if self.workers == 1 or len(self.tasks) < 2:
+            return self._run_sequential()
+        return self._run_concurrent()
+
+    def _run_sequential(self) -> Dict[str, Any]:
+        """
+        Runs the tasks in the order they were added.
+        """
+        results: Dict[str, Any] = {}
+        for name, (func, args, kwargs) in self.tasks.items():
+            results[name] = func(*args, **kwargs)
+        return results
+
+    def _run_concurrent(self) -> Dict[str, Any]:
+        """
+        Runs the tasks on a thread pool, starting ready tasks in the order
+        they were added.
+        """
+        results: Dict[str, Any] = {}
+        pending: List[str] = list(self.tasks)
+        done: Set[str] = set()
+        running: Dict[Future, str] = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                if error is None:
+                    for name in [
+                        name
+                        for name in pending
+                        if all(dep in done for dep in self.dependencies[name])
+                    ]:
+                        func, args, kwargs = self.tasks[name]
+                        running[executor.submit(func, *args, **kwargs)] = name
+                        pending.remove(name)
+                        self.logger.debug(f"Started task {name}")
+                elif not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        error = error or exception
+                        continue
+                    results[name] = future.result()
+                    done.add(name)
+        if error is not None:
+            raise error
+        return results
@@ -0,0 +1,181 @@
+"""
+shared.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains tools for handing prepared data to worker processes
+without copying it. The arrays of a GeoData object are published once into
+shared memory segments, or named memory-mapped files where
+multiprocessing.shared_memory is not available (Python 3.7). The returned
+handle pickles to a few kilobytes, and each worker attaches to the
+published arrays zero-copy. The publishing process owns the segments and
+removes them when the handle is closed or garbage collected.
+
+This module contains the following class:
+
+* SharedGeoData - picklable handle to the arrays of a GeoData object
+"""
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Type
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7
+    shared_memory = None  # type: ignore[assignment]
+
+
+def _unlink(segments: List[Any], directory: Optional[str]) -> None:
+    """
+    Removes published shared memory segments and memory-mapped files.
+    """
+    for segment in segments:
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class SharedGeoData:
+    """
+    A class for publishing the arrays of a GeoData object to worker processes
+
+    Every array attribute of the object is copied once into shared memory.
+    The handle is pickled in place of the object; attach, called in a worker,
+    rebuilds the object with read-only views of the published arrays.
+    Attributes listed in the object's process_local are not shared.
+
+    Parameters
+    ----------
+    geo_data: GeoData
+        Prepared data object to publish
+    scratch_dir: str, optional
+        Directory for the memory-mapped files used when shared memory is not
+        available, the system temporary directory if not given
+
+    Methods
+    -------
+    attach
+    close
+    _publish
+    """
+
+    def __init__(self, geo_data: Any, scratch_dir: Optional[str] = None) -> None:
+        self.cls: Type[Any] = type(geo_data)
+        local = set(getattr(geo_data, "process_local", ()))
+        self.state: Dict[str, Any] = {}
+        self.arrays: Dict[str, Tuple[Optional[str], Tuple[int, ...], np.dtype]] = {}
+        segments: List[Any] = []
+        directory = None
+        if shared_memory is None:
+            directory = tempfile.mkdtemp(prefix="shared_", dir=scratch_dir)
+        # attaching processes use the backend the arrays were published with
+        self.memmapped = directory is not None
+        self._finalizer: Optional[weakref.finalize] = weakref.finalize(
+            self, _unlink, segments, directory
+        )
+        for name, value in vars(geo_data).items():
+            if name in local:
+                self.state[name] = None
+            elif isinstance(value, np.ndarray):
+                self.arrays[name] = self._publish(name, value, segments, directory)
+            else:
+                self.state[name] = value
+
+    def __enter__(self) -> "SharedGeoData":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # only the owner removes the published arrays
+        return {
+            "cls": self.cls,
+            "state": self.state,
+            "arrays": self.arrays,
+            "memmapped": self.memmapped,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._finalizer = None
+
+    @staticmethod
+    def _publish(
+        name: str, array: np.ndarray, segments: List[Any], directory: Optional[str]
+    ) -> Tuple[Optional[str], Tuple[int, ...], np.dtype]:
+        """
+        Copies an array into a new shared memory segment, or a memory-mapped
+        file in directory, and returns its location, shape and data type.
+        """
+        if array.nbytes == 0:
+            return None, array.shape, array.dtype
+        if directory is None:
+            segment = shared_memory.SharedMemory(create=True, size=array.nbytes)
+            segments.append(segment)
+            view: np.ndarray = np.ndarray(
+                array.shape, dtype=array.dtype, buffer=segment.buf
+            )
+            view[...] = array
+            del view
+            return segment.name, array.shape, array.dtype
+        path = os.path.join(directory, f"{name}.dat")
+        mapped = np.memmap(path, dtype=array.dtype, mode="w+", shape=array.shape)
+        mapped[...] = array
+        mapped.flush()
+        del mapped
+        return path, array.shape, array.dtype
+
+    def attach(self) -> Any:
+        """
+        Rebuilds the GeoData object with read-only, zero-copy views of the
+        published arrays. The views remain valid while the returned object is
+        alive and the owning handle is open.
+
+        Returns
+        -------
+        geo_data: GeoData
+            Data object backed by the published arrays
+        """
+        geo_data = object.__new__(self.cls)
+        geo_data.__dict__.update(self.state)
+        segments = []
+        for name, (location, shape, dtype) in self.arrays.items():
+            array: np.ndarray
+            if location is None:
+                array = np.empty(shape, dtype=dtype)
+            elif self.memmapped:
+                array = np.memmap(location, dtype=dtype, mode="r", shape=shape)
+            else:
+                # the owner, not the attaching process, removes the segment
+                kwargs = {"track": False} if sys.version_info >= (3, 13) else {}
+                segment = shared_memory.SharedMemory(name=location, **kwargs)
+                segments.append(segment)
+                array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+            array.flags.writeable = False
+            setattr(geo_data, name, array)
+        # set last so that the views are released before their segments
+        geo_data._shared_segments = segments
+        return geo_data
+
+    def close(self) -> None:
+        """
+        Removes the published arrays. Only the handle that published them
+        removes them; closing a handle received by a worker does nothing.
+        """
+        if self._finalizer is not None:
+            self._finalizer()
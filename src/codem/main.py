@@ -17,39 +17,88 @@ import pathlib
 import time
 from typing import Any
 from typing import Dict
+from typing import Optional
 from typing import Tuple
 
 import enlighten
 import yaml
 from codem.lib.log import Log
+from codem.lib.memory import MemoryBudget
+from codem.lib.memory import track_peak_memory
+from codem.lib.scheduler import TaskGraph
+from codem.preprocessing.gridding import GRID_ENGINES
+from codem.preprocessing.gridding import GRID_REDUCERS
+from codem.preprocessing.infill import INFILL_METHODS
+from codem.preprocessing.normals import NORMAL_METHODS
 from codem.preprocessing.preprocess import GeoData
 from codem.preprocessing.preprocess import instantiate
+from codem.preprocessing.preprocess import PointCloud
 from codem.registration import ApplyRegistration
 from codem.registration import DsmRegistration
 from codem.registration import IcpRegistration
+from codem.registration.ransac import RANSAC_ENGINES
 from distutils.util import strtobool
 
+# products consumed by each pipeline stage after preprocessing
+STAGE_CONSUMES = (
+    DsmRegistration.CONSUMES,
+    IcpRegistration.CONSUMES,
+    ApplyRegistration.CONSUMES,
+)
+
 
 @dataclasses.dataclass
 class CodemRunConfig:
     FND_FILE: str
     AOI_FILE: str
     MIN_RESOLUTION: float = 1.0
+    RESOLUTION_ESTIMATE: str = "exact"
+    RESOLUTION_SAMPLE_SIZE: int = 1_000_000
     DSM_AKAZE_THRESHOLD: float = 0.0001
+    DSM_AKAZE_TILE_SIZE: int = 0
+    DSM_AKAZE_TILE_OVERLAP: int = 128
+    DSM_FEATURE_INDEX: Optional[str] = None
     DSM_LOWES_RATIO: float = 0.9
+    DSM_MATCH_RADIUS: float = 0.0
+    DSM_PYRAMID_LEVELS: int = 1
     DSM_RANSAC_MAX_ITER: int = 10000
     DSM_RANSAC_THRESHOLD: float = 10.0
     DSM_SOLVE_SCALE: bool = True
+    DSM_RANSAC_ENGINE: str = "skimage"
+    DSM_RANSAC_CONFIDENCE: float = 0.999
+    DSM_RANSAC_PROSAC: bool = False
+    DSM_RANSAC_SEED: Optional[int] = None
     DSM_STRONG_FILTER: float = 10.0
     DSM_WEAK_FILTER: float = 1.0
+    DSM_INFILL_METHOD: str = "idw"
+    DSM_GRID_ENGINE: str = "pdal"
+    DSM_GRID_REDUCER: str = "max"
+    DSM_GRID_CHUNK_SIZE: int = 10_000_000
+    MESH_SIDECAR: bool = False
+    DSM_MESH_FACES: bool = False
+    PC_STREAMING: bool = False
+    PC_COLUMN_CACHE: bool = False
+    COPC_RESOLUTION_FACTOR: float = 0.5
     ICP_ANGLE_THRESHOLD: float = 0.001
     ICP_DISTANCE_THRESHOLD: float = 0.001
     ICP_MAX_ITER: int = 100
     ICP_RMSE_THRESHOLD: float = 0.0001
     ICP_ROBUST: bool = True
     ICP_SOLVE_SCALE: bool = True
+    ICP_FLOAT32: bool = False
+    ICP_NORMALS: str = "pdal"
     VERBOSE: bool = False
     ICP_SAVE_RESIDUALS: bool = False
+    FND_CACHE_DIR: Optional[str] = None
+    FND_CACHE_MAX_SIZE: float = 10.0
+    FND_WINDOW: bool = False
+    FND_WINDOW_BUFFER: float = 100.0
+    DSM_NORMALIZE_TILE_SIZE: int = 0
+    SCRATCH_DIR: Optional[str] = None
+    DSM_OVERVIEWS: bool = False
+    DSM_RESAMPLING: str = "cubic"
+    MAX_MEMORY: float = 0.0
+    WORKERS: int = 1
     OUTPUT_DIR: str = dataclasses.field(init=False)
 
     def __post_init__(self) -> None:
@@ -76,20 +125,60 @@ class CodemRunConfig:
             raise FileNotFoundError(f"AOI file {self.AOI_FILE} not found.")
         if self.MIN_RESOLUTION <= 0:
             raise ValueError("Minimum pipeline resolution must be a greater than 0.")
+        if self.RESOLUTION_ESTIMATE not in ("exact", "fast"):
+            raise ValueError("Resolution estimate must be one of exact, fast.")
+        if self.RESOLUTION_SAMPLE_SIZE < 1:
+            raise ValueError("Resolution sample size must be a positive integer.")
         if self.DSM_AKAZE_THRESHOLD <= 0:
             raise ValueError("Minmum AKAZE threshold must be greater than 0.")
+        if self.DSM_AKAZE_TILE_SIZE < 0:
+            raise ValueError("AKAZE tile size must be non-negative.")
+        if self.DSM_AKAZE_TILE_OVERLAP < 0:
+            raise ValueError("AKAZE tile overlap must be non-negative.")
+        if self.DSM_FEATURE_INDEX is not None and not os.path.isdir(
+            self.DSM_FEATURE_INDEX
+        ):
+            raise FileNotFoundError(
+                f"Feature index {self.DSM_FEATURE_INDEX} not found."
+            )
         if self.DSM_LOWES_RATIO < 0.01 or self.DSM_LOWES_RATIO >= 1.0:
             raise ValueError("Lowes ratio must be between 0.01 and 1.0.")
+        if self.DSM_MATCH_RADIUS < 0:
+            raise ValueError("Feature matching search radius must be non-negative.")
+        if self.DSM_PYRAMID_LEVELS < 1:
+            raise ValueError("Number of DSM pyramid levels must be a positive integer.")
         if self.DSM_RANSAC_MAX_ITER < 1:
             raise ValueError(
                 "Maximum number of RANSAC iterations must be a positive integer."
             )
         if self.DSM_RANSAC_THRESHOLD <= 0:
             raise ValueError("RANSAC threshold must be a positive number.")
+        if self.DSM_RANSAC_ENGINE not in RANSAC_ENGINES:
+            raise ValueError(
+                f"RANSAC engine must be one of {', '.join(RANSAC_ENGINES)}."
+            )
+        if self.DSM_RANSAC_CONFIDENCE <= 0 or self.DSM_RANSAC_CONFIDENCE > 1:
+            raise ValueError("RANSAC confidence must be greater than 0 and at most 1.")
         if self.DSM_STRONG_FILTER <= 0:
             raise ValueError("DSM strong filter size must be greater than 0.")
         if self.DSM_WEAK_FILTER <= 0:
             raise ValueError("DSM weak filter size must be greater than 0.")
+        if self.DSM_INFILL_METHOD not in INFILL_METHODS:
+            raise ValueError(
+                f"DSM infill method must be one of {', '.join(INFILL_METHODS)}."
+            )
+        if self.DSM_GRID_ENGINE not in GRID_ENGINES:
+            raise ValueError(
+                f"DSM gridding engine must be one of {', '.join(GRID_ENGINES)}."
+            )
+        if self.DSM_GRID_REDUCER not in GRID_REDUCERS:
+            raise ValueError(
+                f"DSM gridding reducer must be one of {', '.join(GRID_REDUCERS)}."
+            )
+        if self.DSM_GRID_CHUNK_SIZE < 1:
+            raise ValueError("DSM gridding chunk size must be a positive integer.")
+        if self.COPC_RESOLUTION_FACTOR < 0:
+            raise ValueError("COPC resolution factor must be non-negative.")
         if self.ICP_ANGLE_THRESHOLD <= 0:
             raise ValueError(
                 "ICP minimum angle convergence threshold must be greater than 0."
@@ -106,6 +195,24 @@ class CodemRunConfig:
             raise ValueError(
                 "ICP minimum change in RMSE convergence threshold must be greater than 0."
             )
+        if self.ICP_NORMALS not in NORMAL_METHODS:
+            raise ValueError(
+                f"ICP normal method must be one of {', '.join(NORMAL_METHODS)}."
+            )
+        if self.FND_CACHE_MAX_SIZE <= 0:
+            raise ValueError("Foundation cache size limit must be greater than 0.")
+        if self.FND_WINDOW_BUFFER < 0:
+            raise ValueError("Foundation window buffer must be non-negative.")
+        if self.DSM_NORMALIZE_TILE_SIZE < 0:
+            raise ValueError("DSM normalization tile size must be non-negative.")
+        if self.SCRATCH_DIR is not None and not os.path.isdir(self.SCRATCH_DIR):
+            raise FileNotFoundError(f"Scratch directory {self.SCRATCH_DIR} not found.")
+        if self.DSM_RESAMPLING not in ("cubic", "average"):
+            raise ValueError("DSM resampling method must be 'cubic' or 'average'.")
+        if self.MAX_MEMORY < 0:
+            raise ValueError("Memory budget must be non-negative.")
+        if self.WORKERS < 1:
+            raise ValueError("The number of workers must be at least 1.")
 
         # dump config
         config_path = os.path.join(self.OUTPUT_DIR, "config.yml")
@@ -145,6 +252,21 @@ def get_args() -> argparse.Namespace:
         default=1.0,
         help="minimum pipeline data resolution",
     )
+    ap.add_argument(
+        "--resolution_estimate",
+        "-re",
+        type=str,
+        choices=("exact", "fast"),
+        default="exact",
+        help="method used to estimate point cloud and mesh resolution",
+    )
+    ap.add_argument(
+        "--resolution_sample_size",
+        "-rss",
+        type=int,
+        default=1_000_000,
+        help="number of points sampled by the fast resolution estimate",
+    )
     ap.add_argument(
         "--dsm_akaze_threshold",
         "-dat",
@@ -152,6 +274,27 @@ def get_args() -> argparse.Namespace:
         default=0.0001,
         help="AKAZE feature detection response threshold",
     )
+    ap.add_argument(
+        "--dsm_akaze_tile_size",
+        "-dats",
+        type=int,
+        default=0,
+        help="size in pixels of the tiles features are extracted from, 0 disables tiling",
+    )
+    ap.add_argument(
+        "--dsm_akaze_tile_overlap",
+        "-dato",
+        type=int,
+        default=128,
+        help="context in pixels added to each side of a feature extraction tile",
+    )
+    ap.add_argument(
+        "--dsm_feature_index",
+        "-dfi",
+        type=str,
+        default=None,
+        help="foundation feature index built with codem-index",
+    )
     ap.add_argument(
         "--dsm_lowes_ratio",
         "-dlr",
@@ -159,6 +302,20 @@ def get_args() -> argparse.Namespace:
         default=0.9,
         help="feature matching relative strength control",
     )
+    ap.add_argument(
+        "--dsm_match_radius",
+        "-dmr",
+        type=float,
+        default=0.0,
+        help="search radius in meters for matching features near their georeferenced location, 0 matches globally",
+    )
+    ap.add_argument(
+        "--dsm_pyramid_levels",
+        "-dpl",
+        type=int,
+        default=1,
+        help="number of resolution levels for coarse-to-fine feature registration, 1 registers at the pipeline resolution only",
+    )
     ap.add_argument(
         "--dsm_ransac_max_iter",
         "-drmi",
@@ -180,6 +337,35 @@ def get_args() -> argparse.Namespace:
         default=True,
         help="boolean to include or exclude scale from the solved registration transformation",
     )
+    ap.add_argument(
+        "--dsm_ransac_engine",
+        "-dre",
+        type=str,
+        default="skimage",
+        choices=RANSAC_ENGINES,
+        help="RANSAC implementation used to filter feature matches",
+    )
+    ap.add_argument(
+        "--dsm_ransac_confidence",
+        "-drc",
+        type=float,
+        default=0.999,
+        help="probability of an all-inlier sample at which batched RANSAC stops early",
+    )
+    ap.add_argument(
+        "--dsm_ransac_prosac",
+        "-drp",
+        type=str2bool,
+        default=False,
+        help="boolean to draw batched RANSAC samples from the closest descriptor matches first",
+    )
+    ap.add_argument(
+        "--dsm_ransac_seed",
+        "-drsd",
+        type=int,
+        default=None,
+        help="random seed for reproducible batched RANSAC results",
+    )
     ap.add_argument(
         "--dsm_strong_filter",
         "-dsf",
@@ -194,6 +380,72 @@ def get_args() -> argparse.Namespace:
         default=1,
         help="stddev of the small Gaussian filter used to normalize the DSM prior to feature extraction",
     )
+    ap.add_argument(
+        "--dsm_infill_method",
+        "-dim",
+        type=str,
+        choices=INFILL_METHODS,
+        default="idw",
+        help="method used to infill DSM voids",
+    )
+    ap.add_argument(
+        "--dsm_grid_engine",
+        "-dge",
+        type=str,
+        choices=GRID_ENGINES,
+        default="pdal",
+        help="engine used to grid point cloud data to a DSM",
+    )
+    ap.add_argument(
+        "--dsm_grid_reducer",
+        "-dgr",
+        type=str,
+        choices=GRID_REDUCERS,
+        default="max",
+        help="statistic of the points near each cell used as the DSM value",
+    )
+    ap.add_argument(
+        "--dsm_grid_chunk_size",
+        "-dgcs",
+        type=int,
+        default=10_000_000,
+        help="number of points gridded (and streamed) at a time by the numpy engine",
+    )
+    ap.add_argument(
+        "--mesh_sidecar",
+        "-ms",
+        type=str2bool,
+        default=False,
+        help="boolean to save and reuse parsed mesh geometry in a binary sidecar file",
+    )
+    ap.add_argument(
+        "--dsm_mesh_faces",
+        "-dmf",
+        type=str2bool,
+        default=False,
+        help="rasterize mesh triangles rather than vertices to create mesh DSMs",
+    )
+    ap.add_argument(
+        "--pc_streaming",
+        "-pcs",
+        type=str2bool,
+        default=False,
+        help="boolean to grid point clouds in chunks without loading every point",
+    )
+    ap.add_argument(
+        "--pc_column_cache",
+        "-pcc",
+        type=str2bool,
+        default=False,
+        help="read point cloud files once per run into a columnar cache",
+    )
+    ap.add_argument(
+        "--copc_resolution_factor",
+        "-crf",
+        type=float,
+        default=0.5,
+        help="COPC point spacing read, as a fraction of the pipeline resolution",
+    )
     ap.add_argument(
         "--icp_angle_threshold",
         "-iat",
@@ -236,6 +488,95 @@ def get_args() -> argparse.Namespace:
         default=True,
         help="boolean to include or exclude scale from the solved registration",
     )
+    ap.add_argument(
+        "--icp_float32",
+        "-if32",
+        type=str2bool,
+        default=False,
+        help=(
+            "boolean to store the prepared ICP points and normals as local float32 "
+            "coordinates; the ICP KD-tree is still built in float64"
+        ),
+    )
+    ap.add_argument(
+        "--icp_normals",
+        "-in",
+        type=str,
+        choices=NORMAL_METHODS,
+        default="pdal",
+        help="method used to estimate the foundation normal vectors",
+    )
+    ap.add_argument(
+        "--fnd_cache_dir",
+        "-fcd",
+        type=str,
+        default=None,
+        help="directory for caching prepared foundation data between runs",
+    )
+    ap.add_argument(
+        "--fnd_cache_max_size",
+        "-fcms",
+        type=float,
+        default=10.0,
+        help="maximum size of the prepared foundation data cache in gigabytes",
+    )
+    ap.add_argument(
+        "--fnd_window",
+        "-fw",
+        type=str2bool,
+        default=False,
+        help="boolean to read only the foundation data surrounding the AOI",
+    )
+    ap.add_argument(
+        "--fnd_window_buffer",
+        "-fwb",
+        type=float,
+        default=100.0,
+        help="buffer added around the AOI extent when windowing the foundation",
+    )
+    ap.add_argument(
+        "--dsm_normalize_tile_size",
+        "-dnts",
+        type=int,
+        default=0,
+        help="tile size in pixels for bounded-memory DSM normalization, 0 disables",
+    )
+    ap.add_argument(
+        "--scratch_dir",
+        "-sd",
+        type=str,
+        default=None,
+        help="directory for memory-mapped intermediate arrays",
+    )
+    ap.add_argument(
+        "--dsm_overviews",
+        "-dov",
+        type=str2bool,
+        default=False,
+        help="resample DSMs from the nearest suitable overview level",
+    )
+    ap.add_argument(
+        "--dsm_resampling",
+        "-drs",
+        type=str,
+        choices=("cubic", "average"),
+        default="cubic",
+        help="resampling method used to read DSMs at the pipeline resolution",
+    )
+    ap.add_argument(
+        "--max_memory",
+        "-mm",
+        type=float,
+        default=0.0,
+        help="memory budget in GB for prepared data, 0 disables",
+    )
+    ap.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="number of pipeline tasks run concurrently",
+    )
     ap.add_argument(
         "--verbose", "-v", type=str2bool, default=False, help="turn on verbose logging"
     )
@@ -248,21 +589,65 @@ def create_config(args: argparse.Namespace) -> Dict[str, Any]:
         os.fsdecode(os.path.abspath(args.foundation_file)),
         os.fsdecode(os.path.abspath(args.aoi_file)),
         MIN_RESOLUTION=float(args.min_resolution),
+        RESOLUTION_ESTIMATE=args.resolution_estimate,
+        RESOLUTION_SAMPLE_SIZE=int(args.resolution_sample_size),
         DSM_AKAZE_THRESHOLD=float(args.dsm_akaze_threshold),
+        DSM_AKAZE_TILE_SIZE=int(args.dsm_akaze_tile_size),
+        DSM_AKAZE_TILE_OVERLAP=int(args.dsm_akaze_tile_overlap),
+        DSM_FEATURE_INDEX=(
+            None
+            if args.dsm_feature_index is None
+            else os.fsdecode(os.path.abspath(args.dsm_feature_index))
+        ),
         DSM_LOWES_RATIO=float(args.dsm_lowes_ratio),
+        DSM_MATCH_RADIUS=float(args.dsm_match_radius),
+        DSM_PYRAMID_LEVELS=int(args.dsm_pyramid_levels),
         DSM_RANSAC_MAX_ITER=int(args.dsm_ransac_max_iter),
         DSM_RANSAC_THRESHOLD=float(args.dsm_ransac_threshold),
         DSM_SOLVE_SCALE=args.dsm_solve_scale,
+        DSM_RANSAC_ENGINE=args.dsm_ransac_engine,
+        DSM_RANSAC_CONFIDENCE=float(args.dsm_ransac_confidence),
+        DSM_RANSAC_PROSAC=args.dsm_ransac_prosac,
+        DSM_RANSAC_SEED=args.dsm_ransac_seed,
         DSM_STRONG_FILTER=float(args.dsm_strong_filter),
         DSM_WEAK_FILTER=float(args.dsm_weak_filter),
+        DSM_INFILL_METHOD=args.dsm_infill_method,
+        DSM_GRID_ENGINE=args.dsm_grid_engine,
+        DSM_GRID_REDUCER=args.dsm_grid_reducer,
+        DSM_GRID_CHUNK_SIZE=int(args.dsm_grid_chunk_size),
+        MESH_SIDECAR=args.mesh_sidecar,
+        DSM_MESH_FACES=args.dsm_mesh_faces,
+        PC_STREAMING=args.pc_streaming,
+        PC_COLUMN_CACHE=args.pc_column_cache,
+        COPC_RESOLUTION_FACTOR=float(args.copc_resolution_factor),
         ICP_ANGLE_THRESHOLD=float(args.icp_angle_threshold),
         ICP_DISTANCE_THRESHOLD=float(args.icp_distance_threshold),
         ICP_MAX_ITER=int(args.icp_max_iter),
         ICP_RMSE_THRESHOLD=float(args.icp_rmse_threshold),
         ICP_ROBUST=args.icp_robust,
         ICP_SOLVE_SCALE=args.icp_solve_scale,
+        ICP_FLOAT32=args.icp_float32,
+        ICP_NORMALS=args.icp_normals,
         VERBOSE=args.verbose,
         ICP_SAVE_RESIDUALS=False,
+        FND_CACHE_DIR=(
+            None
+            if args.fnd_cache_dir is None
+            else os.fsdecode(os.path.abspath(args.fnd_cache_dir))
+        ),
+        FND_CACHE_MAX_SIZE=float(args.fnd_cache_max_size),
+        FND_WINDOW=args.fnd_window,
+        FND_WINDOW_BUFFER=float(args.fnd_window_buffer),
+        DSM_NORMALIZE_TILE_SIZE=int(args.dsm_normalize_tile_size),
+        SCRATCH_DIR=(
+            None
+            if args.scratch_dir is None
+            else os.fsdecode(os.path.abspath(args.scratch_dir))
+        ),
+        DSM_OVERVIEWS=args.dsm_overviews,
+        DSM_RESAMPLING=args.dsm_resampling,
+        MAX_MEMORY=float(args.max_memory),
+        WORKERS=int(args.workers),
     )
     return dataclasses.asdict(config)
 
@@ -310,29 +695,41 @@ def run_console(config: Dict[str, Any]) -> None:
         logger.info(f"{key} = {config[key]}")
     run_bar.update(1, force=True)
 
+    budget = MemoryBudget(config["MAX_MEMORY"]) if config["MAX_MEMORY"] > 0 else None
+
     print("══════════PREPROCESSING DATA══════════")
     status.update(stage="Preprocessing Inputs", force=True)
-    fnd_obj, aoi_obj = preprocess(config)
-    run_bar.update(7, force=True)
-    fnd_obj.prep()
-    run_bar.update(45)
-    aoi_obj.prep()
+    with track_peak_memory("preprocessing"):
+        fnd_obj, aoi_obj = preprocess(config)
+        run_bar.update(7, force=True)
+        prep(fnd_obj, aoi_obj, config, budget)
+        run_bar.update(45)
     run_bar.update(4, force=True)
     logger.info(f"Registration resolution has been set to: {fnd_obj.resolution} meters")
 
     print("═════BEGINNING COARSE REGISTRATION═════")
     status.update(stage="Performing Coarse Registration", force=True)
-
-    dsm_reg = coarse_registration(fnd_obj, aoi_obj, config)
+    with track_peak_memory("coarse registration"):
+        dsm_reg = coarse_registration(fnd_obj, aoi_obj, config)
+    if budget is not None:
+        budget.fit([fnd_obj, aoi_obj], STAGE_CONSUMES[1:])
     run_bar.update(22)
 
     print("══════BEGINNING FINE REGISTRATION══════")
     status.update(stage="Performing Fine Registration", force=True)
-    icp_reg = fine_registration(fnd_obj, aoi_obj, dsm_reg, config)
+    with track_peak_memory("fine registration"):
+        icp_reg = fine_registration(fnd_obj, aoi_obj, dsm_reg, config)
+    if budget is not None:
+        icp_reg.release()
+        budget.fit([fnd_obj, aoi_obj], STAGE_CONSUMES[2:])
     run_bar.update(16)
 
     print("═════════APPLYING REGISTRATION═════════")
-    apply_registration(fnd_obj, aoi_obj, icp_reg, config)
+    with track_peak_memory("applying registration"):
+        apply_registration(fnd_obj, aoi_obj, icp_reg, config)
+    for geo_data in (fnd_obj, aoi_obj):
+        if isinstance(geo_data, PointCloud) and geo_data.columns is not None:
+            geo_data.columns.close()
     run_bar.update(5, force=True)
 
 
@@ -343,14 +740,55 @@ def preprocess(config: Dict[str, Any]) -> Tuple[GeoData, GeoData]:
         fnd_obj.native_resolution, aoi_obj.native_resolution, config["MIN_RESOLUTION"]
     )
     fnd_obj.resolution = aoi_obj.resolution = resolution
+    if config["FND_WINDOW"] or fnd_obj.is_catalog:
+        fnd_obj.set_window(aoi_obj, config["FND_WINDOW_BUFFER"])
     return fnd_obj, aoi_obj
 
 
+def prep(
+    fnd_obj: GeoData,
+    aoi_obj: GeoData,
+    config: Dict[str, Any],
+    budget: Optional[MemoryBudget] = None,
+) -> None:
+    """
+    Prepares the Foundation and AOI data, concurrently when more than one
+    worker is configured. The Foundation normal vectors are deferred to
+    coarse_registration, which generates them while the DSMs are registered.
+
+    Parameters
+    ----------
+    fnd_obj: GeoData
+        Foundation data
+    aoi_obj: GeoData
+        AOI data
+    config: dict
+        Dictionary of configuration parameters
+    budget: MemoryBudget, optional
+        Memory budget fitted once each data set is prepared
+    """
+    graph = TaskGraph(config["WORKERS"])
+    graph.add("fnd_prep", fnd_obj.prep, vectors=False)
+    if budget is not None:
+        graph.add(
+            "fnd_budget", budget.fit, [fnd_obj], STAGE_CONSUMES, after=("fnd_prep",)
+        )
+    graph.add("aoi_prep", aoi_obj.prep)
+    graph.run()
+    if budget is not None:
+        budget.fit([fnd_obj, aoi_obj], STAGE_CONSUMES)
+
+
 def coarse_registration(
     fnd_obj: GeoData, aoi_obj: GeoData, config: Dict[str, Any]
 ) -> DsmRegistration:
     dsm_reg = DsmRegistration(fnd_obj, aoi_obj, config)
-    dsm_reg.register()
+    # normal vectors deferred by prep are only needed by the fine registration,
+    # generating them takes one of the workers while the DSMs are registered
+    graph = TaskGraph(config["WORKERS"])
+    graph.add("register", dsm_reg.register, max(config["WORKERS"] - 1, 1))
+    graph.add("fnd_vectors", fnd_obj.prep_vectors)
+    graph.run()
     return dsm_reg
 
 
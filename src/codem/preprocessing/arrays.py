@@ -0,0 +1,264 @@
+"""
+arrays.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a reader for DSMs held as raw arrays rather than
+rasters: NumPy .npy grids, which are memory-mapped, and chunked Zarr arrays.
+The georeference of the array is read from a JSON sidecar file next to it,
+named after the array with a .json suffix, e.g., dsm.npy.json:
+
+    {
+        "transform": [1.0, 0.0, 627196.5, 0.0, -1.0, 4323508.0],
+        "crs": "EPSG:32618",
+        "nodata": -9999.0,
+        "area_or_point": "Area",
+        "array": "elevation"
+    }
+
+The transform holds the first six coefficients (a, b, c, d, e, f) of the
+affine transform from pixel to map coordinates. The crs, nodata,
+area_or_point, and array (the path of the array within a Zarr group) entries
+are optional. The reader mimics the parts of rasterio's DatasetReader used to
+prepare DSMs, and only the pixels of a requested window are read from disk.
+
+This module contains the following methods/class:
+
+* read_georeference - reads the georeference sidecar of an array DSM
+* ArrayDataset - rasterio-like reader of a 2D elevation array
+"""
+import json
+import os
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import rasterio.windows
+from rasterio import Affine
+from rasterio.coords import BoundingBox
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.io import MemoryFile
+from rasterio.windows import Window
+
+
+def read_georeference(file_path: str) -> Dict[str, Any]:
+    """
+    Reads the georeference sidecar of an array DSM.
+
+    Parameters
+    ----------
+    file_path: str
+        Path to the .npy file or Zarr store
+
+    Returns
+    -------
+    georeference: dict
+        Contents of the sidecar
+    """
+    sidecar = f"{file_path}.json"
+    if not os.path.exists(sidecar):
+        raise FileNotFoundError(
+            f"Georeference sidecar {sidecar} for array DSM {file_path} not found."
+        )
+    with open(sidecar, "r") as f:
+        georeference: Dict[str, Any] = json.load(f)
+    if len(georeference.get("transform", ())) != 6:
+        raise ValueError(
+            f"{sidecar} must define the six affine transform coefficients."
+        )
+    return georeference
+
+
+def _load_array(file_path: str, georeference: Dict[str, Any]) -> Any:
+    """
+    Opens the array without reading it: .npy files are memory-mapped, Zarr
+    stores are opened lazily.
+    """
+    if file_path.lower().rstrip(os.sep).endswith(".zarr"):
+        try:
+            import zarr
+        except ImportError:
+            raise ImportError("Reading Zarr DSMs requires the zarr package.")
+        array = zarr.open(file_path, mode="r")
+        if "array" in georeference:
+            array = array[georeference["array"]]
+        elif not hasattr(array, "shape"):
+            raise ValueError(
+                f"{file_path} is a Zarr group, its sidecar must name the array."
+            )
+    else:
+        array = np.load(file_path, mmap_mode="r")
+    if len(array.shape) == 3 and array.shape[0] == 1:
+        array = array[0]
+    if len(array.shape) != 2:
+        raise ValueError(
+            f"Array DSM {file_path} must be 2D, found shape {array.shape}."
+        )
+    return array
+
+
+class ArrayDataset:
+    """
+    A class for reading a 2D elevation array like a single band raster
+
+    Parameters
+    ----------
+    file_path: str
+        Path to the .npy file or Zarr store, with a georeference sidecar
+
+    Methods
+    -------
+    read
+    window
+    window_transform
+    window_bounds
+    overviews
+    tags
+    close
+    """
+
+    count = 1
+
+    def __init__(self, file_path: str) -> None:
+        self.name = file_path
+        georeference = read_georeference(file_path)
+        self.array = _load_array(file_path, georeference)
+        self.height, self.width = (int(size) for size in self.array.shape)
+        self.transform = Affine(*georeference["transform"])
+        crs = georeference.get("crs")
+        self.crs: Optional[CRS] = CRS.from_user_input(crs) if crs else None
+        self.nodata: Optional[float] = georeference.get("nodata")
+        self.area_or_point = georeference.get("area_or_point", "Area")
+        self.dtypes = (np.dtype(self.array.dtype).name,)
+
+    def __enter__(self) -> "ArrayDataset":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def bounds(self) -> BoundingBox:
+        return BoundingBox(
+            *rasterio.windows.bounds(
+                Window(0, 0, self.width, self.height), self.transform
+            )
+        )
+
+    @property
+    def res(self) -> Tuple[float, float]:
+        return abs(self.transform.a), abs(self.transform.e)
+
+    def window(self, left: float, bottom: float, right: float, top: float) -> Window:
+        return rasterio.windows.from_bounds(left, bottom, right, top, self.transform)
+
+    def window_transform(self, window: Window) -> Affine:
+        return rasterio.windows.transform(window, self.transform)
+
+    def window_bounds(self, window: Window) -> Tuple[float, float, float, float]:
+        bounds: Tuple[float, float, float, float] = rasterio.windows.bounds(
+            window, self.transform
+        )
+        return bounds
+
+    def overviews(self, band: int) -> List[int]:
+        return []
+
+    def tags(self) -> Dict[str, str]:
+        return {"AREA_OR_POINT": self.area_or_point}
+
+    def read(
+        self,
+        band: int,
+        window: Optional[Window] = None,
+        out_shape: Optional[Tuple[int, ...]] = None,
+        resampling: Resampling = Resampling.nearest,
+        out_dtype: Any = None,
+    ) -> np.ndarray:
+        """
+        Reads a window of the array, optionally resampled to a new shape.
+        Only the pixels within the window are read from disk.
+
+        Parameters
+        ----------
+        band: int
+            Band to read, must be 1
+        window: rasterio.windows.Window, optional
+            Integer pixel window to read, the full array if not given
+        out_shape: tuple, optional
+            Shape to resample the window to, the last two entries are used
+        resampling: rasterio.enums.Resampling
+            Resampling method used with out_shape
+        out_dtype: np.dtype, optional
+            Data type of the returned array
+
+        Returns
+        -------
+        data: np.array
+            The window of the array
+        """
+        if band != 1:
+            raise IndexError(f"Array DSM {self.name} has a single band.")
+        if window is None:
+            window = Window(0, 0, self.width, self.height)
+        (row_start, row_stop), (col_start, col_stop) = (
+            window.round_offsets().round_lengths().toranges()
+        )
+        dtype = np.dtype(out_dtype or self.array.dtype)
+        if out_shape is None or tuple(out_shape[-2:]) == (
+            row_stop - row_start,
+            col_stop - col_start,
+        ):
+            block = np.asarray(self.array[row_start:row_stop, col_start:col_stop])
+            return block.astype(dtype, copy=False)
+
+        # GDAL resampling kernels reach beyond the edges of a window, so a
+        # margin around the window is read and resampled with it
+        out_height, out_width = (int(size) for size in out_shape[-2:])
+        scale = max(
+            (col_stop - col_start) / out_width, (row_stop - row_start) / out_height
+        )
+        margin = 2 * int(np.ceil(max(scale, 1.0))) + 2
+        pad_row, pad_col = max(row_start - margin, 0), max(col_start - margin, 0)
+        block = np.asarray(
+            self.array[
+                pad_row : min(row_stop + margin, self.height),
+                pad_col : min(col_stop + margin, self.width),
+            ]
+        ).astype(dtype, copy=False)
+        profile = {
+            "driver": "GTiff",
+            "width": block.shape[1],
+            "height": block.shape[0],
+            "count": 1,
+            "dtype": dtype.name,
+            "transform": self.window_transform(Window(pad_col, pad_row, 1, 1)),
+            "nodata": self.nodata,
+        }
+        inner = Window(
+            col_start - pad_col,
+            row_start - pad_row,
+            col_stop - col_start,
+            row_stop - row_start,
+        )
+        with MemoryFile() as memory_file:
+            with memory_file.open(**profile) as dataset:
+                dataset.write(block, 1)
+            with memory_file.open() as dataset:
+                resampled: np.ndarray = dataset.read(
+                    1,
+                    window=inner,
+                    out_shape=(out_height, out_width),
+                    resampling=resampling,
+                )
+        return resampled
+
+    def close(self) -> None:
+        """
+        Releases the array.
+        """
+        self.array = None
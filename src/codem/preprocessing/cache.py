@@ -0,0 +1,232 @@
+"""
+cache.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a content-addressed on-disk cache for prepared foundation
+data. Preparing a foundation (DSM creation, infilling, normalization, point
+cloud and normal vector generation) is usually the most expensive stage of a
+registration run, yet the result only depends on the foundation file and a
+handful of pipeline parameters. Cache entries are keyed by the file identity
+(path, size, modification time, of every file in the store for directory
+formats such as Zarr) and those parameters. Arrays are stored as individual .npy
+files so they can be memory mapped on a cache hit, and the total cache size is
+bounded with least-recently-used eviction.
+
+This module contains the following class and function:
+
+* PrepCache - on-disk cache of prepared GeoData products
+* source_identity - size and modification time of a file or directory store
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+CACHE_VERSION = 2
+META_FILE = "meta.json"
+
+
+class PrepCache:
+    """
+    A class for storing and retrieving prepared GeoData products on disk
+
+    Parameters
+    ----------
+    cache_dir: str
+        Directory holding the cache entries
+    max_size: float
+        Maximum total size of the cache in gigabytes
+
+    Methods
+    -------
+    key
+    load
+    store
+    _entries
+    _evict
+    """
+
+    def __init__(self, cache_dir: str, max_size: float) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = int(max_size * 1024**3)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(
+        self, file_path: str, signature: Dict[str, Any], source: Optional[Any] = None
+    ) -> str:
+        """
+        Generates the cache key for a data file and the parameters used to
+        prepare it.
+
+        Parameters
+        ----------
+        file_path: str
+            Path to the data file
+        signature: dict
+            JSON serializable parameters that influence the prepared products
+        source: optional
+            JSON serializable identity of the data read from the file, see
+            source_identity, which is used when not given
+
+        Returns
+        -------
+        key: str
+            Hex digest identifying the cache entry
+        """
+        identity = {
+            "version": CACHE_VERSION,
+            "path": os.path.abspath(file_path),
+            "source": source_identity(file_path) if source is None else source,
+            "signature": signature,
+        }
+        encoded = json.dumps(identity, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+        """
+        Loads a cache entry. Arrays are returned as read-only memory maps.
+
+        Parameters
+        ----------
+        key: str
+            Cache key generated by the key method
+
+        Returns
+        -------
+        entry: tuple(dict, dict) or None
+            Arrays and attributes of the cache entry, None on a cache miss
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r")
+                for name in meta["arrays"]
+            }
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # touch the entry so eviction is least-recently-used
+        os.utime(meta_path)
+        return arrays, meta["attributes"]
+
+    def store(
+        self, key: str, arrays: Dict[str, np.ndarray], attributes: Dict[str, Any]
+    ) -> None:
+        """
+        Stores a cache entry and evicts the least recently used entries if the
+        cache size limit is exceeded.
+
+        Parameters
+        ----------
+        key: str
+            Cache key generated by the key method
+        arrays: dict
+            Named arrays to store
+        attributes: dict
+            JSON serializable attributes to store
+        """
+        entry_bytes = sum(array.nbytes for array in arrays.values())
+        if entry_bytes > self.max_bytes:
+            self.logger.warning(
+                f"Prepared data ({entry_bytes / 1024**3:.2f} GB) exceeds the cache "
+                f"size limit ({self.max_bytes / 1024**3:.2f} GB) and is not cached."
+            )
+            return None
+
+        # Write into a temporary directory and move it into place so that
+        # concurrent runs never observe a partially written entry
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+            with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                json.dump({"arrays": list(arrays), "attributes": attributes}, f)
+            os.rename(tmp_dir, os.path.join(self.cache_dir, key))
+            self.logger.debug(f"Stored prepared data in cache entry {key}")
+        except OSError:
+            # another run stored the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """
+        Lists cache entries as (last access time, size in bytes, path) tuples.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_dir, META_FILE)
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry_dir, f))
+                for f in os.listdir(entry_dir)
+            )
+            entries.append((os.path.getmtime(meta_path), size, entry_dir))
+        return entries
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits within the
+        size limit.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            self.logger.debug(f"Evicting cache entry {os.path.basename(entry_dir)}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+
+def source_identity(path: str) -> List[Any]:
+    """
+    Identifies the contents of a data file by its size and modification time.
+    A directory store, such as a Zarr array, is identified by the relative
+    path, size, and modification time of every file within it, as editing a
+    chunk does not change the directory itself.
+
+    Parameters
+    ----------
+    path: str
+        Path to the data file or directory
+
+    Returns
+    -------
+    identity: list
+        [size, mtime] of a file, [relative path, size, mtime] entries of
+        the files of a directory
+    """
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+    files = []
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        for name in sorted(names):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            files.append(
+                [os.path.relpath(file_path, path), stat.st_size, stat.st_mtime_ns]
+            )
+    return files
@@ -0,0 +1,339 @@
+"""
+catalog.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a footprint index for foundations made of many DSM or
+point cloud tiles in a directory. The index records the bounds, spatial
+reference, and the header information needed to mosaic each tile, and is
+persisted as a JSON file in the tile directory. Updating the index only reads
+the headers of tiles that are new or have changed since the last update, so
+adding tiles to a catalog does not require a full rescan. Queries return the
+tiles whose footprints intersect a bounding box.
+
+This module contains the following methods/class:
+
+* TileCatalog - persistent footprint index of a directory of tiles
+* build_vrt - GDAL VRT mosaic of DSM tiles
+"""
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import codem.lib.resources as r
+import numpy as np
+import pdal
+import rasterio
+from rasterio.crs import CRS
+
+INDEX_FILE = ".codem_index.json"
+INDEX_VERSION = 1
+
+
+def _tile_type(file_name: str) -> Optional[str]:
+    """
+    Returns "dsm" or "pcloud" for supported tile files, None otherwise.
+    """
+    name = file_name.lower()
+    if os.path.splitext(name)[-1] in (".tif", ".tiff"):
+        return "dsm"
+    if any(name.endswith(ext) for ext in r.pcloud_filetypes):
+        return "pcloud"
+    return None
+
+
+class TileCatalog:
+    """
+    A class for indexing the footprints of the tiles in a directory
+
+    Parameters
+    ----------
+    directory: str
+        Directory holding the tiles, searched recursively
+
+    Methods
+    -------
+    update
+    select
+    query
+    fingerprint
+    _read_header
+    _load
+    _save
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.directory = os.path.abspath(directory)
+        self.index_path = os.path.join(self.directory, INDEX_FILE)
+        self.tiles: Dict[str, Dict[str, Any]] = {}
+        self._load()
+        self.update()
+
+    @property
+    def type(self) -> str:
+        """
+        The type of the tiles, "dsm" or "pcloud".
+        """
+        types: Set[str] = {tile["type"] for tile in self.tiles.values()}
+        if len(types) != 1:
+            raise ValueError(
+                f"{self.directory} must contain either DSM or point cloud tiles, "
+                f"found {sorted(types) if types else 'none'}."
+            )
+        return types.pop()
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        The union of the tile footprints.
+        """
+        footprints = np.array([tile["bounds"] for tile in self.tiles.values()])
+        return (
+            float(footprints[:, 0].min()),
+            float(footprints[:, 1].min()),
+            float(footprints[:, 2].max()),
+            float(footprints[:, 3].max()),
+        )
+
+    @property
+    def crs(self) -> Optional[CRS]:
+        """
+        The spatial reference shared by all tiles, None if not defined.
+        """
+        wkts = {tile["crs"] for tile in self.tiles.values()}
+        if len(wkts) > 1:
+            crss = {CRS.from_string(wkt) if wkt else None for wkt in wkts}
+            if len(crss) > 1:
+                raise ValueError(
+                    f"Tiles in {self.directory} have different spatial references."
+                )
+        wkt = wkts.pop() if wkts else ""
+        return CRS.from_string(wkt) if wkt else None
+
+    def update(self) -> None:
+        """
+        Brings the index up to date with the directory. Tiles whose size and
+        modification time are unchanged keep their index entry; only new or
+        modified tiles have their header read. Entries of deleted tiles are
+        dropped. The index is saved if anything changed.
+        """
+        found: Dict[str, os.stat_result] = {}
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if _tile_type(file_name) is None:
+                    continue
+                path = os.path.join(root, file_name)
+                found[os.path.relpath(path, self.directory)] = os.stat(path)
+
+        changed = False
+        for name in list(self.tiles):
+            if name not in found:
+                del self.tiles[name]
+                changed = True
+        for name, stat in found.items():
+            tile = self.tiles.get(name)
+            if (
+                tile is not None
+                and tile["size"] == stat.st_size
+                and tile["mtime"] == stat.st_mtime_ns
+            ):
+                continue
+            tile = self._read_header(os.path.join(self.directory, name))
+            tile.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+            self.tiles[name] = tile
+            changed = True
+
+        if changed:
+            self.logger.info(
+                f"Indexed {len(self.tiles)} tiles in {self.directory}, "
+                f"{len(found)} found"
+            )
+            self._save()
+
+    def select(
+        self, bounds: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Selects the tiles whose footprints intersect a bounding box, or every
+        tile if no bounding box is given. The footprints of thousands of tiles
+        are tested in a single vectorized comparison.
+
+        Parameters
+        ----------
+        bounds: tuple, optional
+            (minx, miny, maxx, maxy) in the spatial reference of the tiles
+
+        Returns
+        -------
+        tiles: list
+            (path, index entry) pairs of the intersecting tiles, sorted by path
+        """
+        names = sorted(self.tiles)
+        if bounds is not None and names:
+            footprints = np.array([self.tiles[name]["bounds"] for name in names])
+            minx, miny, maxx, maxy = bounds
+            hits = (
+                (footprints[:, 0] <= maxx)
+                & (footprints[:, 2] >= minx)
+                & (footprints[:, 1] <= maxy)
+                & (footprints[:, 3] >= miny)
+            )
+            names = [name for name, hit in zip(names, hits) if hit]
+        return [
+            (os.path.join(self.directory, name), self.tiles[name]) for name in names
+        ]
+
+    def query(
+        self, bounds: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[str]:
+        """
+        Returns the paths of the tiles whose footprints intersect a bounding
+        box, or of every tile if no bounding box is given, see select.
+        """
+        return [path for path, _ in self.select(bounds)]
+
+    def fingerprint(
+        self, bounds: Optional[Tuple[float, float, float, float]] = None
+    ) -> List[List[Any]]:
+        """
+        Returns the relative path, size, and modification time of the tiles
+        intersecting a bounding box, which identify the data read for it.
+        """
+        return [
+            [os.path.relpath(path, self.directory), tile["size"], tile["mtime"]]
+            for path, tile in self.select(bounds)
+        ]
+
+    def _read_header(self, path: str) -> Dict[str, Any]:
+        """
+        Reads the footprint and mosaicking information of a tile without
+        reading its data.
+        """
+        tile_type = _tile_type(path)
+        if tile_type == "dsm":
+            with rasterio.open(path) as data:
+                return {
+                    "type": tile_type,
+                    "bounds": list(data.bounds),
+                    "crs": "" if data.crs is None else data.crs.to_wkt(),
+                    "resolution": list(data.res),
+                    "width": data.width,
+                    "height": data.height,
+                    "nodata": data.nodata,
+                    "area_or_point": data.tags().get("AREA_OR_POINT", "Area"),
+                }
+        quickinfo = pdal.Pipeline(json.dumps([path])).quickinfo
+        header = [val for key, val in quickinfo.items() if "readers" in key][0]
+        bounds = header["bounds"]
+        return {
+            "type": tile_type,
+            "bounds": [bounds["minx"], bounds["miny"], bounds["maxx"], bounds["maxy"]],
+            "crs": header.get("srs", {}).get("horizontal", ""),
+            "num_points": header["num_points"],
+        }
+
+    def _load(self) -> None:
+        """
+        Loads the persisted index, if one exists for the current version.
+        """
+        if not os.path.exists(self.index_path):
+            return None
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable tile index: {e}")
+            return None
+        if index.get("version") == INDEX_VERSION:
+            self.tiles = index["tiles"]
+
+    def _save(self) -> None:
+        """
+        Persists the index next to the tiles. A read-only tile directory only
+        costs a rescan of the headers on the next run.
+        """
+        index = {"version": INDEX_VERSION, "tiles": self.tiles}
+        try:
+            with open(self.index_path, "w") as f:
+                json.dump(index, f)
+        except OSError as e:
+            self.logger.warning(f"Could not write tile index: {e}")
+
+
+def build_vrt(
+    selected: List[Tuple[str, Dict[str, Any]]], crs: Optional[CRS], vrt_path: str
+) -> None:
+    """
+    Writes a GDAL VRT that mosaics DSM tiles on a common grid. Nothing is
+    read until the VRT is, and then only from the tiles that overlap the
+    requested window. All tiles must share a resolution.
+
+    Parameters
+    ----------
+    selected: list
+        (path, index entry) pairs of the tiles to mosaic, see
+        TileCatalog.select
+    crs: rasterio.crs.CRS or None
+        Spatial reference of the tiles
+    vrt_path: str
+        Path of the VRT file to write
+    """
+    paths = [path for path, _ in selected]
+    tiles = [tile for _, tile in selected]
+    resolutions = {tuple(tile["resolution"]) for tile in tiles}
+    if len(resolutions) != 1:
+        raise ValueError(
+            f"DSM tiles must share a resolution, found {sorted(resolutions)}"
+        )
+    xres, yres = resolutions.pop()
+    minx = min(tile["bounds"][0] for tile in tiles)
+    miny = min(tile["bounds"][1] for tile in tiles)
+    maxx = max(tile["bounds"][2] for tile in tiles)
+    maxy = max(tile["bounds"][3] for tile in tiles)
+    width = int(round((maxx - minx) / xres))
+    height = int(round((maxy - miny) / yres))
+
+    nodatas = {tile["nodata"] for tile in tiles if tile["nodata"] is not None}
+    # the gaps between tiles need a nodata value
+    nodata = nodatas.pop() if len(nodatas) == 1 else -9999.0
+
+    vrt = ET.Element("VRTDataset", rasterXSize=str(width), rasterYSize=str(height))
+    if crs is not None:
+        ET.SubElement(vrt, "SRS").text = crs.to_wkt()
+    ET.SubElement(vrt, "GeoTransform").text = f"{minx}, {xres}, 0, {maxy}, 0, {-yres}"
+    metadata = ET.SubElement(vrt, "Metadata")
+    ET.SubElement(metadata, "MDI", key="AREA_OR_POINT").text = tiles[0]["area_or_point"]
+    # DSMs are read as float32, see DSM._create_dsm
+    band = ET.SubElement(vrt, "VRTRasterBand", dataType="Float32", band="1")
+    ET.SubElement(band, "NoDataValue").text = repr(float(nodata))
+    for path, tile in zip(paths, tiles):
+        source = ET.SubElement(band, "ComplexSource")
+        ET.SubElement(source, "SourceFilename", relativeToVRT="0").text = path
+        ET.SubElement(source, "SourceBand").text = "1"
+        ET.SubElement(
+            source,
+            "SrcRect",
+            xOff="0",
+            yOff="0",
+            xSize=str(tile["width"]),
+            ySize=str(tile["height"]),
+        )
+        ET.SubElement(
+            source,
+            "DstRect",
+            xOff=repr((tile["bounds"][0] - minx) / xres),
+            yOff=repr((maxy - tile["bounds"][3]) / yres),
+            xSize=str(tile["width"]),
+            ySize=str(tile["height"]),
+        )
+        if tile["nodata"] is not None:
+            ET.SubElement(source, "NODATA").text = repr(float(tile["nodata"]))
+    ET.ElementTree(vrt).write(vrt_path)
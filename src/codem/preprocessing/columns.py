@@ -0,0 +1,123 @@
+"""
+columns.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a per-run, columnar cache of point cloud data. A point
+cloud is otherwise read, and LAZ data decompressed, once to estimate its
+resolution, once to create its DSM, and once more to apply the registration.
+The cache stores every dimension of the points read the first time as a
+separate .npy file, and later stages read the columns they need memory-mapped.
+The cache directory is removed when the cache is closed or garbage collected.
+
+This module contains the following class:
+
+* PointColumns - columnar .npy cache of a point cloud
+"""
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+
+class PointColumns:
+    """
+    A class for caching point cloud dimensions as memory-mapped columns
+
+    Parameters
+    ----------
+    parent_dir: str
+        Directory in which the cache directory is created
+    prefix: str
+        Prefix of the cache directory name
+
+    Methods
+    -------
+    store
+    column
+    load
+    close
+    """
+
+    def __init__(self, parent_dir: str, prefix: str = "points_") -> None:
+        self.directory = tempfile.mkdtemp(prefix=prefix, dir=parent_dir)
+        self.dtype: Optional[np.dtype] = None
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, self.directory, ignore_errors=True
+        )
+
+    @property
+    def populated(self) -> bool:
+        return self.dtype is not None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def store(self, points: np.ndarray) -> None:
+        """
+        Writes every dimension of the points to its own .npy file.
+
+        Parameters
+        ----------
+        points: np.array
+            Structured array of points, as returned by a PDAL pipeline
+        """
+        if points.dtype.names is None:
+            raise ValueError("Point data must be a structured array.")
+        for name in points.dtype.names:
+            np.save(self._path(name), points[name])
+        self.dtype = points.dtype
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a read-only memory map of one dimension.
+
+        Parameters
+        ----------
+        name: str
+            Dimension name, e.g., "X"
+
+        Returns
+        -------
+        column: np.array
+            The memory-mapped dimension
+        """
+        if self.dtype is None:
+            raise RuntimeError("The point column cache has not been populated.")
+        column: np.ndarray = np.load(self._path(name), mmap_mode="r")
+        return column
+
+    def load(self, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Assembles a structured array of points from the cached columns.
+
+        Parameters
+        ----------
+        names: sequence of str, optional
+            Dimensions to load, all cached dimensions if not given
+
+        Returns
+        -------
+        points: np.array
+            Structured array of points
+        """
+        if self.dtype is None:
+            raise RuntimeError("The point column cache has not been populated.")
+        if names is None:
+            names = self.dtype.names or ()
+        dtype = np.dtype([(name, self.dtype[name]) for name in names])
+        points = np.empty(self.column(names[0]).shape[0], dtype=dtype)
+        for name in names:
+            points[name] = self.column(name)
+        return points
+
+    def close(self) -> None:
+        """
+        Removes the cache directory.
+        """
+        self.dtype = None
+        self._finalizer()
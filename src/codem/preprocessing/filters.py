@@ -0,0 +1,220 @@
+"""
+filters.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains the filters used to normalize DSMs for feature extraction.
+The strong filter of the normalization bandpass has a standard deviation of
+several tens of pixels at fine pipeline resolutions, and the cost of a direct
+Gaussian convolution grows with the kernel size. Blurs with large standard
+deviations are therefore computed on a downsampled copy of the array and
+upsampled back to full resolution.
+
+This module contains the following methods:
+
+* gaussian_blur - Gaussian blur that switches to a pyramid for large sigmas
+* normalize - bandpass filters a DSM and quantizes it to 8 bits
+* normalize_tiled - bounded-memory, tile by tile version of normalize
+"""
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+# Blurs with a standard deviation (in pixels) above this value are computed at
+# a reduced scale
+PYRAMID_SIGMA = 8.0
+
+# Number of bandpassed pixels sampled to estimate the normalization percentiles
+# in tiled mode
+PERCENTILE_SAMPLE_SIZE = 10_000_000
+
+
+def gaussian_blur(
+    array: np.ndarray, sigma: float, pyramid_sigma: float = PYRAMID_SIGMA
+) -> np.ndarray:
+    """
+    Applies a Gaussian blur. When sigma exceeds pyramid_sigma, the array is
+    box-averaged by a power of two factor, blurred at the reduced scale, and
+    bilinearly upsampled. The reduced scale sigma is chosen so the combined
+    variance of the box average, the reduced scale blur, and the bilinear
+    interpolation matches the requested sigma.
+
+    Parameters
+    ----------
+    array: np.array
+        Array to blur
+    sigma: float
+        Standard deviation of the Gaussian filter in pixels
+    pyramid_sigma: float
+        Standard deviation above which the blur is computed at reduced scale
+
+    Returns
+    -------
+    blurred: np.array
+        The blurred array
+    """
+    if sigma <= pyramid_sigma:
+        return cv2.GaussianBlur(array, (0, 0), sigma)
+
+    factor = 2 ** int(np.floor(np.log2(2 * sigma / pyramid_sigma)))
+    # Reflect the array about its edges at full resolution, as the direct blur
+    # does, with a margin wide enough that the reduced scale border handling
+    # has no influence on the result
+    margin = factor * int(np.ceil(4 * sigma / factor))
+    rows, cols = array.shape
+    padded = cv2.copyMakeBorder(
+        array,
+        margin,
+        margin - rows % factor,
+        margin,
+        margin - cols % factor,
+        cv2.BORDER_REFLECT_101,
+    )
+    small = cv2.resize(
+        padded,
+        (padded.shape[1] // factor, padded.shape[0] // factor),
+        interpolation=cv2.INTER_AREA,
+    )
+    # box average variance is factor^2 / 12, linear interpolation factor^2 / 6
+    small_sigma = np.sqrt(sigma**2 - factor**2 / 4) / factor
+    small = cv2.GaussianBlur(small, (0, 0), small_sigma)
+    blurred: np.ndarray = cv2.resize(
+        small, (padded.shape[1], padded.shape[0]), interpolation=cv2.INTER_LINEAR
+    )
+    return blurred[margin : margin + rows, margin : margin + cols]
+
+
+def normalize(
+    array: np.ndarray,
+    weak_sigma: float,
+    strong_sigma: float,
+    pyramid_sigma: float = PYRAMID_SIGMA,
+) -> np.ndarray:
+    """
+    Suppresses high frequency information and removes long wavelength
+    topography with a difference of Gaussians bandpass filter, then clips the
+    result to its 1st and 99th percentiles and quantizes it to 8 bits.
+
+    Parameters
+    ----------
+    array: np.array
+        Infilled DSM array
+    weak_sigma: float
+        Standard deviation of the weak Gaussian filter in pixels
+    strong_sigma: float
+        Standard deviation of the strong Gaussian filter in pixels
+    pyramid_sigma: float
+        Standard deviation above which blurs are computed at reduced scale
+
+    Returns
+    -------
+    normed: np.array
+        The normalized 8-bit array
+    """
+    weak_filtered = gaussian_blur(array, weak_sigma, pyramid_sigma)
+    strong_filtered = gaussian_blur(array, strong_sigma, pyramid_sigma)
+    bandpassed = weak_filtered - strong_filtered
+    low = np.percentile(bandpassed, 1)
+    high = np.percentile(bandpassed, 99)
+    clipped = np.clip(bandpassed, low, high)
+    normalized = (clipped - low) / (high - low)
+    quantized: np.ndarray = (255 * normalized).astype(np.uint8)
+    return quantized
+
+
+def _tiles(
+    shape: Tuple[int, int], tile_size: int, halo: int
+) -> Iterator[Tuple[slice, slice, slice, slice]]:
+    """
+    Generates (row, column) slices of the tile with its halo and of the tile
+    core relative to the haloed tile.
+    """
+    rows, cols = shape
+    for r0 in range(0, rows, tile_size):
+        r1 = min(r0 + tile_size, rows)
+        hr0, hr1 = max(r0 - halo, 0), min(r1 + halo, rows)
+        for c0 in range(0, cols, tile_size):
+            c1 = min(c0 + tile_size, cols)
+            hc0, hc1 = max(c0 - halo, 0), min(c1 + halo, cols)
+            yield (
+                slice(hr0, hr1),
+                slice(hc0, hc1),
+                slice(r0 - hr0, r1 - hr0),
+                slice(c0 - hc0, c1 - hc0),
+            )
+
+
+def normalize_tiled(
+    array: np.ndarray,
+    weak_sigma: float,
+    strong_sigma: float,
+    tile_size: int,
+    out: Optional[np.ndarray] = None,
+    pyramid_sigma: float = PYRAMID_SIGMA,
+    sample_size: int = PERCENTILE_SAMPLE_SIZE,
+) -> np.ndarray:
+    """
+    Computes the same result as normalize while only holding one tile of
+    intermediate filter products in memory at a time. Each tile is filtered
+    with a halo of 4 strong filter standard deviations, which covers the
+    Gaussian kernel support, so tile seams are not visible. The 1st and 99th
+    percentiles are estimated from a strided sample of the bandpassed pixels
+    in a first pass; the bandpass is recomputed and quantized into the output
+    array in a second pass. The percentiles are exact when the array has no
+    more than sample_size pixels.
+
+    Parameters
+    ----------
+    array: np.array
+        Infilled DSM array, may be memory mapped
+    weak_sigma: float
+        Standard deviation of the weak Gaussian filter in pixels
+    strong_sigma: float
+        Standard deviation of the strong Gaussian filter in pixels
+    tile_size: int
+        Size of the square tiles in pixels, excluding the halo
+    out: np.array, optional
+        Preallocated uint8 output array, e.g., a memory map
+    pyramid_sigma: float
+        Standard deviation above which blurs are computed at reduced scale
+    sample_size: int
+        Approximate number of pixels sampled to estimate the percentiles
+
+    Returns
+    -------
+    normed: np.array
+        The normalized 8-bit array
+    """
+    if out is None:
+        out = np.empty(array.shape, dtype=np.uint8)
+    halo = int(np.ceil(4 * max(weak_sigma, strong_sigma)))
+    step = max(1, array.size // sample_size)
+
+    def bandpass(rows: slice, cols: slice, core: Tuple[slice, slice]) -> np.ndarray:
+        tile = np.asarray(array[rows, cols])
+        weak_filtered = gaussian_blur(tile, weak_sigma, pyramid_sigma)
+        strong_filtered = gaussian_blur(tile, strong_sigma, pyramid_sigma)
+        bandpassed: np.ndarray = (weak_filtered - strong_filtered)[core]
+        return bandpassed
+
+    shape = (array.shape[0], array.shape[1])
+    samples = []
+    for rows, cols, core_rows, core_cols in _tiles(shape, tile_size, halo):
+        bandpassed = bandpass(rows, cols, (core_rows, core_cols))
+        samples.append(bandpassed.ravel()[::step].copy())
+    sample = np.concatenate(samples)
+    low = np.percentile(sample, 1)
+    high = np.percentile(sample, 99)
+    del samples, sample
+
+    for rows, cols, core_rows, core_cols in _tiles(shape, tile_size, halo):
+        bandpassed = bandpass(rows, cols, (core_rows, core_cols))
+        clipped = np.clip(bandpassed, low, high)
+        normalized = (clipped - low) / (high - low)
+        out_rows = slice(rows.start + core_rows.start, rows.start + core_rows.stop)
+        out_cols = slice(cols.start + core_cols.start, cols.start + core_cols.stop)
+        out[out_rows, out_cols] = (255 * normalized).astype(np.uint8)
+    return out
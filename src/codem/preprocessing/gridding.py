@@ -0,0 +1,296 @@
+"""
+gridding.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains an in-memory gridding engine that rasters point data to a
+DSM without writing an intermediate GeoTIFF. It reproduces the grid geometry
+and binning of PDAL's writers.gdal: the grid origin is the minimum corner of
+the point bounds, and every point contributes to each cell whose center lies
+within a radius of resolution * sqrt(2) of the point. Points can be added in
+chunks, so the memory used beyond the output raster is bounded by the chunk
+size.
+
+Triangles can also be rasterized directly: each cell whose center falls
+inside a triangle's horizontal footprint receives the elevation of the
+triangle at the cell center, so a mesh with large faces yields a complete
+surface instead of isolated vertex samples.
+
+This module contains the following class:
+
+* GridAccumulator - accumulates points or triangles into a DSM with a max,
+  min, mean, or inverse distance weighted reducer
+"""
+from typing import Iterator
+from typing import Tuple
+
+import numpy as np
+import rasterio
+
+GRID_ENGINES = ("pdal", "numpy")
+GRID_REDUCERS = ("max", "min", "mean", "idw")
+
+
+class GridAccumulator:
+    """
+    A class for gridding points to a DSM chunk by chunk
+
+    Parameters
+    ----------
+    bounds: tuple
+        (minx, miny, maxx, maxy) bounds of all points that will be added
+    resolution: float
+        Grid cell size
+    reducer: str
+        One of "max", "min", "mean", or "idw"
+    nodata: float
+        Value assigned to cells that no point contributes to
+
+    Methods
+    -------
+    add
+    add_triangles
+    _triangle_batches
+    _reduce
+    result
+    """
+
+    def __init__(
+        self,
+        bounds: Tuple[float, float, float, float],
+        resolution: float,
+        reducer: str = "max",
+        nodata: float = -9999.0,
+    ) -> None:
+        if reducer not in GRID_REDUCERS:
+            raise ValueError(
+                f"Unknown grid reducer {reducer}, expected one of {GRID_REDUCERS}"
+            )
+        minx, miny, maxx, maxy = bounds
+        self.resolution = resolution
+        self.reducer = reducer
+        self.nodata = nodata
+        self.radius = resolution * np.sqrt(2)
+        self.origin = (minx, miny)
+        self.shape = (
+            int((maxy - miny) / resolution) + 1,
+            int((maxx - minx) / resolution) + 1,
+        )
+        self.transform = rasterio.Affine(
+            resolution, 0.0, minx, 0.0, -resolution, miny + self.shape[0] * resolution
+        )
+        self.area_or_point = "Area"
+
+        if reducer == "max":
+            self._values = np.full(self.shape, -np.inf)
+        elif reducer == "min":
+            self._values = np.full(self.shape, np.inf)
+        else:
+            self._values = np.zeros(self.shape)
+            self._weights = np.zeros(self.shape)
+
+    def add(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> None:
+        """
+        Adds a chunk of points to the grid.
+
+        Parameters
+        ----------
+        x: np.array
+            Point x coordinates
+        y: np.array
+            Point y coordinates
+        z: np.array
+            Point elevations
+        """
+        rows, cols = self.shape
+        # column and row measured upward from the grid origin, in cells
+        i = (np.asarray(x, dtype=np.double) - self.origin[0]) / self.resolution
+        j = (np.asarray(y, dtype=np.double) - self.origin[1]) / self.resolution
+        i_cell = np.floor(i).astype(np.int64)
+        j_cell = np.floor(j).astype(np.int64)
+        # rows of the output raster count downward from the top
+        cell = (rows - 1 - j_cell) * cols + i_cell
+
+        # sort once by containing cell; shifting every cell index by the same
+        # neighbor offset keeps the order, so each neighbor pass stays sorted
+        order = np.argsort(cell, kind="stable")
+        i, j, i_cell, j_cell, cell = (
+            i[order],
+            j[order],
+            i_cell[order],
+            j_cell[order],
+            cell[order],
+        )
+        z = np.asarray(z, dtype=np.double)[order]
+        del order
+
+        # a radius of resolution * sqrt(2) only reaches the adjacent cells
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                ci = i_cell + di
+                cj = j_cell + dj
+                distance = np.hypot(ci + 0.5 - i, cj + 0.5 - j) * self.resolution
+                keep = (
+                    (distance <= self.radius)
+                    & (ci >= 0)
+                    & (ci < cols)
+                    & (cj >= 0)
+                    & (cj < rows)
+                )
+                self._reduce(cell[keep] - dj * cols + di, z[keep], distance[keep])
+
+    def add_triangles(
+        self, vertices: np.ndarray, faces: np.ndarray, chunk_size: int = 10_000_000
+    ) -> None:
+        """
+        Rasterizes triangles to the grid. Every cell whose center lies inside
+        the horizontal footprint of a triangle receives the barycentric
+        interpolation of the triangle's vertex elevations at the cell center.
+        Each vertex is also added to the cell containing it, so triangles
+        smaller than a cell are not lost. Only the max and min reducers are
+        supported.
+
+        Parameters
+        ----------
+        vertices: np.array
+            N x 3 array of vertex coordinates
+        faces: np.array
+            M x 3 array of vertex indices of the triangles
+        chunk_size: int
+            Approximate number of candidate cells evaluated at a time, which
+            bounds the memory used beyond the output raster
+        """
+        if self.reducer not in ("max", "min"):
+            raise ValueError(
+                f"Triangle rasterization requires the max or min reducer, not {self.reducer}"
+            )
+        rows, cols = self.shape
+        # vertex coordinates in cells, measured upward from the grid origin
+        u = (vertices[:, 0] - self.origin[0]) / self.resolution
+        v = (vertices[:, 1] - self.origin[1]) / self.resolution
+        z = np.asarray(vertices[:, 2], dtype=np.double)
+
+        i_cell = np.clip(np.floor(u).astype(np.int64), 0, cols - 1)
+        j_cell = np.clip(np.floor(v).astype(np.int64), 0, rows - 1)
+        cell = (rows - 1 - j_cell) * cols + i_cell
+        order = np.argsort(cell, kind="stable")
+        self._reduce(cell[order], z[order], np.zeros(order.size))
+        del i_cell, j_cell, cell, order
+
+        for batch, tri, ci, cj in self._triangle_batches(u, v, faces, chunk_size):
+            a, b, c = faces[batch, 0], faces[batch, 1], faces[batch, 2]
+            # the barycentric coordinates of a cell center are affine in its
+            # offset from the third vertex, with per-triangle coefficients;
+            # degenerate triangles have no candidate cells
+            denom = (v[b] - v[c]) * (u[a] - u[c]) + (u[c] - u[b]) * (v[a] - v[c])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                coefficients = (
+                    (v[b] - v[c]) / denom,
+                    (u[c] - u[b]) / denom,
+                    (v[c] - v[a]) / denom,
+                    (u[a] - u[c]) / denom,
+                )
+            du = ci + 0.5 - u[c][tri]
+            dv = cj + 0.5 - v[c][tri]
+            la = coefficients[0][tri] * du + coefficients[1][tri] * dv
+            lb = coefficients[2][tri] * du + coefficients[3][tri] * dv
+            del du, dv
+            # a small tolerance keeps cell centers on shared edges
+            eps = -1e-9
+            inside = (la >= eps) & (lb >= eps) & (la + lb <= 1.0 - eps)
+            tri = tri[inside]
+            values = (
+                z[c][tri]
+                + la[inside] * (z[a] - z[c])[tri]
+                + lb[inside] * (z[b] - z[c])[tri]
+            )
+            cells = (rows - 1 - cj[inside]) * cols + ci[inside]
+            order = np.argsort(cells)
+            self._reduce(cells[order], values[order], np.zeros(order.size))
+
+    def _triangle_batches(
+        self, u: np.ndarray, v: np.ndarray, faces: np.ndarray, chunk_size: int
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Generates batches of candidate cells, the grid cells whose centers lie
+        within the bounding box of a triangle, of roughly chunk_size entries.
+        Each batch holds the indices of its faces and, per candidate cell, the
+        index of the triangle within the batch, the column, and the row counted
+        upward. Degenerate triangles, with no horizontal extent, are skipped.
+        """
+        rows, cols = self.shape
+        fu = u[faces]
+        fv = v[faces]
+        # cell centers are at half-integer coordinates
+        i_min = np.maximum(np.ceil(fu.min(axis=1) - 0.5), 0).astype(np.int64)
+        i_max = np.minimum(np.floor(fu.max(axis=1) - 0.5), cols - 1).astype(np.int64)
+        j_min = np.maximum(np.ceil(fv.min(axis=1) - 0.5), 0).astype(np.int64)
+        j_max = np.minimum(np.floor(fv.max(axis=1) - 0.5), rows - 1).astype(np.int64)
+        area = (fu[:, 0] - fu[:, 2]) * (fv[:, 1] - fv[:, 2]) - (fu[:, 1] - fu[:, 2]) * (
+            fv[:, 0] - fv[:, 2]
+        )
+        del fu, fv
+        width = np.maximum(i_max - i_min + 1, 0)
+        counts = width * np.maximum(j_max - j_min + 1, 0)
+        counts[area == 0] = 0
+
+        ends = np.cumsum(counts)
+        start = 0
+        while start < faces.shape[0]:
+            offset = ends[start - 1] if start > 0 else 0
+            stop = int(np.searchsorted(ends, offset + chunk_size, side="right"))
+            stop = max(stop, start + 1)
+            batch = np.arange(start, stop)
+            n = counts[batch]
+            tri = np.repeat(batch, n)
+            first = np.repeat(np.cumsum(n) - n, n)
+            k = np.arange(tri.size) - first
+            ci = i_min[tri] + k % width[tri]
+            cj = j_min[tri] + k // width[tri]
+            yield batch, tri - start, ci, cj
+            start = stop
+
+    def _reduce(self, cells: np.ndarray, z: np.ndarray, distance: np.ndarray) -> None:
+        """
+        Folds point values, sorted by cell, into their cells with one
+        vectorized reduction per cell.
+        """
+        if cells.size == 0:
+            return None
+        starts = np.flatnonzero(np.diff(cells, prepend=cells[0] - 1))
+        unique = cells[starts]
+        values = self._values.reshape(-1)
+
+        if self.reducer == "max":
+            values[unique] = np.maximum(values[unique], np.maximum.reduceat(z, starts))
+        elif self.reducer == "min":
+            values[unique] = np.minimum(values[unique], np.minimum.reduceat(z, starts))
+        else:
+            if self.reducer == "mean":
+                weight = np.ones_like(z)
+            else:
+                weight = 1.0 / np.maximum(distance, 1e-12)
+            weights = self._weights.reshape(-1)
+            values[unique] += np.add.reduceat(weight * z, starts)
+            weights[unique] += np.add.reduceat(weight, starts)
+
+    def result(self) -> np.ndarray:
+        """
+        Returns the DSM, with nodata in cells no point contributed to. The
+        max and min reducers finalize their grid in place, so no more points
+        should be added afterwards.
+
+        Returns
+        -------
+        dsm: np.array
+            The gridded DSM
+        """
+        if self.reducer in ("max", "min"):
+            empty = np.isinf(self._values)
+            dsm = self._values
+        else:
+            empty = self._weights == 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                dsm = self._values / self._weights
+        dsm[empty] = self.nodata
+        return dsm
@@ -0,0 +1,195 @@
+"""
+infill.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains methods for infilling void pixels in DSM arrays prior to
+normalization and feature extraction. DSMs gridded from sparse point clouds or
+mesh vertices can contain large numbers of voids, and repeatedly running
+rasterio's fillnodata over the full array until every void is filled can take
+many passes. The push-pull and nearest methods fill any void pattern in a
+bounded number of passes.
+
+This module contains the following methods:
+
+* idw_fill - iterative inverse distance weighting via rasterio's fillnodata
+* pushpull_fill - push-pull pyramid infilling
+* nearest_fill - nearest valid pixel infilling followed by smoothing
+* infill - dispatches to one of the above methods
+"""
+from typing import Optional
+
+import cv2
+import numpy as np
+import rasterio.fill
+from scipy import ndimage
+
+INFILL_METHODS = ("idw", "pushpull", "nearest")
+
+
+def _valid(array: np.ndarray, nodata: Optional[float]) -> np.ndarray:
+    """
+    Flags valid (not NaN and not nodata) pixels with a value of 1.
+    """
+    valid = ~np.isnan(array)
+    if nodata is not None:
+        valid &= array != nodata
+    mask: np.ndarray = valid.astype(np.uint8)
+    return mask
+
+
+def idw_fill(
+    array: np.ndarray, mask: np.ndarray, nodata: Optional[float]
+) -> np.ndarray:
+    """
+    Infills voids by repeatedly applying rasterio's inverse distance weighting
+    interpolation until no voids remain.
+
+    Parameters
+    ----------
+    array: np.array
+        DSM array
+    mask: np.array
+        Valid pixel mask, 1 for valid and 0 for void pixels
+    nodata: float or None
+        Nodata value of the DSM array
+
+    Returns
+    -------
+    infilled: np.array
+        The infilled DSM array
+    """
+    infill_mask = np.copy(mask)
+    while np.sum(infill_mask) < infill_mask.size:
+        array = rasterio.fill.fillnodata(array, mask=infill_mask)
+        infill_mask = _valid(array, nodata)
+    return array
+
+
+def _block_sum(array: np.ndarray) -> np.ndarray:
+    """
+    Sums 2x2 pixel blocks, zero padding odd dimensions.
+    """
+    rows, cols = array.shape
+    padded = np.pad(array, ((0, rows % 2), (0, cols % 2)))
+    summed: np.ndarray = padded.reshape(
+        padded.shape[0] // 2, 2, padded.shape[1] // 2, 2
+    ).sum(axis=(1, 3))
+    return summed
+
+
+def pushpull_fill(array: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Infills voids with the push-pull algorithm. The push phase builds a pyramid
+    of weighted block averages of the valid pixels until a level without voids
+    (or a single row or column) is reached. The pull phase then walks back down
+    the pyramid, filling void pixels at each level from the bilinearly upsampled
+    level above. Valid pixels are never modified, and the number of passes is
+    bounded by the log2 of the array size regardless of the void pattern.
+
+    Parameters
+    ----------
+    array: np.array
+        DSM array
+    mask: np.array
+        Valid pixel mask, 1 for valid and 0 for void pixels
+
+    Returns
+    -------
+    infilled: np.array
+        The infilled DSM array
+    """
+    valid = mask.astype(bool)
+    weights = valid.astype(np.float32)
+    sums = np.where(valid, array, 0).astype(np.float32)
+
+    # push: weighted block sums up to the first level without voids
+    pyramid = [(sums, weights)]
+    while np.any(weights == 0) and min(weights.shape) > 1:
+        sums = _block_sum(sums)
+        weights = _block_sum(weights)
+        pyramid.append((sums, weights))
+
+    # pull: fill each level's voids from the level above
+    sums, weights = pyramid.pop()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        coarse = sums / weights
+    if np.any(weights == 0):
+        coarse[weights == 0] = np.mean(coarse[weights > 0])
+    while pyramid:
+        sums, weights = pyramid.pop()
+        upsampled = cv2.resize(
+            coarse,
+            (sums.shape[1], sums.shape[0]),
+            interpolation=cv2.INTER_LINEAR,
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            coarse = np.where(weights > 0, sums / weights, upsampled)
+
+    infilled = np.array(array, copy=True)
+    infilled[~valid] = coarse[~valid]
+    return infilled
+
+
+def nearest_fill(array: np.ndarray, mask: np.ndarray, sigma: float = 2.0) -> np.ndarray:
+    """
+    Infills voids with the value of the nearest valid pixel, found with a
+    single Euclidean distance transform, and then smooths the infilled pixels
+    with a Gaussian filter to soften the Voronoi cell edges.
+
+    Parameters
+    ----------
+    array: np.array
+        DSM array
+    mask: np.array
+        Valid pixel mask, 1 for valid and 0 for void pixels
+    sigma: float
+        Standard deviation of the smoothing filter in pixels
+
+    Returns
+    -------
+    infilled: np.array
+        The infilled DSM array
+    """
+    void = mask == 0
+    indices = ndimage.distance_transform_edt(
+        void, return_distances=False, return_indices=True
+    )
+    infilled: np.ndarray = array[tuple(indices)]
+    del indices
+    smoothed = cv2.GaussianBlur(infilled, (0, 0), sigma)
+    infilled[void] = smoothed[void]
+    return infilled
+
+
+def infill(
+    array: np.ndarray, mask: np.ndarray, nodata: Optional[float], method: str
+) -> np.ndarray:
+    """
+    Infills voids in a DSM array with the requested method.
+
+    Parameters
+    ----------
+    array: np.array
+        DSM array
+    mask: np.array
+        Valid pixel mask, 1 for valid and 0 for void pixels
+    nodata: float or None
+        Nodata value of the DSM array
+    method: str
+        One of "idw", "pushpull", or "nearest"
+
+    Returns
+    -------
+    infilled: np.array
+        The infilled DSM array
+    """
+    if method == "idw":
+        return idw_fill(array, mask, nodata)
+    if method == "pushpull":
+        return pushpull_fill(array, mask)
+    if method == "nearest":
+        return nearest_fill(array, mask)
+    raise ValueError(
+        f"Unknown infill method {method}, expected one of {INFILL_METHODS}"
+    )
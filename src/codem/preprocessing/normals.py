@@ -0,0 +1,97 @@
+"""
+normals.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains methods for estimating surface normal vectors directly
+from a gridded DSM. The points generated from a DSM lie on a regular grid, so
+the local surface slope is available from finite differences between adjacent
+pixels, without the nearest neighbor search and per-point principal component
+analysis of a k-nearest neighbor normal estimator.
+
+This module contains the following methods:
+
+* grid_normals - normal vectors of the valid pixels of a DSM
+"""
+import numpy as np
+import rasterio
+
+NORMAL_METHODS = ("pdal", "grid")
+
+
+def _axis_difference(z: np.ndarray, valid: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Differentiates z along an array axis, using central differences where both
+    neighbors are valid, one-sided differences where only one neighbor is
+    valid, and zero where neither neighbor is valid.
+    """
+    z = np.moveaxis(z, axis, 1)
+    valid = np.moveaxis(valid, axis, 1)
+
+    following = np.zeros_like(z)
+    following[:, :-1] = z[:, 1:]
+    following_valid = np.zeros_like(valid)
+    following_valid[:, :-1] = valid[:, 1:]
+    preceding = np.zeros_like(z)
+    preceding[:, 1:] = z[:, :-1]
+    preceding_valid = np.zeros_like(valid)
+    preceding_valid[:, 1:] = valid[:, :-1]
+
+    difference = np.where(
+        following_valid & preceding_valid,
+        (following - preceding) / 2,
+        np.where(
+            following_valid,
+            following - z,
+            np.where(preceding_valid, z - preceding, 0),
+        ),
+    )
+    return np.moveaxis(difference, 1, axis)
+
+
+def grid_normals(
+    dsm: np.ndarray, mask: np.ndarray, transform: rasterio.Affine
+) -> np.ndarray:
+    """
+    Estimates upward facing unit normal vectors for the valid pixels of a DSM.
+    Elevation derivatives with respect to the pixel column and row are computed
+    with void-aware finite differences, so no void or nodata value enters the
+    estimate, and are converted to derivatives with respect to x and y through
+    the inverse of the affine transform's linear part. Pixels without any valid
+    neighbor are given a vertical normal.
+
+    Parameters
+    ----------
+    dsm: np.array
+        DSM array
+    mask: np.array
+        Valid pixel mask, 1 for valid and 0 for void pixels
+    transform: rasterio.Affine
+        Affine transform of the DSM
+
+    Returns
+    -------
+    normals: np.array
+        N x 3 array of normal vectors for the valid pixels, in the row-major
+        order of np.nonzero(mask)
+    """
+    valid = mask.astype(bool)
+    z = np.where(valid, dsm, 0).astype(np.float64)
+    dz_du = _axis_difference(z, valid, axis=1)[valid]
+    dz_dv = _axis_difference(z, valid, axis=0)[valid]
+    del z
+
+    # [dz/du, dz/dv] = J^T [dz/dx, dz/dy], with J the Jacobian of (x, y)
+    # with respect to (u, v)
+    jacobian = np.array([[transform.a, transform.b], [transform.d, transform.e]])
+    inverse = np.linalg.inv(jacobian.T)
+    dz_dx = inverse[0, 0] * dz_du + inverse[0, 1] * dz_dv
+    dz_dy = inverse[1, 0] * dz_du + inverse[1, 1] * dz_dv
+    del dz_du, dz_dv
+
+    normals = np.empty((dz_dx.size, 3), dtype=np.float64)
+    normals[:, 0] = -dz_dx
+    normals[:, 1] = -dz_dy
+    normals[:, 2] = 1.0
+    normals /= np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    return normals
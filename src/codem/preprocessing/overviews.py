@@ -0,0 +1,138 @@
+"""
+overviews.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains methods for building and selecting GeoTIFF overviews. A
+DSM is usually resampled to a pipeline resolution much coarser than its native
+resolution, and reading from an overview close to the pipeline resolution
+decodes far fewer pixels than resampling from the full resolution raster.
+
+This module contains the following methods:
+
+* overview_factors - power of two decimation factors down to a minimum size
+* select_overview - selects the overview level to resample from
+* build_overviews - builds overviews for a DSM file
+* main - console entry point for build_overviews
+"""
+import argparse
+import logging
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import rasterio
+from rasterio.enums import Resampling
+
+logger = logging.getLogger(__name__)
+
+
+def overview_factors(width: int, height: int, min_size: int = 256) -> List[int]:
+    """
+    Generates power of two decimation factors until the decimated raster is
+    smaller than min_size pixels along its longest side.
+
+    Parameters
+    ----------
+    width: int
+        Raster width in pixels
+    height: int
+        Raster height in pixels
+    min_size: int
+        Minimum size of the coarsest overview in pixels
+
+    Returns
+    -------
+    factors: list
+        Decimation factors
+    """
+    factors = []
+    factor = 2
+    while max(width, height) / factor >= min_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+def select_overview(factors: Sequence[int], downscale: float) -> Optional[int]:
+    """
+    Selects the coarsest overview that is still at least as fine as the
+    target resolution.
+
+    Parameters
+    ----------
+    factors: sequence
+        Decimation factors of the available overviews, as returned by
+        rasterio's DatasetReader.overviews
+    downscale: float
+        Ratio of the target pixel size to the native pixel size
+
+    Returns
+    -------
+    level: int or None
+        Index of the overview level, None if the full resolution raster should
+        be read
+    """
+    level = None
+    for i, factor in enumerate(factors):
+        if factor <= downscale * (1 + 1e-6):
+            level = i
+    return level
+
+
+def build_overviews(
+    file_path: str,
+    resampling: str = "average",
+    external: bool = True,
+    min_size: int = 256,
+) -> List[int]:
+    """
+    Builds overviews for a DSM file so later runs can resample from them.
+
+    Parameters
+    ----------
+    file_path: str
+        Path to the DSM file
+    resampling: str
+        Name of the rasterio resampling method used to build the overviews
+    external: bool
+        Whether to write the overviews to an external .ovr file instead of
+        modifying the DSM file
+    min_size: int
+        Minimum size of the coarsest overview in pixels
+
+    Returns
+    -------
+    factors: list
+        Decimation factors of the built overviews
+    """
+    with rasterio.Env(TIFF_USE_OVR=external):
+        with rasterio.open(file_path, "r+") as data:
+            factors = overview_factors(data.width, data.height, min_size)
+            if factors:
+                data.build_overviews(factors, Resampling[resampling])
+    logger.info(f"Built overviews {factors} for {file_path}")
+    return factors
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Build overviews for a DSM so CODEM can resample it faster."
+    )
+    ap.add_argument("dsm_file", type=str, help="path to the DSM file")
+    ap.add_argument(
+        "--resampling",
+        "-r",
+        type=str,
+        choices=("average", "cubic", "bilinear", "nearest"),
+        default="average",
+        help="resampling method used to build the overviews",
+    )
+    ap.add_argument(
+        "--internal",
+        action="store_true",
+        help="store the overviews inside the DSM file instead of a .ovr file",
+    )
+    args = ap.parse_args()
+    factors = build_overviews(args.dsm_file, args.resampling, not args.internal)
+    print(f"Built overviews with decimation factors {factors}")
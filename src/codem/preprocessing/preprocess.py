@@ -22,13 +22,25 @@ This module contains the following classes and methods:
 * DSM - class for Digital Surface Model data
 * PointCloud - class for Point Cloud data
 * Mesh - class for Mesh data
+* ArrayDSM - class for DSM data held as .npy or Zarr arrays
+* DSMCatalog - class for a Foundation of DSM tiles
+* PointCloudCatalog - class for a Foundation of Point Cloud tiles
 * instantiate - method for auto-instantiating the appropriate class
 """
 import json
 import logging
 import os
 import tempfile
+from contextlib import contextmanager
+from contextlib import ExitStack
+from typing import Any
+from typing import ContextManager
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Tuple
 
 import codem.lib.resources as r
 import cv2
@@ -36,8 +48,26 @@ import numpy as np
 import pdal
 import rasterio.fill
 import trimesh
+from codem.lib.shared import SharedGeoData
+from codem.preprocessing.arrays import ArrayDataset
+from codem.preprocessing.arrays import read_georeference
+from codem.preprocessing.cache import PrepCache
+from codem.preprocessing.cache import source_identity
+from codem.preprocessing.catalog import build_vrt
+from codem.preprocessing.catalog import TileCatalog
+from codem.preprocessing.columns import PointColumns
+from codem.preprocessing.filters import normalize
+from codem.preprocessing.filters import normalize_tiled
+from codem.preprocessing.gridding import GridAccumulator
+from codem.preprocessing.infill import infill
+from codem.preprocessing.normals import grid_normals
+from codem.preprocessing.overviews import select_overview
+from rasterio import Affine
 from rasterio.crs import CRS
 from rasterio.enums import Resampling
+from rasterio.errors import WindowError
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window
 from typing_extensions import TypedDict
 
 
@@ -74,34 +104,88 @@ class GeoData:
     Methods
     -------
     _read_dsm
+    _grid_points
+    _set_grid
     _get_nodata_mask
+    _scratch_array
+    release
+    offload
+    share
     _infill
     _normalize
     _dsm2pc
     _generate_vectors
+    set_window
+    _prep_signature
+    _prep_source
+    _load_cached
+    _store_cached
     prep
+    prep_vectors
     """
 
+    # whether the data is a catalog of tiles, which is always windowed
+    is_catalog = False
+
+    cached_arrays = (
+        "dsm",
+        "infilled",
+        "normed",
+        "nodata_mask",
+        "point_cloud",
+        "point_origin",
+        "normal_vectors",
+    )
+
+    # attributes tied to the process that prepared the data, see share
+    process_local = ("cache", "columns", "mesh", "_shared_segments")
+
     def __init__(self, config: dict, fnd: bool) -> None:
         self.logger = logging.getLogger(__name__)
         self.file = config["FND_FILE"] if fnd else config["AOI_FILE"]
         self.fnd = fnd
         self.type = "undefined"
-        self.nodata = None
+        self.nodata: Optional[float] = None
         self.dsm = np.empty((0, 0), dtype=np.double)
-        self.point_cloud = np.empty((0, 0), dtype=np.double)
+        self.point_cloud: np.ndarray = np.empty((0, 0), dtype=np.double)
+        self.point_origin = np.zeros(3, dtype=np.double)
+        self.point_dtype = np.float32 if config["ICP_FLOAT32"] else np.float64
+        self.normals_method = config["ICP_NORMALS"]
+        self.grid_engine = config["DSM_GRID_ENGINE"]
+        self.grid_reducer = config["DSM_GRID_REDUCER"]
+        self.grid_chunk_size = config["DSM_GRID_CHUNK_SIZE"]
+        self.streaming = config["PC_STREAMING"]
+        self.copc_resolution_factor = config["COPC_RESOLUTION_FACTOR"]
+        self.use_overviews = config["DSM_OVERVIEWS"]
+        self.resampling = config["DSM_RESAMPLING"]
+        self.mesh_faces = config["DSM_MESH_FACES"]
+        self.column_cache = config["PC_COLUMN_CACHE"]
+        self.resolution_estimate = config["RESOLUTION_ESTIMATE"]
+        self.resolution_sample_size = config["RESOLUTION_SAMPLE_SIZE"]
         self.crs = None
         self.transform: Optional[rasterio.Affine] = None
         self.area_or_point = "Undefined"
         self.normed = np.empty((0, 0), dtype=np.uint8)
         self.normal_vectors = np.empty((0, 0), dtype=np.double)
         self.processed = False
+        # cache key of a prep whose normal vectors have been deferred
+        self._pending_vectors: Optional[str] = None
         self._resolution = 0.0
         self.native_resolution = 0.0
         self.units_factor = 1.0
-        self.units = None
+        self.units: Optional[str] = None
+        self.bounds: Optional[Tuple[float, float, float, float]] = None
+        self.window_bounds: Optional[Tuple[float, float, float, float]] = None
         self.weak_size = config["DSM_WEAK_FILTER"]
         self.strong_size = config["DSM_STRONG_FILTER"]
+        self.infill_method = config["DSM_INFILL_METHOD"]
+        self.normalize_tile_size = config["DSM_NORMALIZE_TILE_SIZE"]
+        self.scratch_dir = config["SCRATCH_DIR"]
+        self.cache: Optional[PrepCache] = None
+        if fnd and config["FND_CACHE_DIR"] is not None:
+            self.cache = PrepCache(
+                config["FND_CACHE_DIR"], config["FND_CACHE_MAX_SIZE"]
+            )
 
     @property
     def resolution(self) -> float:
@@ -148,6 +232,45 @@ class GeoData:
         if self.transform == rasterio.Affine.identity():
             self.logger.warning(f"{tag}-{self.type.upper()} has an identity transform.")
 
+    def _grid_points(self, points: np.ndarray) -> None:
+        """
+        Grids points to a DSM in memory, in chunks of the configured size, and
+        sets the same DSM state as _read_dsm.
+
+        Parameters
+        ----------
+        points: np.array
+            Structured array with X, Y, and Z fields
+        """
+        if points.size == 0:
+            tag = ["AOI", "Foundation"][int(self.fnd)]
+            raise ValueError(f"{tag}-{self.type.upper()} has no points to grid.")
+        bounds = (
+            float(points["X"].min()),
+            float(points["Y"].min()),
+            float(points["X"].max()),
+            float(points["Y"].max()),
+        )
+        grid = GridAccumulator(bounds, self.resolution, self.grid_reducer)
+        for start in range(0, points.size, self.grid_chunk_size):
+            chunk = points[start : start + self.grid_chunk_size]
+            grid.add(chunk["X"], chunk["Y"], chunk["Z"])
+        self._set_grid(grid)
+
+    def _set_grid(self, grid: GridAccumulator) -> None:
+        """
+        Sets the DSM state from a gridding accumulator.
+
+        Parameters
+        ----------
+        grid: GridAccumulator
+            Accumulator holding all points of the data
+        """
+        self.dsm = grid.result()
+        self.transform = grid.transform
+        self.nodata = grid.nodata
+        self.area_or_point = grid.area_or_point
+
     def _get_nodata_mask(self, dsm: np.ndarray) -> np.ndarray:
         """
         Generates a binary array indicating invalid data locations in the
@@ -174,28 +297,113 @@ class GeoData:
 
         return mask.astype(np.uint8)
 
+    def _scratch_array(
+        self, shape: Tuple[int, ...], dtype: Any, memmap: bool = False
+    ) -> np.ndarray:
+        """
+        Allocates an array, memory-mapped to an anonymous temporary file in
+        the scratch directory when one is configured. The file is removed when
+        the array is released.
+
+        Parameters
+        ----------
+        shape: tuple
+            Shape of the array
+        dtype: np.dtype
+            Data type of the array
+        memmap: bool
+            Memory-map the array even when no scratch directory is configured,
+            using the system temporary directory
+
+        Returns
+        -------
+        array: np.array
+            The uninitialized array
+        """
+        if self.scratch_dir is None and not memmap:
+            return np.empty(shape, dtype=dtype)
+        backing = tempfile.TemporaryFile(dir=self.scratch_dir)
+        return np.memmap(backing, dtype=dtype, mode="w+", shape=shape)
+
+    def release(self, consumed: Iterable[str]) -> List[str]:
+        """
+        Releases the prepared products that are not consumed by any remaining
+        pipeline stage.
+
+        Parameters
+        ----------
+        consumed: iterable of str
+            Names of the products that are still needed
+
+        Returns
+        -------
+        released: list
+            Names of the released products
+        """
+        if self._pending_vectors is not None:
+            # the deferred normal vectors and the cache entry need every product
+            return []
+        consumed = set(consumed)
+        released = []
+        for name in self.cached_arrays:
+            array = getattr(self, name, None)
+            if name in consumed or not isinstance(array, np.ndarray):
+                continue
+            if array.size > 0:
+                setattr(self, name, np.empty((0,) * array.ndim, dtype=array.dtype))
+                released.append(name)
+        return released
+
+    def offload(self, name: str) -> None:
+        """
+        Moves a prepared product to a memory-mapped file in the scratch
+        directory, or in the system temporary directory when no scratch
+        directory is configured.
+
+        Parameters
+        ----------
+        name: str
+            Name of the product
+        """
+        array = getattr(self, name)
+        mapped = self._scratch_array(array.shape, array.dtype, memmap=True)
+        mapped[...] = array
+        setattr(self, name, mapped)
+
+    def share(self) -> SharedGeoData:
+        """
+        Publishes the arrays of the data to shared memory for worker
+        processes. The returned handle is pickled in place of the data, and
+        workers call its attach method to use the arrays without copying.
+        The arrays are removed when the handle is closed.
+
+        Returns
+        -------
+        handle: SharedGeoData
+            Picklable handle to the published data
+        """
+        return SharedGeoData(self, self.scratch_dir)
+
     def _infill(self) -> None:
         """
-        Infills pixels flagged as invalid (via the nodata value or NaN values)
-        via rasterio's inverse distance weighting interpolation. Necessary to
-        mitigate spurious feature detection.
+        Infills pixels flagged as invalid (via the nodata value or NaN values).
+        Necessary to mitigate spurious feature detection. The default method is
+        rasterio's inverse distance weighting interpolation, applied repeatedly
+        until all voids are filled. The push-pull and nearest methods fill any
+        void pattern in a bounded number of passes, see codem.preprocessing.infill.
         """
         dsm_array = np.array(self.dsm)
         if self.nodata is not None:
-            empty_array = np.full(dsm_array.shape, self.nodata)
+            empty = np.array_equal(dsm_array, np.full(dsm_array.shape, self.nodata))
         else:
-            empty_array = np.empty_like(dsm_array)
+            empty = bool(np.isnan(dsm_array).all())
 
-        assert not np.array_equal(dsm_array, empty_array), "DSM array is empty."
+        assert not empty, "DSM array is empty."
 
         infilled = np.copy(self.dsm)
         mask = self._get_nodata_mask(infilled)
-        infill_mask = np.copy(mask)
 
-        while np.sum(infill_mask) < infill_mask.size:
-            infilled = rasterio.fill.fillnodata(infilled, mask=infill_mask)
-            infill_mask = self._get_nodata_mask(infilled)
-        self.infilled = infilled
+        self.infilled = infill(infilled, mask, self.nodata, self.infill_method)
         self.nodata_mask = mask
 
     def _normalize(self) -> None:
@@ -203,24 +411,28 @@ class GeoData:
         Suppresses high frequency information and removes long wavelength
         topography with a bandpass filter. Normalizes the result to fit in an
         8-bit range. We scale the strong and weak filter sizes to convert them
-        from object space distance to pixels.
+        from object space distance to pixels. Large filters are computed at a
+        reduced scale, see codem.preprocessing.filters. When a normalization
+        tile size is configured, the DSM is filtered tile by tile into a
+        preallocated (optionally memory-mapped) array to bound memory use.
         """
         if self.transform is None:
             raise RuntimeError(
                 "self.transform is not initialized, you run the prep() method?"
             )
         scale = np.sqrt(self.transform[0] ** 2 + self.transform[1] ** 2)
-        weak_filtered = cv2.GaussianBlur(self.infilled, (0, 0), self.weak_size / scale)
-        strong_filtered = cv2.GaussianBlur(
-            self.infilled, (0, 0), self.strong_size / scale
-        )
-        bandpassed = weak_filtered - strong_filtered
-        low = np.percentile(bandpassed, 1)
-        high = np.percentile(bandpassed, 99)
-        clipped = np.clip(bandpassed, low, high)
-        normalized = (clipped - low) / (high - low)
-        quantized = (255 * normalized).astype(np.uint8)
-        self.normed = quantized
+        if self.normalize_tile_size > 0:
+            self.normed = normalize_tiled(
+                self.infilled,
+                self.weak_size / scale,
+                self.strong_size / scale,
+                self.normalize_tile_size,
+                out=self._scratch_array(self.infilled.shape, np.uint8),
+            )
+        else:
+            self.normed = normalize(
+                self.infilled, self.weak_size / scale, self.strong_size / scale
+            )
 
     def _dsm2pc(self) -> None:
         """
@@ -228,35 +440,52 @@ class GeoData:
         AREA_OR_POINT tag set to 'Area', then we adjust the pixel values by 0.5
         pixel. This is because we assume the DSM elevation value to represent
         the elevation at the center of the pixel, not the upper left corner.
+        Coordinates are only generated for valid pixels. In float32 mode the
+        points are stored relative to self.point_origin, a float64 origin near
+        the center of the data, so precision is kept for large map coordinates.
         """
         if self.transform is None:
             raise RuntimeError(
                 "self.transform needs to be set to a rasterio.Affine object"
             )
-        rows = np.arange(self.dsm.shape[0], dtype=np.float64)
-        cols = np.arange(self.dsm.shape[1], dtype=np.float64)
-        uu, vv = np.meshgrid(cols, rows)
-        u = np.reshape(uu, -1)
-        v = np.reshape(vv, -1)
-
-        if self.area_or_point == "Area":
-            u += 0.5
-            v += 0.5
-
-        xy = np.asarray(self.transform * (u, v))
-        z = np.reshape(self.dsm, -1)
-        xyz = np.vstack((xy, z)).T
-
-        mask = np.reshape(np.array(self.nodata_mask, dtype=bool), -1)
-        xyz = xyz[mask]
+        rows, cols = np.nonzero(self.nodata_mask)
+        z = self.dsm[rows, cols]
+        offset = 0.5 if self.area_or_point == "Area" else 0.0
+        u = cols + offset
+        v = rows + offset
+        del rows, cols
+
+        t = self.transform
+        origin = np.zeros(3, dtype=np.double)
+        if self.point_dtype == np.float32 and z.size:
+            center = t * (self.dsm.shape[1] / 2, self.dsm.shape[0] / 2)
+            origin = np.round([center[0], center[1], np.mean(z, dtype=np.double)])
+
+        xyz = np.empty((z.size, 3), dtype=self.point_dtype)
+        xyz[:, 0] = t.a * u + t.b * v + (t.c - origin[0])
+        xyz[:, 1] = t.d * u + t.e * v + (t.f - origin[1])
+        xyz[:, 2] = z - origin[2]
 
         self.point_cloud = xyz
+        self.point_origin = origin
 
     def _generate_vectors(self) -> None:
         """
         Generates normal vectors, required for the ICP registration module, from
-        the point cloud data. PDAL is used for speed.
+        the point cloud data. PDAL is used for speed. The grid method instead
+        computes the normals from finite differences of the DSM, see
+        codem.preprocessing.normals; the resulting vectors are in the same
+        order as the points generated by _dsm2pc.
         """
+        if self.normals_method == "grid":
+            if self.transform is None:
+                raise RuntimeError(
+                    "self.transform needs to be set to a rasterio.Affine object"
+                )
+            normals = grid_normals(self.dsm, self.nodata_mask, self.transform)
+            self.normal_vectors = normals.astype(self.point_dtype, copy=False)
+            return None
+
         k = 9
         n_points = self.point_cloud.shape[0]
 
@@ -285,7 +514,44 @@ class GeoData:
         filtered_normals = np.vstack(
             (array["NormalX"], array["NormalY"], array["NormalZ"])
         ).T
-        self.normal_vectors = filtered_normals
+        self.normal_vectors = filtered_normals.astype(self.point_dtype, copy=False)
+
+    def set_window(self, other: "GeoData", buffer: float) -> None:
+        """
+        Limits the data read by _create_dsm to the extent of another data
+        object, expanded by a buffer to accommodate misregistration between the
+        two. Both objects must have a coordinate reference system, otherwise the
+        full extent is kept.
+
+        Parameters
+        ----------
+        other: GeoData
+            Data object whose extent defines the window, typically the AOI
+        buffer: float
+            Distance to expand the window on each side, in meters
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        if self.crs is None or other.crs is None or other.bounds is None:
+            self.logger.warning(
+                f"Both data sources need a coordinate reference system to window "
+                f"the {tag}-{self.type.upper()}, the full extent will be used."
+            )
+            return None
+
+        left, bottom, right, top = transform_bounds(
+            other.crs, self.crs, *other.bounds, densify_pts=21
+        )
+        native_buffer = buffer / self.units_factor
+        self.window_bounds = (
+            left - native_buffer,
+            bottom - native_buffer,
+            right + native_buffer,
+            top + native_buffer,
+        )
+        self.logger.info(
+            f"Limiting {tag}-{self.type.upper()} to the window bounds: "
+            f"{self.window_bounds}"
+        )
 
     def _calculate_resolution(self) -> None:
         ...
@@ -293,21 +559,147 @@ class GeoData:
     def _create_dsm(self) -> None:
         ...
 
-    def prep(self) -> None:
+    def _prep_signature(self) -> Dict[str, Any]:
+        """
+        Collects the parameters that determine the prepared products. Used to
+        key the prepared data cache.
         """
-        Prepares data for registration.
+        return {
+            "type": self.type,
+            "fnd": self.fnd,
+            "resolution": self.resolution,
+            "weak_size": self.weak_size,
+            "strong_size": self.strong_size,
+            "infill_method": self.infill_method,
+            "normalize_tile_size": self.normalize_tile_size,
+            "point_dtype": np.dtype(self.point_dtype).name,
+            "normals_method": self.normals_method,
+            "window_bounds": self.window_bounds,
+            "grid_engine": self.grid_engine,
+            "grid_reducer": self.grid_reducer,
+            "streaming": self.streaming,
+            "copc_resolution_factor": self.copc_resolution_factor,
+            "use_overviews": self.use_overviews,
+            "resampling": self.resampling,
+            "mesh_faces": self.mesh_faces,
+            "column_cache": self.column_cache,
+        }
+
+    def _prep_source(self) -> Any:
+        """
+        Identifies the data read by prep, see source_identity. Used to key the
+        prepared data cache.
+        """
+        return source_identity(self.file)
+
+    def _load_cached(self, key: str) -> bool:
+        """
+        Restores prepared products from the cache.
+
+        Parameters
+        ----------
+        key: str
+            Cache key of the prepared products
+
+        Returns
+        -------
+        hit: bool
+            True if the products were found in the cache
+        """
+        if self.cache is None:
+            return False
+        entry = self.cache.load(key)
+        if entry is None:
+            return False
+
+        arrays, attributes = entry
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.transform = rasterio.Affine(*attributes["transform"])
+        self.area_or_point = attributes["area_or_point"]
+        self.units_factor = attributes["units_factor"]
+        self.nodata = attributes["nodata"]
+        if attributes["crs"] is not None:
+            self.crs = CRS.from_wkt(attributes["crs"])
+        return True
+
+    def _store_cached(self, key: str) -> None:
+        """
+        Stores prepared products in the cache.
+
+        Parameters
+        ----------
+        key: str
+            Cache key of the prepared products
+        """
+        if self.cache is None or self.transform is None:
+            return None
+        arrays = {name: getattr(self, name) for name in self.cached_arrays}
+        attributes = {
+            "transform": [
+                self.transform.a,
+                self.transform.b,
+                self.transform.c,
+                self.transform.d,
+                self.transform.e,
+                self.transform.f,
+            ],
+            "area_or_point": self.area_or_point,
+            "units_factor": self.units_factor,
+            "nodata": self.nodata,
+            "crs": None if self.crs is None else self.crs.to_wkt(),
+        }
+        self.cache.store(key, arrays, attributes)
+
+    def prep(self, vectors: bool = True) -> None:
+        """
+        Prepares data for registration. Foundation data is restored from the
+        prepared data cache when one is configured and holds a matching entry.
+
+        Parameters
+        ----------
+        vectors: bool
+            Whether to generate the Foundation normal vectors. When False, they
+            are deferred to prep_vectors, e.g., to run during the coarse
+            registration, which does not use them.
         """
         tag = ["AOI", "Foundation"][int(self.fnd)]
+        key = ""
+        if self.cache is not None:
+            key = self.cache.key(self.file, self._prep_signature(), self._prep_source())
+            if self._load_cached(key):
+                self.logger.info(
+                    f"Loaded prepared {tag}-{self.type.upper()} from cache entry {key}"
+                )
+                self.processed = True
+                return None
+
         self.logger.info(f"Preparing {tag}-{self.type.upper()} for registration.")
         self._create_dsm()
         self._infill()
         self._normalize()
         self._dsm2pc()
+        self.processed = True
 
         if self.fnd:
-            self._generate_vectors()
+            self._pending_vectors = key
+            if vectors:
+                self.prep_vectors()
+        elif self.cache is not None:
+            self._store_cached(key)
 
-        self.processed = True
+    def prep_vectors(self) -> None:
+        """
+        Generates the Foundation normal vectors deferred by prep, and stores
+        the prepared data in the cache. Does nothing if no vectors are pending.
+        """
+        key = self._pending_vectors
+        if key is None:
+            return None
+        self._generate_vectors()
+        if self.cache is not None:
+            self._store_cached(key)
+        self._pending_vectors = None
 
     def _debug_plot(self, keypoints: Optional[np.ndarray] = None) -> None:
         """Use this to show the raster"""
@@ -324,6 +716,14 @@ class GeoData:
 class DSM(GeoData):
     """
     A class for storing and preparing Digital Surface Model (DSM) data.
+
+    Methods
+    -------
+    _open
+    _create_dsm
+    _read_resampled
+    _read_window
+    _calculate_resolution
     """
 
     def __init__(self, config: dict, fnd: bool) -> None:
@@ -331,42 +731,36 @@ class DSM(GeoData):
         self.type = "dsm"
         self._calculate_resolution()
 
+    def _open(self) -> ContextManager[rasterio.io.DatasetReader]:
+        """
+        Opens the DSM file for reading.
+        """
+        dataset: ContextManager[rasterio.io.DatasetReader] = rasterio.open(self.file)
+        return dataset
+
     def _create_dsm(self) -> None:
         """
         Resamples the DSM to the registration pipeline resolution and applies
         a scale factor to convert to meters.
         """
-        with rasterio.open(self.file) as data:
+        with self._open() as data:
             resample_factor = self.native_resolution / self.resolution
             tag = ["AOI", "Foundation"][int(self.fnd)]
+            window = self._read_window(data)
             if resample_factor != 1:
                 self.logger.info(
                     f"Resampling {tag}-{self.type.upper()} to a pixel resolution of: {self.resolution} meters"
                 )
-                # data is read as float32 as int dtypes result in poor keypoint identification
-                self.dsm = data.read(
-                    1,
-                    out_shape=(
-                        data.count,
-                        int(data.height * resample_factor),
-                        int(data.width * resample_factor),
-                    ),
-                    resampling=Resampling.cubic,
-                    out_dtype=np.float32,
-                )
-                # We post-multiply the transform by the resampling scale. This does
-                # not change the origin coordinates, only the pixel scale.
-                self.transform = data.transform * data.transform.scale(
-                    (data.width / self.dsm.shape[-1]),
-                    (data.height / self.dsm.shape[-2]),
+                self.dsm, self.transform = self._read_resampled(
+                    data, window, resample_factor
                 )
             else:
                 self.logger.info(
                     f"No resampling required for {tag}-{self.type.upper()}"
                 )
                 # data is read as float32 as int dtypes result in poor keypoint identification
-                self.dsm = data.read(1, out_dtype=np.float32)
-                self.transform = data.transform
+                self.dsm = data.read(1, window=window, out_dtype=np.float32)
+                self.transform = data.window_transform(window)
 
             self.nodata = data.nodata
             self.crs = data.crs
@@ -415,11 +809,121 @@ class DSM(GeoData):
         if self.transform == rasterio.Affine.identity():
             self.logger.warning(f"{tag}-{self.type.upper()} has an identity transform.")
 
+    def _read_resampled(
+        self, data: rasterio.io.DatasetReader, window: Window, resample_factor: float
+    ) -> Tuple[np.ndarray, rasterio.Affine]:
+        """
+        Reads a window of the DSM resampled by a factor. When downsampling and
+        overviews are enabled, the window is read from the coarsest overview
+        that is still at least as fine as the target resolution.
+
+        Parameters
+        ----------
+        data: rasterio.io.DatasetReader
+            The open DSM file
+        window: rasterio.windows.Window
+            Full resolution pixel window to read
+        resample_factor: float
+            Ratio of the native to the target resolution
+
+        Returns
+        -------
+        dsm: np.array
+            The resampled DSM array
+        transform: rasterio.Affine
+            The transform of the resampled DSM array
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        out_shape = (
+            data.count,
+            int(window.height * resample_factor),
+            int(window.width * resample_factor),
+        )
+        level = None
+        if self.use_overviews and resample_factor < 1:
+            level = select_overview(data.overviews(1), 1 / resample_factor)
+
+        with ExitStack() as stack:
+            source = data
+            if level is not None:
+                source = stack.enter_context(
+                    rasterio.open(data.name, overview_level=level)
+                )
+                full = Window(0, 0, source.width, source.height)
+                window = (
+                    source.window(*data.window_bounds(window))
+                    .round_offsets()
+                    .round_lengths()
+                    .intersection(full)
+                )
+                self.logger.info(
+                    f"Resampling {tag}-{self.type.upper()} from overview level "
+                    f"{level} ({source.width} x {source.height} pixels)"
+                )
+            # data is read as float32 as int dtypes result in poor keypoint identification
+            dsm = source.read(
+                1,
+                window=window,
+                out_shape=out_shape,
+                resampling=Resampling[self.resampling],
+                out_dtype=np.float32,
+            )
+            # We post-multiply the transform by the resampling scale. This does
+            # not change the origin coordinates, only the pixel scale.
+            transform = source.window_transform(window) * Affine.scale(
+                (window.width / dsm.shape[-1]),
+                (window.height / dsm.shape[-2]),
+            )
+        return dsm, transform
+
+    def _read_window(self, data: rasterio.io.DatasetReader) -> Window:
+        """
+        Determines the pixel window of the DSM file to read. The full raster is
+        read unless window bounds have been set, in which case only the pixels
+        covering the window bounds are read.
+
+        Parameters
+        ----------
+        data: rasterio.io.DatasetReader
+            The open DSM file
+
+        Returns
+        -------
+        window: rasterio.windows.Window
+            Pixel window to read
+        """
+        full = Window(0, 0, data.width, data.height)
+        if self.window_bounds is None:
+            return full
+
+        bounds_window = data.window(*self.window_bounds)
+        col_off = np.floor(bounds_window.col_off)
+        row_off = np.floor(bounds_window.row_off)
+        window = Window(
+            col_off,
+            row_off,
+            np.ceil(bounds_window.col_off + bounds_window.width) - col_off,
+            np.ceil(bounds_window.row_off + bounds_window.height) - row_off,
+        )
+        try:
+            window = window.intersection(full)
+        except WindowError:
+            raise ValueError(
+                f"{os.path.basename(self.file)} does not overlap the window bounds "
+                f"{self.window_bounds}"
+            )
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        self.logger.info(
+            f"Reading a {int(window.width)} x {int(window.height)} pixel window of "
+            f"the {data.width} x {data.height} pixel {tag}-{self.type.upper()}"
+        )
+        return window
+
     def _calculate_resolution(self) -> None:
         """
         Calculates the pixel resolution of the DSM file.
         """
-        with rasterio.open(self.file) as data:
+        with self._open() as data:
             T = data.transform
             if T.is_identity:
                 raise ValueError(
@@ -438,6 +942,9 @@ class DSM(GeoData):
                     "they must be identical"
                 )
 
+            self.bounds = tuple(data.bounds)
+            self.crs = data.crs
+
             tag = ["AOI", "Foundation"][int(self.fnd)]
             if data.crs is None:
                 self.logger.warning(
@@ -461,40 +968,89 @@ class DSM(GeoData):
 
 class PointCloud(GeoData):
     """
-    A class for storing and preparing Point Cloud data.
+    A class for storing and preparing Point Cloud data. With the column cache
+    option, the points read by the first full pass over the file are kept in a
+    per-run PointColumns cache, which later stages read instead of the file.
+
+    Methods
+    -------
+    _create_dsm
+    _readers
+    _cropped
+    _grid_cached
+    _copc_reader
+    _stream_points
+    _calculate_resolution
+    _exact_spacing
+    _header
+    _estimate_spacing
     """
 
+    # Largest ratio between the header and sample point spacing estimates
+    # for which the sample estimate is accepted
+    spacing_tolerance = 1.5
+
     def __init__(self, config: dict, fnd: bool) -> None:
         super().__init__(config, fnd)
         self.type = "pcloud"
+        self.copc = self.file.lower().endswith(".copc.laz")
+        self.columns: Optional[PointColumns] = None
+        if self.column_cache:
+            parent_dir = self.scratch_dir or config["OUTPUT_DIR"]
+            prefix = ["aoi", "fnd"][int(fnd)] + "_points_"
+            self.columns = PointColumns(parent_dir, prefix)
         self._calculate_resolution()
 
     def _create_dsm(self) -> None:
         """
-        Converts the point cloud to meters and rasters it to a DSM.
+        Converts the point cloud to meters and rasters it to a DSM. The pdal
+        engine rasters with writers.gdal through a temporary GeoTIFF; the numpy
+        engine grids the points in memory, see codem.preprocessing.gridding.
         """
         tag = ["AOI", "Foundation"][int(self.fnd)]
         self.logger.info(
             f"Extracting DSM from {tag}-{self.type.upper()} with resolution of: {self.resolution} meters"
         )
 
+        if self.columns is not None and not self.streaming:
+            # a windowed or COPC level of detail read touches only part of
+            # the file, so only a complete read populates the cache
+            partial = self.copc or self.window_bounds is not None
+            if not self.columns.populated and not partial:
+                p = pdal.Pipeline(json.dumps(self._readers()))
+                p.execute()
+                self.columns.store(p.arrays[0])
+            if self.columns.populated:
+                self._grid_cached()
+                return None
+
         # Scale matrix formatted for PDAL consumption
         units_transform = "{} 0 0 0 0 {} 0 0 0 0 {} 0 0 0 0 1".format(
             self.units_factor, self.units_factor, self.units_factor
         )
-        file_handle, tmp_file = tempfile.mkstemp(suffix=".tif")
 
-        pipe = [
-            self.file,
-            {"type": "filters.transformation", "matrix": units_transform},
+        pipe = self._readers()
+        pipe.append({"type": "filters.transformation", "matrix": units_transform})
+
+        if self.streaming:
+            self._stream_points(pipe)
+            return None
+        if self.grid_engine == "numpy":
+            p = pdal.Pipeline(json.dumps(pipe))
+            p.execute()
+            self._grid_points(p.arrays[0])
+            return None
+
+        file_handle, tmp_file = tempfile.mkstemp(suffix=".tif")
+        pipe.append(
             {
                 "type": "writers.gdal",
                 "resolution": self.resolution,
-                "output_type": "max",
+                "output_type": self.grid_reducer,
                 "nodata": -9999.0,
                 "filename": tmp_file,
-            },
-        ]
+            }
+        )
 
         p = pdal.Pipeline(json.dumps(pipe))
         p.execute()
@@ -503,36 +1059,159 @@ class PointCloud(GeoData):
         os.close(file_handle)
         os.remove(tmp_file)
 
-    def _calculate_resolution(self) -> None:
+    def _readers(self) -> List[Any]:
         """
-        Calculates point cloud average point spacing.
+        Builds the PDAL stages that read the points, limited to the window if
+        one is set.
         """
-        pdal_pipeline = [
-            self.file,
-            {"type": "filters.hexbin", "edge_size": 25, "threshold": 1},
+        if self.copc:
+            return [self._copc_reader()]
+        return self._cropped([self.file])
+
+    def _cropped(self, pipe: List[Any]) -> List[Any]:
+        """
+        Appends a crop to the window bounds to PDAL reader stages, if a window
+        is set.
+        """
+        if self.window_bounds is not None:
+            minx, miny, maxx, maxy = self.window_bounds
+            pipe.append(
+                {
+                    "type": "filters.crop",
+                    "bounds": f"([{minx}, {maxx}], [{miny}, {maxy}])",
+                }
+            )
+        return pipe
+
+    def _grid_cached(self) -> None:
+        """
+        Rasters the points held in the column cache to a DSM, cropped to the
+        window if one is set, with the configured gridding engine.
+        """
+        assert self.columns is not None
+        points = self.columns.load(("X", "Y", "Z"))
+        if self.window_bounds is not None:
+            minx, miny, maxx, maxy = self.window_bounds
+            x, y = points["X"], points["Y"]
+            points = points[(x >= minx) & (x <= maxx) & (y >= miny) & (y <= maxy)]
+        for dim in ("X", "Y", "Z"):
+            points[dim] *= self.units_factor
+
+        if self.grid_engine == "numpy":
+            self._grid_points(points)
+            return None
+
+        file_handle, tmp_file = tempfile.mkstemp(suffix=".tif")
+        pipe = [
+            {
+                "type": "writers.gdal",
+                "resolution": self.resolution,
+                "output_type": self.grid_reducer,
+                "nodata": -9999.0,
+                "filename": tmp_file,
+            }
         ]
-        pipeline = pdal.Pipeline(json.dumps(pdal_pipeline))
-        pipeline.execute()
+        p = pdal.Pipeline(json.dumps(pipe), arrays=[points])
+        p.execute()
+
+        self._read_dsm(tmp_file)
+        os.close(file_handle)
+        os.remove(tmp_file)
 
+    def _copc_reader(self) -> Dict[str, Any]:
+        """
+        Builds a COPC reader stage that only reads the octree levels needed to
+        grid at the pipeline resolution, and only the nodes intersecting the
+        window if one is set.
+        """
         tag = ["AOI", "Foundation"][int(self.fnd)]
-        metadata = pipeline.metadata["metadata"]
-        reader_metadata = [val for key, val in metadata.items() if "readers" in key]
-        if reader_metadata[0]["srs"]["horizontal"] == "":
+        reader: Dict[str, Any] = {"type": "readers.copc", "filename": self.file}
+        if self.copc_resolution_factor > 0:
+            # readers.copc resolution is in the file's native units
+            resolution = (
+                self.copc_resolution_factor * self.resolution / self.units_factor
+            )
+            reader["resolution"] = resolution
+            self.logger.info(
+                f"Reading {tag}-{self.type.upper()} octree levels with a point spacing of {resolution:.2f} native units"
+            )
+        if self.window_bounds is not None:
+            minx, miny, maxx, maxy = self.window_bounds
+            reader["bounds"] = f"([{minx}, {maxx}], [{miny}, {maxy}])"
+        return reader
+
+    def _stream_points(self, pipe: List[Any]) -> None:
+        """
+        Grids the points produced by a PDAL pipeline chunk by chunk, so the
+        whole point cloud is never held in memory. The grid extent is taken
+        from the file header, limited to the window if one is set, and the
+        peak memory is bounded by the DSM plus one chunk of points.
+
+        Parameters
+        ----------
+        pipe: list
+            PDAL pipeline stages that read and transform the points to meters
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        header_bounds = self._header()["bounds"]
+        minx, miny, maxx, maxy = (
+            header_bounds["minx"],
+            header_bounds["miny"],
+            header_bounds["maxx"],
+            header_bounds["maxy"],
+        )
+        if self.window_bounds is not None:
+            minx = max(minx, self.window_bounds[0])
+            miny = max(miny, self.window_bounds[1])
+            maxx = min(maxx, self.window_bounds[2])
+            maxy = min(maxy, self.window_bounds[3])
+        bounds = (
+            minx * self.units_factor,
+            miny * self.units_factor,
+            maxx * self.units_factor,
+            maxy * self.units_factor,
+        )
+
+        grid = GridAccumulator(bounds, self.resolution, self.grid_reducer)
+        pipeline = pdal.Pipeline(json.dumps(pipe))
+        n_points = 0
+        for chunk in pipeline.iterator(chunk_size=self.grid_chunk_size):
+            grid.add(chunk["X"], chunk["Y"], chunk["Z"])
+            n_points += chunk.size
+        if n_points == 0:
+            raise ValueError(f"{tag}-{self.type.upper()} has no points to grid.")
+        self.logger.debug(f"Streamed {n_points} points from {tag}-{self.type.upper()}")
+        self._set_grid(grid)
+
+    def _calculate_resolution(self) -> None:
+        """
+        Calculates point cloud average point spacing. By default a hexbin
+        density is computed over every point. In fast mode the spacing is
+        estimated from the file header and a sample of points, see
+        _estimate_spacing, and the full pass is only run when the estimate is
+        not trustworthy.
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        estimate = None
+        if self.resolution_estimate == "fast":
+            estimate = self._estimate_spacing()
+        if estimate is None:
+            estimate = self._exact_spacing()
+        spacing, srs = estimate
+
+        if srs == "":
             self.logger.warning(
                 f"Linear unit for {tag}-{self.type.upper()} not detected --> meters assumed"
             )
-            spacing = metadata["filters.hexbin"]["avg_pt_spacing"]
         else:
-            crs = CRS.from_string(reader_metadata[0]["srs"]["horizontal"])
+            crs = CRS.from_string(srs)
             self.logger.info(
                 f"Linear unit for {tag}-{self.type.upper()} detected as {crs.linear_units}."
             )
-            spacing = (
-                crs.linear_units_factor[1]
-                * metadata["filters.hexbin"]["avg_pt_spacing"]
-            )
+            spacing *= crs.linear_units_factor[1]
             self.units_factor = crs.linear_units_factor[1]
             self.units = crs.linear_units
+            self.crs = crs
 
         self.logger.info(
             f"Calculated native resolution for {tag}-{self.type.upper()} as: {spacing:.1f} meters"
@@ -540,41 +1219,263 @@ class PointCloud(GeoData):
 
         self.native_resolution = spacing
 
+    def _exact_spacing(self) -> Tuple[float, str]:
+        """
+        Computes the average point spacing, in native units, with a hexbin
+        density over every point, and sets the point bounds.
+
+        Returns
+        -------
+        spacing: float
+            Average point spacing
+        srs: str
+            Horizontal spatial reference of the reader, empty if not defined
+        """
+        pdal_pipeline = [
+            self.file,
+            {"type": "filters.hexbin", "edge_size": 25, "threshold": 1},
+        ]
+        pipeline = pdal.Pipeline(json.dumps(pdal_pipeline))
+        pipeline.execute()
+
+        points = pipeline.arrays[0]
+        if self.columns is not None:
+            self.columns.store(points)
+        self.bounds = (
+            float(points["X"].min()),
+            float(points["Y"].min()),
+            float(points["X"].max()),
+            float(points["Y"].max()),
+        )
+
+        metadata = pipeline.metadata["metadata"]
+        reader_metadata = [val for key, val in metadata.items() if "readers" in key]
+        spacing = metadata["filters.hexbin"]["avg_pt_spacing"]
+        return spacing, reader_metadata[0]["srs"]["horizontal"]
+
+    def _header(self) -> Dict[str, Any]:
+        """
+        Reads the point count, bounds, and spatial reference from the file
+        header with PDAL's quickinfo, without reading any points.
+        """
+        quickinfo = pdal.Pipeline(json.dumps([self.file])).quickinfo
+        header: Dict[str, Any] = [
+            val for key, val in quickinfo.items() if "readers" in key
+        ][0]
+        return header
+
+    def _estimate_spacing(self) -> Optional[Tuple[float, str]]:
+        """
+        Estimates the average point spacing, in native units, without reading
+        every point. The header point count and bounds give an upper bound on
+        the spacing (points rarely fill their bounding box), and a hexbin
+        density over every n-th point of the file (over a central tile for
+        COPC files) gives the local spacing. Points are usually stored
+        flightline by flightline, so the sample is strided across the whole
+        file rather than taken from its first points, which would come from a
+        single strip and miss the density of overlapping strips.
+        The local spacing is accepted when the two agree within a factor of
+        spacing_tolerance, i.e., when the points cover their bounds fairly
+        uniformly; otherwise, or when the sample has too few points for a
+        density, e.g., a central tile over water, None is returned.
+
+        Returns
+        -------
+        estimate: tuple or None
+            Average point spacing and horizontal spatial reference
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        header = self._header()
+        n_points = header["num_points"]
+        bounds = header["bounds"]
+        self.bounds = (bounds["minx"], bounds["miny"], bounds["maxx"], bounds["maxy"])
+        srs = header.get("srs", {}).get("horizontal", "")
+
+        if n_points <= self.resolution_sample_size:
+            return None
+        area = (bounds["maxx"] - bounds["minx"]) * (bounds["maxy"] - bounds["miny"])
+        header_spacing = np.sqrt(area / n_points)
+
+        # every step-th point thins the density uniformly by the sampled fraction
+        step = n_points // self.resolution_sample_size
+        sample: List[Any] = [self.file, {"type": "filters.decimation", "step": step}]
+        if self.copc:
+            # the first points of a COPC file are the coarse octree levels, so
+            # sample a central tile at full depth instead
+            side = np.sqrt(self.resolution_sample_size * area / n_points) / 2
+            x = (bounds["minx"] + bounds["maxx"]) / 2
+            y = (bounds["miny"] + bounds["maxy"]) / 2
+            sample = [
+                {
+                    "type": "readers.copc",
+                    "filename": self.file,
+                    "bounds": f"([{x - side}, {x + side}], [{y - side}, {y + side}])",
+                }
+            ]
+        pdal_pipeline = sample + [
+            {"type": "filters.hexbin", "edge_size": 25, "threshold": 1},
+        ]
+        pipeline = pdal.Pipeline(json.dumps(pdal_pipeline))
+        try:
+            pipeline.execute()
+        except RuntimeError as e:
+            self.logger.info(
+                f"{tag}-{self.type.upper()} point spacing could not be sampled "
+                f"({e}), computing exact spacing"
+            )
+            return None
+        sample_spacing = (
+            pipeline.metadata["metadata"]
+            .get("filters.hexbin", {})
+            .get("avg_pt_spacing", 0.0)
+        )
+        if sample_spacing is None or not sample_spacing > 0:
+            self.logger.info(
+                f"{tag}-{self.type.upper()} point sample is too sparse for a "
+                "spacing, computing exact spacing"
+            )
+            return None
+        if not self.copc:
+            # spacing of all points from the spacing of the strided sample
+            sample_spacing *= np.sqrt(len(pipeline.arrays[0]) / n_points)
+
+        ratio = header_spacing / sample_spacing
+        if not 1 / self.spacing_tolerance <= ratio <= self.spacing_tolerance:
+            self.logger.info(
+                f"{tag}-{self.type.upper()} header ({header_spacing:.2f}) and sample "
+                f"({sample_spacing:.2f}) point spacings disagree, computing exact spacing"
+            )
+            return None
+        return sample_spacing, srs
+
 
 class Mesh(GeoData):
     """
-    A class for storing and preparing Mesh data.
+    A class for storing and preparing Mesh data. The mesh file is parsed once,
+    and its vertices, faces, and units are kept in memory for the resolution
+    estimate, DSM creation, and registration application. With the mesh
+    sidecar option, the vertices, faces, and units are also saved to a binary
+    sidecar file next to the mesh and read from there on later runs.
+
+    Methods
+    -------
+    _sidecar_path
+    _load_geometry
+    _create_dsm
+    _calculate_resolution
+    _vertex_spacing
+    load_mesh
     """
 
     def __init__(self, config: dict, fnd: bool) -> None:
         super().__init__(config, fnd)
         self.type = "mesh"
+        self.use_sidecar = config["MESH_SIDECAR"]
+        self.mesh: Optional[trimesh.Trimesh] = None
+        self.vertices = np.empty((0, 3), dtype=np.double)
+        self.faces = np.empty((0, 3), dtype=np.int64)
+        self._load_geometry()
         self._calculate_resolution()
 
+    def _sidecar_path(self) -> str:
+        return f"{self.file}.codem.npz"
+
+    def _load_geometry(self) -> None:
+        """
+        Loads the mesh vertices, faces, and units from the sidecar when it
+        matches the mesh file's size and modification time, otherwise parses
+        the mesh file (and writes the sidecar if enabled).
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        stat = os.stat(self.file)
+        source = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+        if self.use_sidecar and os.path.exists(self._sidecar_path()):
+            with np.load(self._sidecar_path()) as sidecar:
+                if np.array_equal(sidecar["source"], source):
+                    self.vertices = sidecar["vertices"]
+                    self.faces = sidecar["faces"]
+                    units = str(sidecar["units"])
+                    self.units = units if units else None
+                    self.logger.info(
+                        f"Loaded {tag}-{self.type.upper()} geometry from {self._sidecar_path()}"
+                    )
+                    return None
+
+        self.mesh = trimesh.load_mesh(self.file)
+        self.vertices = np.asarray(self.mesh.vertices)
+        self.faces = np.asarray(self.mesh.faces)
+        self.units = self.mesh.units
+
+        if self.use_sidecar:
+            try:
+                with open(self._sidecar_path(), "wb") as f:
+                    np.savez(
+                        f,
+                        source=source,
+                        vertices=self.vertices,
+                        faces=self.faces,
+                        units=np.array("" if self.units is None else self.units),
+                    )
+            except OSError as e:
+                self.logger.warning(f"Could not write mesh sidecar: {e}")
+
+    def load_mesh(self) -> trimesh.Trimesh:
+        """
+        Returns the parsed mesh, parsing the mesh file only if the geometry
+        was loaded from the sidecar.
+
+        Returns
+        -------
+        mesh: trimesh.Trimesh
+            The mesh, including its visual properties
+        """
+        if self.mesh is None:
+            self.mesh = trimesh.load_mesh(self.file)
+        return self.mesh
+
     def _create_dsm(self) -> None:
         """
-        Converts mesh vertices to meters and rasters them to a DSM.
+        Converts mesh vertices to meters and rasters them to a DSM. With the
+        mesh faces option, the triangles are rasterized instead, see
+        GridAccumulator.add_triangles.
         """
         tag = ["AOI", "Foundation"][int(self.fnd)]
         self.logger.info(
             f"Extracting DSM from {tag}-{self.type.upper()} with resolution of: {self.resolution} meters"
         )
 
-        mesh = trimesh.load_mesh(self.file)
-        vertices = mesh.vertices
+        if self.mesh_faces:
+            vertices = self.vertices * self.units_factor
+            bounds = (
+                float(vertices[:, 0].min()),
+                float(vertices[:, 1].min()),
+                float(vertices[:, 0].max()),
+                float(vertices[:, 1].max()),
+            )
+            grid = GridAccumulator(bounds, self.resolution, "max")
+            grid.add_triangles(vertices, self.faces, self.grid_chunk_size)
+            self._set_grid(grid)
+            return None
 
         xyz_dtype = np.dtype([("X", np.double), ("Y", np.double), ("Z", np.double)])
-        xyz = np.empty(vertices.shape[0], dtype=xyz_dtype)
-        xyz["X"] = vertices[:, 0]
-        xyz["Y"] = vertices[:, 1]
-        xyz["Z"] = vertices[:, 2]
+        xyz = np.empty(self.vertices.shape[0], dtype=xyz_dtype)
+        xyz["X"] = self.vertices[:, 0]
+        xyz["Y"] = self.vertices[:, 1]
+        xyz["Z"] = self.vertices[:, 2]
+
+        if self.grid_engine == "numpy":
+            for dim in ("X", "Y", "Z"):
+                xyz[dim] *= self.units_factor
+            self._grid_points(xyz)
+            return None
 
         # Scale matrix formatted for PDAL consumption
         units_transform = "{} 0 0 0 0 {} 0 0 0 0 {} 0 0 0 0 1".format(
             self.units_factor, self.units_factor, self.units_factor
         )
+        file_handle, tmp_file = tempfile.mkstemp(suffix=".tif")
         pipe = [
-            self.file,
             {
                 "type": "filters.transformation",
                 "matrix": units_transform,
@@ -582,9 +1483,9 @@ class Mesh(GeoData):
             {
                 "type": "writers.gdal",
                 "resolution": self.resolution,
-                "output_type": "max",
+                "output_type": self.grid_reducer,
                 "nodata": -9999.0,
-                "filename": "temp_dsm.tif",
+                "filename": tmp_file,
             },
         ]
         p = pdal.Pipeline(
@@ -595,35 +1496,39 @@ class Mesh(GeoData):
         )
         p.execute()
 
-        self._read_dsm("temp_dsm.tif")
-        os.remove("temp_dsm.tif")
+        self._read_dsm(tmp_file)
+        os.close(file_handle)
+        os.remove(tmp_file)
 
     def _calculate_resolution(self) -> None:
         """
-        Calculates mesh average vertex spacing.
+        Calculates mesh average vertex spacing from the in-memory vertices. In
+        fast mode the spacing is estimated from a random sample of the
+        vertices, see _vertex_spacing.
         """
-        pdal_pipeline = [
-            self.file,
-            {"type": "filters.hexbin", "edge_size": 25, "threshold": 1},
-        ]
-        pipeline = pdal.Pipeline(json.dumps(pdal_pipeline))
-        pipeline.execute()
-        # metadata = json.loads(pipeline.metadata)["metadata"]
-        metadata = pipeline.metadata["metadata"]
-        spacing = metadata["filters.hexbin"]["avg_pt_spacing"]
+        sample_size = (
+            self.resolution_sample_size
+            if self.resolution_estimate == "fast"
+            else self.vertices.shape[0]
+        )
+        spacing = self._vertex_spacing(self.vertices, sample_size)
 
-        mesh = trimesh.load_mesh(self.file)
+        self.bounds = (
+            float(self.vertices[:, 0].min()),
+            float(self.vertices[:, 1].min()),
+            float(self.vertices[:, 0].max()),
+            float(self.vertices[:, 1].max()),
+        )
         tag = ["AOI", "Foundation"][int(self.fnd)]
-        if mesh.units is None:
+        if self.units is None:
             self.logger.warning(
                 f"Linear unit for {tag}-{self.type.upper()} not detected --> meters assumed"
             )
         else:
             self.logger.info(
-                f"Linear unit for {tag}-{self.type.upper()} detected as {mesh.units}"
+                f"Linear unit for {tag}-{self.type.upper()} detected as {self.units}"
             )
-            self.units_factor = trimesh.units.unit_conversion(mesh.units, "meters")
-            self.units = mesh.units
+            self.units_factor = trimesh.units.unit_conversion(self.units, "meters")
             spacing *= self.units_factor
 
         self.logger.info(
@@ -632,6 +1537,234 @@ class Mesh(GeoData):
 
         self.native_resolution = spacing
 
+    def _vertex_spacing(self, vertices: np.ndarray, sample_size: int) -> float:
+        """
+        Computes the average vertex spacing, in native units, with a hexbin
+        density over the vertices, or over a random sample of them. Sampling
+        a fraction f of the vertices leaves the occupied hexagon area unchanged
+        while scaling the density by f, so the sample spacing is scaled by
+        sqrt(f).
+
+        Parameters
+        ----------
+        vertices: np.array
+            N x 3 array of mesh vertices
+        sample_size: int
+            Maximum number of vertices used
+
+        Returns
+        -------
+        spacing: float
+            Average vertex spacing
+        """
+        n_vertices = vertices.shape[0]
+        if n_vertices > sample_size:
+            rng = np.random.default_rng(0)
+            sample = rng.choice(n_vertices, sample_size, replace=False)
+            vertices = vertices[np.sort(sample)]
+
+        xyz_dtype = np.dtype([("X", np.double), ("Y", np.double), ("Z", np.double)])
+        xyz = np.empty(vertices.shape[0], dtype=xyz_dtype)
+        xyz["X"] = vertices[:, 0]
+        xyz["Y"] = vertices[:, 1]
+        xyz["Z"] = vertices[:, 2]
+        pipe = [{"type": "filters.hexbin", "edge_size": 25, "threshold": 1}]
+        pipeline = pdal.Pipeline(json.dumps(pipe), arrays=[xyz])
+        pipeline.execute()
+        metadata = pipeline.metadata["metadata"]
+        spacing: float = metadata["filters.hexbin"]["avg_pt_spacing"]
+        return float(spacing * np.sqrt(xyz.size / n_vertices))
+
+
+class ArrayDSM(DSM):
+    """
+    A class for storing and preparing a DSM held as a memory-mapped .npy
+    array or a chunked Zarr array, georeferenced by a JSON sidecar, see
+    codem.preprocessing.arrays. Only the window being prepared is read, so
+    large arrays need neither a conversion to GeoTIFF nor a full load.
+
+    Methods
+    -------
+    _open
+    _prep_signature
+    """
+
+    def _open(self) -> ArrayDataset:
+        """
+        Opens the array for reading like a single band raster.
+        """
+        return ArrayDataset(self.file)
+
+    def _prep_signature(self) -> Dict[str, Any]:
+        """
+        Adds the georeference sidecar to the prepared data cache key.
+        """
+        signature = super()._prep_signature()
+        signature["georeference"] = read_georeference(self.file)
+        return signature
+
+
+class DSMCatalog(DSM):
+    """
+    A class for storing and preparing a Foundation made of DSM tiles in a
+    directory. The tiles intersecting the window are mosaicked on the fly
+    through a temporary GDAL VRT, which is then read as a single DSM, so only
+    the pixels within the window are decoded.
+
+    Parameters
+    ----------
+    config: dict
+        Dictionary of configuration parameters
+    fnd: bool
+        Whether the data is the Foundation
+    catalog: TileCatalog
+        Footprint index of the tile directory
+
+    Methods
+    -------
+    _open
+    _prep_source
+    """
+
+    is_catalog = True
+
+    def __init__(self, config: dict, fnd: bool, catalog: TileCatalog) -> None:
+        self.catalog = catalog
+        super().__init__(config, fnd)
+
+    @contextmanager
+    def _open(self) -> Iterator[rasterio.io.DatasetReader]:
+        """
+        Opens a VRT mosaic of the tiles intersecting the window, or of every
+        tile if no window is set.
+        """
+        tag = ["AOI", "Foundation"][int(self.fnd)]
+        selected = self.catalog.select(self.window_bounds)
+        if not selected:
+            raise ValueError(
+                f"No tiles in {self.file} intersect the window bounds {self.window_bounds}"
+            )
+        self.logger.debug(
+            f"Mosaicking {len(selected)} of {len(self.catalog.tiles)} {tag}-{self.type.upper()} tiles"
+        )
+        file_handle, vrt_path = tempfile.mkstemp(suffix=".vrt", dir=self.scratch_dir)
+        os.close(file_handle)
+        try:
+            build_vrt(selected, self.catalog.crs, vrt_path)
+            with rasterio.open(vrt_path) as data:
+                yield data
+        finally:
+            os.remove(vrt_path)
+
+    def _prep_source(self) -> Any:
+        """
+        Identifies the tiles intersecting the window, rather than the
+        directory, whose modification time does not change with its tiles.
+        """
+        return self.catalog.fingerprint(self.window_bounds)
+
+
+class PointCloudCatalog(PointCloud):
+    """
+    A class for storing and preparing a Foundation made of point cloud tiles
+    in a directory. The tiles intersecting the window are read and merged on
+    the fly.
+
+    Parameters
+    ----------
+    config: dict
+        Dictionary of configuration parameters
+    fnd: bool
+        Whether the data is the Foundation
+    catalog: TileCatalog
+        Footprint index of the tile directory
+
+    Methods
+    -------
+    _readers
+    _exact_spacing
+    _estimate_spacing
+    _header
+    _prep_source
+    """
+
+    is_catalog = True
+
+    def __init__(self, config: dict, fnd: bool, catalog: TileCatalog) -> None:
+        self.catalog = catalog
+        super().__init__(config, fnd)
+
+    def _readers(self) -> List[Any]:
+        """
+        Builds the PDAL stages that read and merge the tiles intersecting the
+        window, or every tile if no window is set.
+        """
+        pipe: List[Any] = list(self.catalog.query(self.window_bounds))
+        if not pipe:
+            raise ValueError(
+                f"No tiles in {self.file} intersect the window bounds {self.window_bounds}"
+            )
+        if len(pipe) > 1:
+            pipe.append({"type": "filters.merge"})
+        return self._cropped(pipe)
+
+    def _exact_spacing(self) -> Tuple[float, str]:
+        """
+        Computes the average point spacing, in native units, as the median of
+        the tile point spacings implied by the tile headers, since a hexbin
+        density over every point would read the whole catalog. Sets the
+        bounds to the union of the tile footprints.
+
+        Returns
+        -------
+        spacing: float
+            Average point spacing
+        srs: str
+            Horizontal spatial reference of the tiles, empty if not defined
+        """
+        spacings = []
+        for tile in self.catalog.tiles.values():
+            minx, miny, maxx, maxy = tile["bounds"]
+            if tile["num_points"] > 0:
+                spacings.append(
+                    np.sqrt((maxx - minx) * (maxy - miny) / tile["num_points"])
+                )
+        if not spacings:
+            raise ValueError(f"No points found in the tiles of {self.file}")
+        self.bounds = self.catalog.bounds
+        crs = self.catalog.crs
+        return float(np.median(spacings)), "" if crs is None else crs.to_wkt()
+
+    def _estimate_spacing(self) -> Optional[Tuple[float, str]]:
+        """
+        The tile header estimate of _exact_spacing is already fast.
+        """
+        return None
+
+    def _header(self) -> Dict[str, Any]:
+        """
+        Combines the point count and bounds of the tiles intersecting the
+        window, in the form of PDAL's quickinfo.
+        """
+        tiles = [tile for _, tile in self.catalog.select(self.window_bounds)]
+        footprints = np.array([tile["bounds"] for tile in tiles])
+        return {
+            "num_points": sum(tile["num_points"] for tile in tiles),
+            "bounds": {
+                "minx": float(footprints[:, 0].min()),
+                "miny": float(footprints[:, 1].min()),
+                "maxx": float(footprints[:, 2].max()),
+                "maxy": float(footprints[:, 3].max()),
+            },
+        }
+
+    def _prep_source(self) -> Any:
+        """
+        Identifies the tiles intersecting the window, rather than the
+        directory, whose modification time does not change with its tiles.
+        """
+        return self.catalog.fingerprint(self.window_bounds)
+
 
 def instantiate(config: dict, fnd: bool) -> GeoData:
     """
@@ -650,6 +1783,17 @@ def instantiate(config: dict, fnd: bool) -> GeoData:
         An instance of the appropriate child class of GeoData
     """
     file_path = config["FND_FILE"] if fnd else config["AOI_FILE"]
+    if os.path.splitext(file_path.rstrip(os.sep))[-1].lower() in r.array_filetypes:
+        if not fnd:
+            raise NotImplementedError("An array DSM can only be a foundation.")
+        return ArrayDSM(config, fnd)
+    if os.path.isdir(file_path):
+        if not fnd:
+            raise NotImplementedError("A directory of tiles can only be a foundation.")
+        catalog = TileCatalog(file_path)
+        if catalog.type == "dsm":
+            return DSMCatalog(config, fnd, catalog)
+        return PointCloudCatalog(config, fnd, catalog)
     if os.path.splitext(file_path)[-1] in r.dsm_filetypes:
         return DSM(config, fnd)
     if os.path.splitext(file_path)[-1] in r.mesh_filetypes:
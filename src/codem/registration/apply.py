@@ -26,6 +26,8 @@ import pdal
 import rasterio
 import trimesh
 from codem.preprocessing.preprocess import GeoData
+from codem.preprocessing.preprocess import Mesh
+from codem.preprocessing.preprocess import PointCloud
 from codem.preprocessing.preprocess import RegistrationParameters
 from matplotlib.tri import LinearTriInterpolator
 from matplotlib.tri import Triangulation
@@ -63,6 +65,10 @@ class ApplyRegistration:
     _interpolate_residuals
     """
 
+    # prepared GeoData products read by this stage; the registration is
+    # applied to the original files
+    CONSUMES: Tuple[str, ...] = ()
+
     def __init__(
         self,
         fnd_obj: GeoData,
@@ -82,6 +88,9 @@ class ApplyRegistration:
         self.aoi_resolution = aoi_obj.native_resolution
         self.aoi_units_factor = aoi_obj.units_factor
         self.aoi_type = aoi_obj.type
+        self.aoi_mesh_obj = aoi_obj if isinstance(aoi_obj, Mesh) else None
+        self.aoi_crs = aoi_obj.crs
+        self.aoi_columns = aoi_obj.columns if isinstance(aoi_obj, PointCloud) else None
         self.registration_transform = registration_parameters["matrix"]
         self.residual_vectors = residual_vectors
         self.residual_origins = residual_origins
@@ -93,6 +102,9 @@ class ApplyRegistration:
             ext = (
                 output_format if output_format.startswith(".") else f".{output_format}"
             )
+        elif ext == ".vrt":
+            # PDAL writes registered DSMs as GeoTIFF
+            ext = ".tif"
         out_name = f"{root}_registered{ext}"
         self.out_name: str = os.path.join(self.config["OUTPUT_DIR"], out_name)
 
@@ -157,11 +169,6 @@ class ApplyRegistration:
         generally used to express 2D information. Instead, we apply the solved
         3D transformation to the 2.5D data and "re-raster" it.
         """
-        input_name = os.path.basename(self.aoi_file)
-        root, ext = os.path.splitext(input_name)
-        output_name = root + "_registered" + ext
-        output_path = os.path.join(self.config["OUTPUT_DIR"], output_name)
-
         # construct pdal pipeline
         pipe = [{"type": "readers.gdal", "filename": self.aoi_file, "header": "Z"}]
 
@@ -188,7 +195,7 @@ class ApplyRegistration:
             "type": "writers.gdal",
             "resolution": self.aoi_resolution,
             "output_type": "idw",
-            "filename": output_path,
+            "filename": self.out_name,
         }
         # Add nodata argument only if nodata is actually present
         if self.aoi_nodata is not None:
@@ -278,9 +285,14 @@ class ApplyRegistration:
         """
         Applies the registration transformation to a mesh file. No attempt is
         made to write the coordinate reference system since mesh files typically
-        do not store coordinate reference system information.
+        do not store coordinate reference system information. The mesh parsed
+        during preprocessing is reused; a copy of it is transformed, so the AOI
+        object keeps its original vertices.
         """
-        mesh = trimesh.load_mesh(self.aoi_file)
+        if self.aoi_mesh_obj is not None:
+            mesh = self.aoi_mesh_obj.load_mesh().copy()
+        else:
+            mesh = trimesh.load_mesh(self.aoi_file)
 
         mesh.apply_transform(self.get_registration_transformation())
         mesh.units = self.fnd_units
@@ -297,7 +309,7 @@ class ApplyRegistration:
         )
 
         if self.config["ICP_SAVE_RESIDUALS"]:
-            registered_mesh = trimesh.load_mesh(self.out_name)
+            registered_mesh = mesh
             vertices = registered_mesh.vertices
             x = vertices[:, 0]
             y = vertices[:, 1]
@@ -328,28 +340,34 @@ class ApplyRegistration:
 
     def _apply_pointcloud(self) -> None:
         """
-        Applies the registration transformation to a point cloud file.
+        Applies the registration transformation to a point cloud file. The
+        points are taken from the AOI column cache when it holds them, rather
+        than read from the file again.
         """
-        pipe = [
-            self.aoi_file,
-            self.get_registration_transformation(),
-            self.out_name,
-        ]
-        p = pdal.Pipeline(json.dumps(pipe))
+        if self.aoi_columns is not None and self.aoi_columns.populated:
+            writer: Dict[str, str] = {"filename": self.out_name}
+            if self.fnd_crs is None and self.aoi_crs is not None:
+                # the points no longer carry the spatial reference of the file
+                writer["a_srs"] = self.aoi_crs.to_wkt()
+            p = pdal.Pipeline(
+                json.dumps([self.get_registration_transformation(), writer]),
+                arrays=[self.aoi_columns.load()],
+            )
+        else:
+            pipe = [
+                self.aoi_file,
+                self.get_registration_transformation(),
+                self.out_name,
+            ]
+            p = pdal.Pipeline(json.dumps(pipe))
         p.execute()
         self.logger.info(
             f"Registration has been applied to AOI-PCLOUD and saved to: {self.out_name}"
         )
 
         if self.config["ICP_SAVE_RESIDUALS"]:
-            # open up the registered output file, read in xy's
-            pipe = [
-                self.out_name,
-            ]
-            p = pdal.Pipeline(json.dumps(pipe))
-            p.execute()
-            arrays = p.arrays
-            array = arrays[0]
+            # the registered points are still held by the pipeline, read in xy's
+            array = p.arrays[0]
             x = array["X"]
             y = array["Y"]
 
@@ -21,13 +21,25 @@ import os
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import cv2
 import numpy as np
 import numpy.typing as npt
+from codem.lib.scheduler import TaskGraph
 from codem.preprocessing.preprocess import GeoData
+from codem.registration.feature_index import FeatureIndex
+from codem.registration.feature_index import index_signature
+from codem.registration.features import akaze_features
+from codem.registration.matching import guided_matches
+from codem.registration.pyramid import MIN_LEVEL_SIZE
+from codem.registration.pyramid import pyramid_factors
+from codem.registration.pyramid import PyramidLevel
+from codem.registration.ransac import ransac_similarity
 from rasterio import Affine
+from rasterio.transform import array_bounds
+from rasterio.warp import transform_bounds
 from skimage.measure import ransac
 
 
@@ -44,12 +56,23 @@ class DsmRegistration:
         the area of interest DSM
     config: Dictionary
         dictionary of configuration parameters
+    feature_index: FeatureIndex, optional
+        index of the foundation features, opened from DSM_FEATURE_INDEX if
+        not given
 
     Methods
     --------
     register
+    _split_workers
+    _get_fnd_kp
+    _get_aoi_window
     _get_kp
     _get_putative
+    _match_descriptors
+    _get_guided_putative
+    _get_kp_xyz
+    _solve_pyramid
+    _solve_ransac
     _filter_putative
     _save_match_img
     _get_geo_coords
@@ -57,14 +80,30 @@ class DsmRegistration:
     _output
     """
 
+    # prepared GeoData products read by this stage
+    CONSUMES = ("normed", "nodata_mask", "infilled", "transform")
+    # guided matching falls back to global matching below this many matches
+    MIN_GUIDED_MATCHES = 20
+
     def __init__(
-        self, fnd_obj: GeoData, aoi_obj: GeoData, config: Dict[str, Any]
+        self,
+        fnd_obj: GeoData,
+        aoi_obj: GeoData,
+        config: Dict[str, Any],
+        feature_index: Optional[FeatureIndex] = None,
     ) -> None:
         self.logger = logging.getLogger(__name__)
         self.config = config
         self.fnd_obj = fnd_obj
         self.aoi_obj = aoi_obj
         self._putative_matches: List[cv2.DMatch] = []
+        if feature_index is None and config["DSM_FEATURE_INDEX"] is not None:
+            feature_index = FeatureIndex(config["DSM_FEATURE_INDEX"])
+        self.feature_index = feature_index
+        # transformation solved from the downsampled pyramid levels, and the
+        # search radius of the keypoint locations it predicts
+        self.prior: Optional[np.ndarray] = None
+        self.prior_radius = 0.0
 
         if not aoi_obj.processed:
             raise RuntimeError(
@@ -91,22 +130,46 @@ class DsmRegistration:
             )
         self._putative_matches = matches
 
-    def register(self) -> None:
+    def register(self, workers: Optional[int] = None) -> None:
         """
         Performs DSM co-registration via the following steps:
+        * Optionally, solve a prior transformation coarse-to-fine from
+        downsampled DSMs
         * Extract features from foundation and AOI DSMs
-        * Generate putative matches via nearest neighbor in descriptor space
+        * Generate putative matches via nearest neighbor in descriptor space,
+        among nearby keypoints when a prior transformation was solved
         * Filter putative matches for those that conform to a common
         transformation
 
         After registration, RMSEs of matched features are computed and
         transformation details added as a class attribute.
+
+        Parameters
+        ----------
+        workers: int, optional
+            Number of threads available to the registration, WORKERS if not
+            given
         """
         self.logger.info("Solving DSM feature registration.")
-
-        self.fnd_kp, self.fnd_desc = self._get_kp(
-            self.fnd_obj.normed, self.fnd_obj.nodata_mask
+        if workers is None:
+            workers = self.config["WORKERS"]
+        if self.config["DSM_PYRAMID_LEVELS"] > 1:
+            self.prior = self._solve_pyramid(workers)
+
+        # the foundation and AOI features are independent, extract them together
+        fnd_workers, aoi_workers = self._split_workers(workers)
+        graph = TaskGraph(workers)
+        graph.add("fnd", self._get_fnd_kp, fnd_workers)
+        graph.add(
+            "aoi",
+            self._get_kp,
+            self.aoi_obj.normed,
+            self.aoi_obj.nodata_mask,
+            aoi_workers,
         )
+        features = graph.run()
+
+        self.fnd_kp, self.fnd_desc = features["fnd"]
         self.logger.debug(f"{len(self.fnd_kp)} keypoints detected in foundation")
         if len(self.fnd_kp) < 4:
             raise RuntimeError(
@@ -117,9 +180,7 @@ class DsmRegistration:
                 )
             )
 
-        self.aoi_kp, self.aoi_desc = self._get_kp(
-            self.aoi_obj.normed, self.aoi_obj.nodata_mask
-        )
+        self.aoi_kp, self.aoi_desc = features["aoi"]
         self.logger.debug(f"{len(self.aoi_kp)} keypoints detected in area of interest")
         if len(self.aoi_kp) < 4:
             raise RuntimeError(
@@ -136,12 +197,114 @@ class DsmRegistration:
         self._get_rmse()
         self._output()
 
+    @staticmethod
+    def _split_workers(workers: int) -> Tuple[int, int]:
+        """
+        Splits the threads available to two concurrent feature extractions
+        between their tiles, so that together they use at most workers
+        threads, but each uses at least one.
+
+        Parameters
+        ----------
+        workers: int
+            Number of threads available
+
+        Returns
+        -------
+        fnd_workers: int
+            Threads of the foundation feature extraction
+        aoi_workers: int
+            Threads of the AOI feature extraction
+        """
+        return (workers + 1) // 2, max(workers // 2, 1)
+
+    def _get_fnd_kp(
+        self, workers: int = 1
+    ) -> Tuple[Tuple[cv2.KeyPoint, ...], np.ndarray]:
+        """
+        Loads the foundation features from the feature index, if one was
+        given and built from the same foundation and parameters. Otherwise,
+        extracts them from the foundation DSM. Only the index tiles within
+        FND_WINDOW_BUFFER of the AOI extent are read, see _get_aoi_window.
+
+        Parameters
+        ----------
+        workers: int
+            Number of threads extracting tiles of the foundation DSM
+
+        Returns
+        ----------
+        kp: tuple(cv2.KeyPoint,...)
+            OpenCV keypoints
+        desc: np.array
+            OpenCV AKAZE descriptors
+        """
+        index = self.feature_index
+        if index is not None:
+            if index.compatible(index_signature(self.fnd_obj, self.config)):
+                shape = (self.fnd_obj.normed.shape[0], self.fnd_obj.normed.shape[1])
+                transform = self.fnd_obj.transform
+                assert transform is not None, "Foundation data has not been prepared."
+                left, bottom, right, top = array_bounds(*shape, transform)
+                window = self._get_aoi_window()
+                if window is not None:
+                    left, bottom = max(left, window[0]), max(bottom, window[1])
+                    right, top = min(right, window[2]), min(top, window[3])
+                    if left >= right or bottom >= top:
+                        self.logger.warning(
+                            "The AOI does not overlap the foundation within "
+                            "FND_WINDOW_BUFFER, loading all foundation features."
+                        )
+                        left, bottom, right, top = array_bounds(*shape, transform)
+                # a pixel of margin for transforms referenced to pixel centers
+                pad = abs(transform.a)
+                bounds = (left - pad, bottom - pad, right + pad, top + pad)
+                self.logger.info(f"Loading foundation features from {index.index_dir}")
+                return index.keypoints(
+                    bounds, transform, self.fnd_obj.area_or_point, shape
+                )
+            self.logger.warning(
+                f"Feature index {index.index_dir} was built from other foundation "
+                "data or parameters, extracting the foundation features instead."
+            )
+        return self._get_kp(self.fnd_obj.normed, self.fnd_obj.nodata_mask, workers)
+
+    def _get_aoi_window(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Computes the extent of the prepared AOI DSM in the foundation
+        coordinate reference system, expanded by FND_WINDOW_BUFFER to
+        accommodate misregistration, as GeoData.set_window does.
+
+        Returns
+        -------
+        window: tuple or None
+            (left, bottom, right, top) window, None if either data set has no
+            coordinate reference system
+        """
+        if (
+            self.aoi_obj.transform is None
+            or self.aoi_obj.crs is None
+            or self.fnd_obj.crs is None
+        ):
+            return None
+        rows, cols = self.aoi_obj.normed.shape[:2]
+        left, bottom, right, top = transform_bounds(
+            self.aoi_obj.crs,
+            self.fnd_obj.crs,
+            *array_bounds(rows, cols, self.aoi_obj.transform),
+            densify_pts=21,
+        )
+        buffer = self.config["FND_WINDOW_BUFFER"] / self.fnd_obj.units_factor
+        return (left - buffer, bottom - buffer, right + buffer, top + buffer)
+
     def _get_kp(
-        self, img: np.ndarray, mask: np.ndarray
+        self, img: np.ndarray, mask: np.ndarray, workers: int = 1
     ) -> Tuple[Tuple[cv2.KeyPoint, ...], np.ndarray]:
         """
         Extracts AKAZE features, in the form of keypoints and descriptors,
-        from an 8-bit grayscale image.
+        from an 8-bit grayscale image. Infilled locations are excluded, and
+        large images are processed in tiles, see
+        codem.registration.features.
 
         Parameters
         ----------
@@ -149,6 +312,8 @@ class DsmRegistration:
             Normalized 8-bit grayscale image
         mask: np.array
             Mask of valid locations for img feature extraction
+        workers: int
+            Number of threads extracting tiles of img
 
         Returns
         ----------
@@ -157,9 +322,14 @@ class DsmRegistration:
         desc: np.array
             OpenCV AKAZE descriptors
         """
-        detector = cv2.AKAZE_create(threshold=self.config["DSM_AKAZE_THRESHOLD"])
-        kp, desc = detector.detectAndCompute(img, np.ones(mask.shape, dtype=np.uint8))
-        return kp, desc
+        return akaze_features(
+            img,
+            mask,
+            self.config["DSM_AKAZE_THRESHOLD"],
+            tile_size=self.config["DSM_AKAZE_TILE_SIZE"],
+            overlap=self.config["DSM_AKAZE_TILE_OVERLAP"],
+            workers=workers,
+        )
 
     def _get_putative(self) -> None:
         """
@@ -170,8 +340,52 @@ class DsmRegistration:
         * https://answers.opencv.org/question/85003/why-there-is-a-hardcoded-maximum-numbers-of-descriptors-that-can-be-matched-with-bfmatcher/
         * https://docs.opencv.org/master/dc/dc3/tutorial_py_matcher.html
         * https://luckytaylor.top/modules/flann/doc/flann_fast_approximate_nearest_neighbor_search.html
+
+        When a transformation was solved from a coarser pyramid level, or
+        DSM_MATCH_RADIUS is set, descriptors are only compared with those of
+        nearby keypoints, see _get_guided_putative, unless too few matches are
+        found that way.
+        """
+        if self.prior is not None:
+            radius, setting = self.prior_radius, "DSM_PYRAMID_LEVELS"
+        else:
+            radius, setting = self.config["DSM_MATCH_RADIUS"], "DSM_MATCH_RADIUS"
+        if radius > 0:
+            guided = self._get_guided_putative(radius, self.prior)
+            if len(guided) >= self.MIN_GUIDED_MATCHES:
+                self.logger.debug(f"{len(guided)} putative keypoint matches found.")
+                self.putative_matches = guided
+                return
+            self.logger.warning(
+                f"Only {len(guided)} keypoint matches found within {radius} m, "
+                f"matching all keypoints instead. Consider adjusting {setting}."
+            )
+
+        good_matches = self._match_descriptors(self.aoi_desc, self.fnd_desc)
+        self.logger.debug(f"{len(good_matches)} putative keypoint matches found.")
+        self.putative_matches = good_matches
+
+    def _match_descriptors(
+        self, aoi_desc: np.ndarray, fnd_desc: np.ndarray
+    ) -> List[cv2.DMatch]:
         """
-        if self.aoi_desc.shape[0] > 2**17 or self.fnd_desc.shape[0] > 2**17:
+        Matches every AOI descriptor against every foundation descriptor and
+        keeps the matches passing Lowe's ratio test.
+
+        Parameters
+        ----------
+        aoi_desc: np.array
+            AOI descriptors
+        fnd_desc: np.array
+            Foundation descriptors
+
+        Returns
+        -------
+        matches: list(cv2.DMatch)
+            Matches with the AOI keypoint as query and the foundation keypoint
+            as train index
+        """
+        if aoi_desc.shape[0] > 2**17 or fnd_desc.shape[0] > 2**17:
             FLANN_INDEX_LSH = 6
             index_params = dict(
                 algorithm=FLANN_INDEX_LSH,
@@ -186,16 +400,243 @@ class DsmRegistration:
             )
 
         # Fnd = train; AOI = query; knnMatch parameter order is query, train
-        knn_matches = desc_matcher.knnMatch(self.aoi_desc, self.fnd_desc, k=2)
+        knn_matches = desc_matcher.knnMatch(aoi_desc, fnd_desc, k=2)
 
         # Lowe's ratio test to filter weak matches
         good_matches = []
         for m, n in knn_matches:  # m is closest, n is second closest
             if m.distance < self.config["DSM_LOWES_RATIO"] * n.distance:
                 good_matches.append(m)
+        return good_matches
 
-        self.logger.debug(f"{len(good_matches)} putative keypoint matches found.")
-        self.putative_matches = good_matches
+    def _get_guided_putative(
+        self, radius: float, prior: Optional[np.ndarray] = None
+    ) -> List[cv2.DMatch]:
+        """
+        Identifies putative matches by comparing each AOI descriptor only with
+        the descriptors of the foundation keypoints within the search radius
+        of the AOI keypoint's geospatial location, or of its location
+        predicted by a prior transformation. Without a prior, assumes the AOI
+        is already georeferenced to within the search radius.
+
+        Parameters
+        ----------
+        radius: float
+            Search radius in meters
+        prior: np.array, optional
+            4x4 transformation from AOI to foundation coordinates
+
+        Returns
+        -------
+        matches: list(cv2.DMatch)
+            Putative matches passing Lowe's ratio test
+        """
+        fnd_xyz = self._get_kp_xyz(self.fnd_kp, self.fnd_obj)
+        aoi_xyz = self._get_kp_xyz(self.aoi_kp, self.aoi_obj)
+        if prior is not None:
+            aoi_xyz = aoi_xyz @ prior[:3, :3].T + prior[:3, 3]
+        return guided_matches(
+            aoi_xyz[:, :2],
+            self.aoi_desc,
+            fnd_xyz[:, :2],
+            self.fnd_desc,
+            radius,
+            self.config["DSM_LOWES_RATIO"],
+        )
+
+    def _get_kp_xyz(self, kp: Tuple[cv2.KeyPoint, ...], level: Any) -> np.ndarray:
+        """
+        Converts keypoint locations to object space coordinates.
+
+        Parameters
+        ----------
+        kp: tuple(cv2.KeyPoint,...)
+            OpenCV keypoints
+        level: GeoData or PyramidLevel
+            Data the keypoints were extracted from
+
+        Returns
+        -------
+        xyz: np.array
+            Geospatial coordinates
+        """
+        return self._get_geo_coords(
+            np.array([point.pt for point in kp], dtype=np.float64).reshape(-1, 2),
+            level.transform,
+            level.area_or_point,
+            level.infilled,
+        )
+
+    def _solve_pyramid(self, workers: int) -> Optional[np.ndarray]:
+        """
+        Solves the registration transformation coarse-to-fine over the
+        downsampled levels of the DSM pyramid, see codem.registration.pyramid.
+        The coarsest level matches all of its few keypoints; every finer level
+        only compares descriptors of keypoints within twice the previous
+        level's RANSAC threshold of the location predicted by the previous
+        level's transformation. Each level's RANSAC threshold is
+        DSM_RANSAC_THRESHOLD scaled by its downsampling factor. Sets the
+        prior_radius searched at the pipeline resolution.
+
+        Parameters
+        ----------
+        workers: int
+            Number of threads available to the registration
+
+        Returns
+        -------
+        T: np.array or None
+            4x4 transformation solved at the finest downsampled level, None if
+            a level could not be solved
+        """
+        factors = pyramid_factors(
+            self.config["DSM_PYRAMID_LEVELS"],
+            [self.fnd_obj.normed.shape, self.aoi_obj.normed.shape],
+        )
+        if len(factors) < self.config["DSM_PYRAMID_LEVELS"] - 1:
+            self.logger.warning(
+                f"Only {len(factors) + 1} of {self.config['DSM_PYRAMID_LEVELS']} "
+                "pyramid levels are used, coarser levels would be smaller than "
+                f"{MIN_LEVEL_SIZE} pixels."
+            )
+        T: Optional[np.ndarray] = None
+        previous = 1
+        fnd_workers, aoi_workers = self._split_workers(workers)
+        for factor in factors:
+            graph = TaskGraph(workers)
+            graph.add("fnd", PyramidLevel, self.fnd_obj, factor)
+            graph.add("aoi", PyramidLevel, self.aoi_obj, factor)
+            levels = graph.run()
+            fnd_level, aoi_level = levels["fnd"], levels["aoi"]
+            graph = TaskGraph(workers)
+            graph.add(
+                "fnd",
+                self._get_kp,
+                fnd_level.normed,
+                fnd_level.nodata_mask,
+                fnd_workers,
+            )
+            graph.add(
+                "aoi",
+                self._get_kp,
+                aoi_level.normed,
+                aoi_level.nodata_mask,
+                aoi_workers,
+            )
+            features = graph.run()
+            (fnd_kp, fnd_desc), (aoi_kp, aoi_desc) = features["fnd"], features["aoi"]
+            if len(fnd_kp) < 4 or len(aoi_kp) < 4:
+                self.logger.warning(
+                    f"Too few keypoints at 1/{factor} resolution, matching the "
+                    "full resolution keypoints without a prior transformation."
+                )
+                return None
+
+            fnd_xyz = self._get_kp_xyz(fnd_kp, fnd_level)
+            aoi_xyz = self._get_kp_xyz(aoi_kp, aoi_level)
+            if T is None:
+                matches = self._match_descriptors(aoi_desc, fnd_desc)
+            else:
+                predicted = aoi_xyz @ T[:3, :3].T + T[:3, 3]
+                matches = guided_matches(
+                    predicted[:, :2],
+                    aoi_desc,
+                    fnd_xyz[:, :2],
+                    fnd_desc,
+                    self.config["DSM_RANSAC_THRESHOLD"] * 2 * previous,
+                    self.config["DSM_LOWES_RATIO"],
+                )
+            solved = None
+            if len(matches) >= 4:
+                solved, inliers = self._solve_ransac(
+                    aoi_xyz[[m.queryIdx for m in matches]],
+                    fnd_xyz[[m.trainIdx for m in matches]],
+                    matches,
+                    self.config["DSM_RANSAC_THRESHOLD"] * factor,
+                )
+            if solved is None or np.sum(inliers) < 4:
+                self.logger.warning(
+                    f"Registration failed at 1/{factor} resolution, matching the "
+                    "full resolution keypoints without a prior transformation."
+                )
+                return None
+            T, previous = solved, factor
+            self.logger.debug(
+                f"{np.sum(inliers)} of {len(matches)} keypoint matches are inliers "
+                f"at 1/{factor} resolution."
+            )
+        self.prior_radius = self.config["DSM_RANSAC_THRESHOLD"] * 2 * previous
+        return T
+
+    def _solve_ransac(
+        self,
+        aoi_xyz: np.ndarray,
+        fnd_xyz: np.ndarray,
+        matches: List[cv2.DMatch],
+        threshold: float,
+    ) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Finds the 3D similarity transform conforming to the maximum number of
+        matches with the configured RANSAC engine.
+
+        Parameters
+        ----------
+        aoi_xyz: np.array
+            AOI coordinates of the matches
+        fnd_xyz: np.array
+            Foundation coordinates of the matches
+        matches: list(cv2.DMatch)
+            The matches, whose descriptor distances order PROSAC sampling
+        threshold: float
+            Maximum residual of an inlier, in meters
+
+        Returns
+        -------
+        T: np.array or None
+            4x4 transformation from AOI to foundation coordinates, None if
+            no model was fitted
+        inliers: np.array
+            Boolean inlier mask of the matches, all False if no model was
+            fitted
+        """
+        if self.config["DSM_RANSAC_ENGINE"] == "batched":
+            # PROSAC samples the matches with the smallest Hamming distance first
+            order = (
+                np.argsort([m.distance for m in matches], kind="stable")
+                if self.config["DSM_RANSAC_PROSAC"]
+                else None
+            )
+            T, inliers = ransac_similarity(
+                aoi_xyz,
+                fnd_xyz,
+                residual_threshold=threshold,
+                max_trials=self.config["DSM_RANSAC_MAX_ITER"],
+                solve_scale=self.config["DSM_SOLVE_SCALE"],
+                confidence=self.config["DSM_RANSAC_CONFIDENCE"],
+                order=order,
+                seed=self.config["DSM_RANSAC_SEED"],
+            )
+        elif self.config["DSM_SOLVE_SCALE"]:
+            model, inliers = ransac(
+                (aoi_xyz, fnd_xyz),
+                Scaled3dSimilarityTransform,
+                min_samples=3,
+                residual_threshold=threshold,
+                max_trials=self.config["DSM_RANSAC_MAX_ITER"],
+            )
+        else:
+            model, inliers = ransac(
+                (aoi_xyz, fnd_xyz),
+                Unscaled3dSimilarityTransform,
+                min_samples=3,
+                residual_threshold=threshold,
+                max_trials=self.config["DSM_RANSAC_MAX_ITER"],
+            )
+        if self.config["DSM_RANSAC_ENGINE"] == "skimage":
+            T = None if model is None else model.transform
+        if T is None or inliers is None:
+            return None, np.zeros(len(matches), dtype=bool)
+        return T, inliers
 
     def _filter_putative(self) -> None:
         """
@@ -228,23 +669,13 @@ class DsmRegistration:
             self.aoi_obj.infilled,
         )
         # Find 3D similarity transform conforming to max number of matches
-        if self.config["DSM_SOLVE_SCALE"]:
-            model, inliers = ransac(
-                (aoi_xyz, fnd_xyz),
-                Scaled3dSimilarityTransform,
-                min_samples=3,
-                residual_threshold=self.config["DSM_RANSAC_THRESHOLD"],
-                max_trials=self.config["DSM_RANSAC_MAX_ITER"],
-            )
-        else:
-            model, inliers = ransac(
-                (aoi_xyz, fnd_xyz),
-                Unscaled3dSimilarityTransform,
-                min_samples=3,
-                residual_threshold=self.config["DSM_RANSAC_THRESHOLD"],
-                max_trials=self.config["DSM_RANSAC_MAX_ITER"],
-            )
-        if model is None:
+        T, inliers = self._solve_ransac(
+            aoi_xyz,
+            fnd_xyz,
+            self.putative_matches,
+            self.config["DSM_RANSAC_THRESHOLD"],
+        )
+        if T is None:
             raise ValueError(
                 "ransac model not fitted, no inliers found. Consider tuning "
                 "DSM_RANSAC_THRESHOLD or DSM_RANSAC_MAX_ITER"
@@ -252,7 +683,6 @@ class DsmRegistration:
         self.logger.info(f"{np.sum(inliers)} keypoint matches found.")
         assert np.sum(inliers) >= 4, "Less than four keypoint matches found."
 
-        T: np.ndarray = model.transform
         c = np.linalg.norm(T[:, 0])
         assert (
             c > 0.67 and c < 1.5
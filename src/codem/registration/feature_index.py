@@ -0,0 +1,475 @@
+"""
+feature_index.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a persistent index of foundation features. When many AOIs
+are registered to the same foundation, the foundation AKAZE features only
+need to be extracted once. The index stores the pixel and geospatial
+coordinates, keypoint attributes, and descriptors of every foundation
+feature, partitioned into square spatial tiles, so that a registration only
+loads the tiles around its AOI. The index records the foundation file and the
+parameters that determine the features, and is ignored when they no longer
+match the registration run.
+
+An index is built with the codem-index command:
+
+    codem-index foundation_file index_dir --resolution 1.0
+
+This module contains the following methods/class:
+
+* index_signature - parameters that determine the features of a foundation
+* FeatureIndex - on-disk, spatially tiled index of foundation features
+* build_feature_index - extracts and indexes the features of a foundation
+* main - console entry point for build_feature_index
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import cv2
+import numpy as np
+from codem.preprocessing.cache import source_identity
+from codem.registration.features import akaze_features
+from rasterio import Affine
+
+INDEX_VERSION = 1
+META_FILE = "index.json"
+# keypoint attributes stored next to the coordinates and descriptors
+KEYPOINT_FIELDS = ("size", "angle", "response", "octave")
+
+logger = logging.getLogger(__name__)
+
+
+def index_signature(fnd_obj: Any, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Collects the foundation identity and the parameters that determine its
+    normalized DSM and AKAZE features. The extent of the prepared foundation
+    is not part of the signature, an index of the full foundation serves any
+    window of it.
+
+    Parameters
+    ----------
+    fnd_obj: GeoData
+        Foundation data, its resolution must be set
+    config: dict
+        Dictionary of configuration parameters
+
+    Returns
+    -------
+    signature: dict
+        JSON compatible signature
+    """
+    if fnd_obj.is_catalog:
+        source: Any = fnd_obj.catalog.fingerprint()
+    else:
+        source = [os.path.abspath(fnd_obj.file), *source_identity(fnd_obj.file)]
+    prepared = {
+        name: value
+        for name, value in fnd_obj._prep_signature().items()
+        if name not in ("window_bounds", "normals_method", "point_dtype")
+    }
+    signature = {
+        "version": INDEX_VERSION,
+        "source": source,
+        "prepared": prepared,
+        "akaze_threshold": config["DSM_AKAZE_THRESHOLD"],
+        "akaze_tile_size": config["DSM_AKAZE_TILE_SIZE"],
+        "akaze_tile_overlap": config["DSM_AKAZE_TILE_OVERLAP"],
+    }
+    # compare signatures as they are stored
+    loaded: Dict[str, Any] = json.loads(json.dumps(signature))
+    return loaded
+
+
+def _pixel_to_geo(
+    uv: np.ndarray, transform: Affine, area_or_point: str, dsm: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized DsmRegistration._get_geo_coords: converts pixel coordinates
+    relative to the center of the upper left pixel to geospatial coordinates,
+    with elevations from the nearest DSM pixel.
+    """
+    cols, rows = np.rint(uv).astype(np.int64).T
+    offset = 0.5 if area_or_point == "Area" else 0.0
+    x, y = transform * (uv[:, 0] + offset, uv[:, 1] + offset)
+    return np.column_stack((x, y, dsm[rows, cols])).astype(np.double)
+
+
+def _geo_to_pixel(xy: np.ndarray, transform: Affine, area_or_point: str) -> np.ndarray:
+    """
+    Converts geospatial coordinates to pixel coordinates relative to the
+    center of the upper left pixel.
+    """
+    offset = 0.5 if area_or_point == "Area" else 0.0
+    cols, rows = ~transform * (xy[:, 0], xy[:, 1])
+    return np.column_stack((cols - offset, rows - offset))
+
+
+class FeatureIndex:
+    """
+    A class for storing and querying the features of a foundation on disk
+
+    Features are partitioned into square tiles of tile_size meters. Each tile
+    is stored as a .npz file holding the pixel coordinates (uv), geospatial
+    coordinates (xyz), descriptors (desc), and keypoint attributes of its
+    features. index.json holds the signature, coordinate reference system,
+    and footprint of every tile.
+
+    Parameters
+    ----------
+    index_dir: str
+        Directory holding the index
+
+    Methods
+    -------
+    write
+    compatible
+    query
+    keypoints
+    _tile_range
+    """
+
+    def __init__(self, index_dir: str) -> None:
+        self.index_dir = os.path.abspath(index_dir)
+        meta_path = os.path.join(self.index_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Feature index {meta_path} not found.")
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        self.signature: Dict[str, Any] = meta["signature"]
+        self.crs: Optional[str] = meta["crs"]
+        self.tile_size: float = meta["tile_size"]
+        self.origin: Tuple[float, float] = tuple(meta["origin"])  # type: ignore
+        self.descriptor_size: int = meta["descriptor_size"]
+        self.tiles: Dict[str, Dict[str, Any]] = meta["tiles"]
+
+    @classmethod
+    def write(
+        cls,
+        index_dir: str,
+        uv: np.ndarray,
+        xyz: np.ndarray,
+        desc: np.ndarray,
+        keypoint_fields: Dict[str, np.ndarray],
+        signature: Dict[str, Any],
+        crs: Optional[str],
+        tile_size: float,
+    ) -> "FeatureIndex":
+        """
+        Writes features to a new index, replacing any index in index_dir.
+
+        Parameters
+        ----------
+        index_dir: str
+            Directory to write the index to
+        uv: np.array
+            (N, 2) pixel coordinates of the features
+        xyz: np.array
+            (N, 3) geospatial coordinates of the features
+        desc: np.array
+            (N, B) descriptors
+        keypoint_fields: dict
+            (N,) arrays of the KEYPOINT_FIELDS keypoint attributes
+        signature: dict
+            Signature of the foundation and parameters, see index_signature
+        crs: str, optional
+            WKT of the coordinate reference system of xyz
+        tile_size: float
+            Size of the square spatial tiles, in meters
+
+        Returns
+        -------
+        index: FeatureIndex
+            The written index
+        """
+        if tile_size <= 0:
+            raise ValueError("Feature index tile size must be greater than 0.")
+        parent = os.path.dirname(os.path.abspath(index_dir))
+        os.makedirs(parent, exist_ok=True)
+        # written next to the destination and renamed once complete
+        staging = tempfile.mkdtemp(prefix=".codem_index_", dir=parent)
+
+        origin = xyz[:, :2].min(axis=0) if xyz.shape[0] else np.zeros(2)
+        cells = np.floor((xyz[:, :2] - origin) / tile_size).astype(np.int64)
+        unique_cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        splits = np.cumsum(np.bincount(inverse.ravel(), minlength=len(unique_cells)))
+        tiles = {}
+        for cell, members in zip(unique_cells, np.split(order, splits[:-1])):
+            name = f"{cell[0]}_{cell[1]}"
+            np.savez(
+                os.path.join(staging, f"tile_{name}.npz"),
+                uv=uv[members],
+                xyz=xyz[members],
+                desc=desc[members],
+                **{field: keypoint_fields[field][members] for field in KEYPOINT_FIELDS},
+            )
+            tiles[name] = {
+                "bounds": list(xyz[members, :2].min(axis=0))
+                + list(xyz[members, :2].max(axis=0)),
+                "count": int(members.size),
+            }
+        meta = {
+            "signature": signature,
+            "crs": crs,
+            "tile_size": tile_size,
+            "origin": [float(value) for value in origin],
+            "descriptor_size": int(desc.shape[1]),
+            "tiles": tiles,
+        }
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        if os.path.exists(os.path.join(index_dir, META_FILE)):
+            shutil.rmtree(index_dir)
+        elif os.path.isdir(index_dir) and os.listdir(index_dir):
+            shutil.rmtree(staging)
+            raise FileExistsError(
+                f"{index_dir} is not empty and does not hold a feature index."
+            )
+        elif os.path.isdir(index_dir):
+            os.rmdir(index_dir)
+        os.replace(staging, index_dir)
+        return cls(index_dir)
+
+    def compatible(self, signature: Dict[str, Any]) -> bool:
+        """
+        Whether the index was built from the same foundation, with the same
+        parameters, as a registration run with the given signature.
+        """
+        return self.signature == signature
+
+    def _tile_range(self, bounds: Tuple[float, float, float, float]) -> List[str]:
+        """
+        Names of the stored tiles intersecting a bounding box.
+        """
+        left, bottom, right, top = bounds
+        low = np.floor((np.array([left, bottom]) - self.origin) / self.tile_size)
+        high = np.floor((np.array([right, top]) - self.origin) / self.tile_size)
+        names = []
+        for i in range(int(low[0]), int(high[0]) + 1):
+            for j in range(int(low[1]), int(high[1]) + 1):
+                if f"{i}_{j}" in self.tiles:
+                    names.append(f"{i}_{j}")
+        return names
+
+    def query(self, bounds: Tuple[float, float, float, float]) -> Dict[str, np.ndarray]:
+        """
+        Loads the features within a bounding box, reading only the tiles that
+        intersect it.
+
+        Parameters
+        ----------
+        bounds: tuple
+            (left, bottom, right, top) bounding box in the index coordinate
+            reference system
+
+        Returns
+        -------
+        features: dict
+            uv, xyz, desc, and keypoint attribute arrays of the features
+        """
+        left, bottom, right, top = bounds
+        names = ("uv", "xyz", "desc") + KEYPOINT_FIELDS
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+        for tile in self._tile_range(bounds):
+            with np.load(os.path.join(self.index_dir, f"tile_{tile}.npz")) as data:
+                x, y = data["xyz"][:, 0], data["xyz"][:, 1]
+                inside = (x >= left) & (x <= right) & (y >= bottom) & (y <= top)
+                for name in names:
+                    parts[name].append(data[name][inside])
+
+        if not parts["desc"]:
+            empty = {name: np.empty(0) for name in KEYPOINT_FIELDS}
+            return dict(
+                uv=np.empty((0, 2)),
+                xyz=np.empty((0, 3)),
+                desc=np.empty((0, self.descriptor_size), dtype=np.uint8),
+                **empty,
+            )
+        return {name: np.concatenate(parts[name]) for name in names}
+
+    def keypoints(
+        self,
+        bounds: Tuple[float, float, float, float],
+        transform: Affine,
+        area_or_point: str,
+        shape: Tuple[int, int],
+    ) -> Tuple[Tuple[cv2.KeyPoint, ...], np.ndarray]:
+        """
+        Loads the features within the extent of a prepared foundation DSM,
+        as keypoints in the pixel coordinates of that DSM.
+
+        Parameters
+        ----------
+        bounds: tuple
+            (left, bottom, right, top) extent of the DSM
+        transform: affine.Affine
+            Transform of the DSM
+        area_or_point: str
+            "Area" or "Point" pixel convention of the DSM transform
+        shape: tuple
+            (rows, columns) of the DSM
+
+        Returns
+        -------
+        kp: tuple(cv2.KeyPoint,...)
+            OpenCV keypoints
+        desc: np.array
+            AKAZE descriptors
+        """
+        features = self.query(bounds)
+        uv = _geo_to_pixel(features["xyz"][:, :2], transform, area_or_point)
+        # keypoint elevations are read from the nearest pixel
+        inside = np.all(
+            (uv >= -0.5) & (uv < np.array([shape[1], shape[0]]) - 0.5), axis=1
+        )
+        kp = tuple(
+            cv2.KeyPoint(
+                float(u),
+                float(v),
+                float(size),
+                float(angle),
+                float(response),
+                int(octave),
+            )
+            for (u, v), size, angle, response, octave in zip(
+                uv[inside], *(features[field][inside] for field in KEYPOINT_FIELDS)
+            )
+        )
+        return kp, np.ascontiguousarray(features["desc"][inside])
+
+
+def build_feature_index(
+    fnd_obj: Any, config: Dict[str, Any], index_dir: str, tile_size: float
+) -> FeatureIndex:
+    """
+    Extracts the AKAZE features of a prepared foundation and writes them to
+    a feature index.
+
+    Parameters
+    ----------
+    fnd_obj: GeoData
+        Prepared foundation data
+    config: dict
+        Dictionary of configuration parameters
+    index_dir: str
+        Directory to write the index to
+    tile_size: float
+        Size of the square spatial tiles of the index, in meters
+
+    Returns
+    -------
+    index: FeatureIndex
+        The written index
+    """
+    kp, desc = akaze_features(
+        fnd_obj.normed,
+        fnd_obj.nodata_mask,
+        config["DSM_AKAZE_THRESHOLD"],
+        tile_size=config["DSM_AKAZE_TILE_SIZE"],
+        overlap=config["DSM_AKAZE_TILE_OVERLAP"],
+        workers=config["WORKERS"],
+    )
+    uv = np.array([point.pt for point in kp], dtype=np.double).reshape(-1, 2)
+    xyz = _pixel_to_geo(uv, fnd_obj.transform, fnd_obj.area_or_point, fnd_obj.infilled)
+    keypoint_fields = {
+        field: np.array([getattr(point, field) for point in kp])
+        for field in KEYPOINT_FIELDS
+    }
+    index = FeatureIndex.write(
+        index_dir,
+        uv,
+        xyz,
+        desc,
+        keypoint_fields,
+        index_signature(fnd_obj, config),
+        None if fnd_obj.crs is None else fnd_obj.crs.to_wkt(),
+        tile_size,
+    )
+    logger.info(f"Indexed {len(kp)} foundation features in {len(index.tiles)} tiles.")
+    return index
+
+
+def main() -> None:
+    # imported here, codem.main imports the registration modules
+    from codem.main import CodemRunConfig
+    from codem.preprocessing.preprocess import instantiate
+
+    ap = argparse.ArgumentParser(
+        description=(
+            "Extract the features of a foundation once and save them to an index "
+            "used by repeated CODEM registrations (--dsm_feature_index)."
+        )
+    )
+    ap.add_argument("foundation_file", type=str, help="path to the foundation file")
+    ap.add_argument("index_dir", type=str, help="directory to write the index to")
+    ap.add_argument(
+        "--resolution",
+        "-r",
+        type=float,
+        default=None,
+        help=(
+            "pipeline resolution in meters of the registrations using the index, "
+            "the foundation resolution (at least 1 meter) if not given"
+        ),
+    )
+    ap.add_argument(
+        "--tile_size",
+        "-t",
+        type=float,
+        default=1000.0,
+        help="size in meters of the spatial tiles of the index",
+    )
+    fields = {
+        field.name: field for field in dataclasses.fields(CodemRunConfig) if field.init
+    }
+    # the options that determine the foundation features, as for codem
+    options = (
+        "DSM_STRONG_FILTER",
+        "DSM_WEAK_FILTER",
+        "DSM_INFILL_METHOD",
+        "DSM_GRID_ENGINE",
+        "DSM_GRID_REDUCER",
+        "DSM_AKAZE_THRESHOLD",
+        "DSM_AKAZE_TILE_SIZE",
+        "DSM_AKAZE_TILE_OVERLAP",
+        "WORKERS",
+    )
+    for name in options:
+        ap.add_argument(
+            f"--{name.lower()}",
+            type=type(fields[name].default),
+            default=fields[name].default,
+            help=f"as for codem, default {fields[name].default}",
+        )
+    args = ap.parse_args()
+
+    config = {
+        name: field.default
+        for name, field in fields.items()
+        if field.default is not dataclasses.MISSING
+    }
+    config.update({name: getattr(args, name.lower()) for name in options})
+    config["FND_FILE"] = os.fsdecode(os.path.abspath(args.foundation_file))
+    config["AOI_FILE"] = None
+    fnd_obj = instantiate(config, fnd=True)
+    fnd_obj.resolution = args.resolution or max(
+        fnd_obj.native_resolution, config["MIN_RESOLUTION"]
+    )
+    fnd_obj.prep(vectors=False)
+    index = build_feature_index(fnd_obj, config, args.index_dir, args.tile_size)
+    print(
+        f"Indexed {sum(tile['count'] for tile in index.tiles.values())} features "
+        f"at a resolution of {fnd_obj.resolution} meters in {index.index_dir}"
+    )
@@ -0,0 +1,145 @@
+"""
+features.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains tiled AKAZE feature extraction for large DSM images.
+AKAZE builds a nonlinear scale space of the whole image, so its memory grows
+with the image size and a single detectAndCompute call runs on one core.
+Large images are instead split into tiles that are extended by an overlap on
+every side and processed on a thread pool (OpenCV releases the GIL). Each
+tile keeps only the keypoints that fall within its own, non-overlapping core,
+so keypoints detected twice in the overlap zones are discarded and the
+overlap provides the context needed to detect and describe features near
+the core edges. Detection is restricted to valid (not infilled) pixels.
+
+This module contains the following methods:
+
+* akaze_features - extracts AKAZE keypoints and descriptors, tile by tile
+"""
+from typing import List
+from typing import Tuple
+
+import cv2
+import numpy as np
+from codem.lib.scheduler import TaskGraph
+
+
+def _detect(
+    img: np.ndarray, mask: np.ndarray, threshold: float
+) -> Tuple[Tuple[cv2.KeyPoint, ...], np.ndarray]:
+    """
+    Extracts AKAZE features from an image, restricted to the nonzero mask
+    locations.
+    """
+    detector = cv2.AKAZE_create(threshold=threshold)
+    kp, desc = detector.detectAndCompute(img, mask)
+    if desc is None:
+        desc = np.empty((0, detector.descriptorSize()), dtype=np.uint8)
+    return kp, desc
+
+
+def _detect_tile(
+    img: np.ndarray,
+    mask: np.ndarray,
+    threshold: float,
+    core: Tuple[int, int, int, int],
+    overlap: int,
+) -> Tuple[List[cv2.KeyPoint], np.ndarray]:
+    """
+    Extracts AKAZE features from a tile extended by the overlap, and keeps
+    those located in the tile core (row_start, row_stop, col_start,
+    col_stop). Keypoint locations are returned in full image coordinates.
+    """
+    row_start, row_stop, col_start, col_stop = core
+    row_offset = max(row_start - overlap, 0)
+    col_offset = max(col_start - overlap, 0)
+    window = (
+        slice(row_offset, min(row_stop + overlap, img.shape[0])),
+        slice(col_offset, min(col_stop + overlap, img.shape[1])),
+    )
+    # only keypoints in the core are kept, the overlap is context
+    tile_mask = np.zeros(mask[window].shape, dtype=np.uint8)
+    tile_mask[
+        row_start - row_offset : row_stop - row_offset,
+        col_start - col_offset : col_stop - col_offset,
+    ] = mask[row_start:row_stop, col_start:col_stop]
+    kp, desc = _detect(np.ascontiguousarray(img[window]), tile_mask, threshold)
+
+    keep = []
+    for i, point in enumerate(kp):
+        x, y = point.pt[0] + col_offset, point.pt[1] + row_offset
+        # the mask is tested at the rounded location, the core at the exact one
+        if row_start <= y < row_stop and col_start <= x < col_stop:
+            point.pt = (x, y)
+            keep.append(i)
+    return [kp[i] for i in keep], desc[keep]
+
+
+def akaze_features(
+    img: np.ndarray,
+    mask: np.ndarray,
+    threshold: float,
+    tile_size: int = 0,
+    overlap: int = 128,
+    workers: int = 1,
+) -> Tuple[Tuple[cv2.KeyPoint, ...], np.ndarray]:
+    """
+    Extracts AKAZE features, in the form of keypoints and descriptors, from
+    an 8-bit grayscale image, restricted to valid pixel locations.
+
+    Parameters
+    ----------
+    img: np.array
+        Normalized 8-bit grayscale image
+    mask: np.array
+        Mask of valid locations for feature extraction, nonzero where valid
+    threshold: float
+        AKAZE detector response threshold
+    tile_size: int
+        Size of the square tiles processed independently, in pixels; 0 or a
+        size covering the image processes the whole image at once
+    overlap: int
+        Context added to every side of a tile, in pixels
+    workers: int
+        Number of tiles processed at the same time
+
+    Returns
+    -------
+    kp: tuple(cv2.KeyPoint,...)
+        OpenCV keypoints, in row-major tile order
+    desc: np.array
+        OpenCV AKAZE descriptors
+    """
+    mask = (np.asarray(mask) != 0).astype(np.uint8)
+    height, width = img.shape
+    if tile_size <= 0 or (height <= tile_size and width <= tile_size):
+        return _detect(img, mask, threshold)
+
+    graph = TaskGraph(workers)
+    names = []
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            core = (row, min(row + tile_size, height), col, min(col + tile_size, width))
+            if not np.any(mask[core[0] : core[1], core[2] : core[3]]):
+                continue
+            names.append(
+                graph.add(
+                    f"tile_{row}_{col}",
+                    _detect_tile,
+                    img,
+                    mask,
+                    threshold,
+                    core,
+                    overlap,
+                )
+            )
+    # tiles finish in any order, the features are collected in tile order
+    results = graph.run()
+    tiles = [results[name] for name in names]
+
+    kp = tuple(point for tile_kp, _ in tiles for point in tile_kp)
+    descriptors = [tile_desc for _, tile_desc in tiles]
+    if not descriptors:
+        return (), np.empty((0, cv2.AKAZE_create().descriptorSize()), np.uint8)
+    return kp, np.concatenate(descriptors)
@@ -48,6 +48,7 @@ class IcpRegistration:
     Methods
     --------
     register
+    release
     _residuals
     _get_weights
     _apply_transform
@@ -56,6 +57,9 @@ class IcpRegistration:
     _output
     """
 
+    # prepared GeoData products read by this stage
+    CONSUMES = ("point_cloud", "point_origin", "normal_vectors")
+
     def __init__(
         self,
         fnd_obj: GeoData,
@@ -65,8 +69,10 @@ class IcpRegistration:
     ) -> None:
         self.logger = logging.getLogger(__name__)
         self.fixed = fnd_obj.point_cloud
+        self.fixed_origin = fnd_obj.point_origin
         self.normals = fnd_obj.normal_vectors
         self.moving = aoi_obj.point_cloud
+        self.moving_origin = aoi_obj.point_origin
         self.resolution = aoi_obj.resolution
         self.initial_transform = dsm_reg.registration_parameters["matrix"]
         self.outlier_thresh = dsm_reg.registration_parameters["rmse_3d"]
@@ -101,14 +107,22 @@ class IcpRegistration:
         self.logger.info("Solving ICP registration.")
 
         # Apply transform from previous feature-matching registration
-        moving = self._apply_transform(self.moving, self.initial_transform)
+        moving = self._apply_transform(
+            self.moving + self.moving_origin, self.initial_transform
+        )
 
-        # Remove fixed mean to decorrelate rotation and translation
-        fixed_mean = np.mean(self.fixed, axis=0)
-        fixed = self.fixed - fixed_mean
+        # Remove fixed mean to decorrelate rotation and translation. Fixed points
+        # may be float32 coordinates relative to a local origin; the removed mean
+        # is tracked in absolute float64 coordinates.
+        local_mean = np.mean(self.fixed, axis=0, dtype=np.double)
+        fixed_mean = self.fixed_origin + local_mean
         moving = moving - fixed_mean
 
-        fixed_tree = spatial.cKDTree(fixed)
+        # cKDTree holds its points in float64 whatever the input dtype, so the
+        # paired fixed points are gathered from the tree's copy rather than from
+        # a second, mean removed copy of the fixed points
+        fixed_tree = spatial.cKDTree(self.fixed - local_mean)
+        fixed = fixed_tree.data
 
         cumulative_transform = np.eye(4)
         moving_transformed = moving
@@ -194,7 +208,9 @@ class IcpRegistration:
             c > 0.67 and c < 1.5
         ), "Solved scale difference between foundation and AOI data exceeds 50%."
         if self.config["ICP_SAVE_RESIDUALS"]:
-            self.residual_origins = self._apply_transform(self.moving, T)
+            self.residual_origins = self._apply_transform(
+                self.moving + self.moving_origin, T
+            )
             self.residual_vectors = self._residuals(
                 fixed_tree, fixed, self.normals, moving_transformed
             )
@@ -202,6 +218,15 @@ class IcpRegistration:
         self.transformation = T
         self._output()
 
+    def release(self) -> None:
+        """
+        Drops the references to the foundation and AOI point and normal vector
+        arrays once registration is complete, so they can be freed.
+        """
+        self.fixed = np.empty((0, 3), dtype=self.fixed.dtype)
+        self.normals = np.empty((0, 3), dtype=self.normals.dtype)
+        self.moving = np.empty((0, 3), dtype=self.moving.dtype)
+
     def _residuals(
         self,
         fixed_tree: spatial.cKDTree,
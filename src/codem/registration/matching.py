@@ -0,0 +1,118 @@
+"""
+matching.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains georeference-guided descriptor matching. When the AOI is
+already roughly georeferenced, a feature can only match foundation features
+near its own geographic location. The foundation keypoints are indexed in a
+KD-tree and each AOI descriptor is compared only with the descriptors of the
+foundation keypoints within a search radius, rather than with every
+foundation descriptor. Matches are filtered with Lowe's ratio test among the
+same candidates.
+
+This module contains the following methods:
+
+* hamming_distance - bitwise Hamming distances between binary descriptors
+* guided_matches - matches binary descriptors within a search radius
+"""
+from typing import List
+
+import cv2
+import numpy as np
+from scipy.spatial import cKDTree
+
+# number of set bits of every byte value
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+# maximum number of candidate descriptor pairs compared at once
+MAX_PAIRS = 2**20
+
+
+def hamming_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Computes the Hamming distances between pairs of binary descriptors, as
+    cv2.NORM_HAMMING does.
+
+    Parameters
+    ----------
+    a: np.array
+        (N, B) uint8 descriptors
+    b: np.array
+        (N, B) uint8 descriptors
+
+    Returns
+    -------
+    distance: np.array
+        (N,) number of differing bits of each pair
+    """
+    distance: np.ndarray = POPCOUNT[np.bitwise_xor(a, b)].sum(axis=1)
+    return distance
+
+
+def guided_matches(
+    aoi_xy: np.ndarray,
+    aoi_desc: np.ndarray,
+    fnd_xy: np.ndarray,
+    fnd_desc: np.ndarray,
+    radius: float,
+    ratio: float,
+) -> List[cv2.DMatch]:
+    """
+    Matches each AOI descriptor to its nearest foundation descriptor among the
+    foundation keypoints within the search radius of the AOI keypoint. A
+    match is kept if its distance is smaller than ratio times the distance of
+    the second nearest candidate, so AOI keypoints with fewer than two
+    candidates are not matched.
+
+    Parameters
+    ----------
+    aoi_xy: np.array
+        (N, 2) horizontal coordinates of the AOI keypoints
+    aoi_desc: np.array
+        (N, B) AOI descriptors
+    fnd_xy: np.array
+        (M, 2) horizontal coordinates of the foundation keypoints
+    fnd_desc: np.array
+        (M, B) foundation descriptors
+    radius: float
+        Search radius, in the units of the coordinates
+    ratio: float
+        Lowe's ratio
+
+    Returns
+    -------
+    matches: list(cv2.DMatch)
+        Matches with the AOI keypoint as query and the foundation keypoint as
+        train index
+    """
+    if aoi_xy.shape[0] == 0 or fnd_xy.shape[0] < 2:
+        return []
+    candidates = cKDTree(fnd_xy).query_ball_point(aoi_xy, radius)
+    counts = np.fromiter((len(c) for c in candidates), dtype=np.int64)
+
+    matches: List[cv2.DMatch] = []
+    start = 0
+    while start < counts.size:
+        # a chunk of AOI keypoints whose candidate pairs fit in MAX_PAIRS
+        cumulative = np.cumsum(counts[start:])
+        stop = start + max(int(np.searchsorted(cumulative, MAX_PAIRS, "right")), 1)
+        chunk_counts = counts[start:stop]
+        if chunk_counts.sum() > 0:
+            query = np.repeat(np.arange(start, stop), chunk_counts)
+            train = np.concatenate(
+                [candidates[i] for i in range(start, stop) if counts[i]]
+            ).astype(np.int64)
+            distance = hamming_distance(aoi_desc[query], fnd_desc[train])
+
+            # nearest and second nearest candidate of each query
+            order = np.lexsort((distance, query))
+            query, train, distance = query[order], train[order], distance[order]
+            first = np.flatnonzero(np.r_[True, query[1:] != query[:-1]])
+            paired = first[counts[query[first]] >= 2]
+            keep = paired[distance[paired] < ratio * distance[paired + 1]]
+            matches.extend(
+                cv2.DMatch(int(q), int(t), float(d))
+                for q, t, d in zip(query[keep], train[keep], distance[keep])
+            )
+        start = stop
+    return matches
@@ -0,0 +1,119 @@
+"""
+pyramid.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains the downsampled DSM levels used for coarse-to-fine
+feature registration. Each level box-averages the infilled DSM of the
+pipeline resolution by a power of two factor, and normalizes it with filters
+of the same size in pixels as the pipeline resolution DSM, so that each level
+passes proportionally longer wavelengths. A transformation solved from the
+few features of a coarse level predicts where the features of the next finer
+level match, and only nearby features are compared there.
+
+This module contains the following methods/class:
+
+* block_reduce - reduces non-overlapping blocks of an array
+* pyramid_factors - downsampling factors of the usable pyramid levels
+* PyramidLevel - downsampled copy of the prepared DSM products
+"""
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+import numpy as np
+from codem.preprocessing.filters import normalize
+from rasterio import Affine
+
+# the coarsest level keeps at least this many pixels along both axes
+MIN_LEVEL_SIZE = 64
+
+
+def block_reduce(
+    array: np.ndarray, factor: int, reducer: Callable[..., np.ndarray]
+) -> np.ndarray:
+    """
+    Reduces non-overlapping factor x factor blocks of an array. Rows and
+    columns beyond the last complete block are dropped.
+
+    Parameters
+    ----------
+    array: np.array
+        2D array
+    factor: int
+        Block size in pixels
+    reducer: callable
+        Reduction taking an axis argument, e.g. np.mean
+
+    Returns
+    -------
+    reduced: np.array
+        Array of the block reductions
+    """
+    rows, cols = array.shape[0] // factor, array.shape[1] // factor
+    blocks = np.asarray(array[: rows * factor, : cols * factor]).reshape(
+        rows, factor, cols, factor
+    )
+    return reducer(blocks, axis=(1, 3))
+
+
+def pyramid_factors(levels: int, shapes: List[Tuple[int, ...]]) -> List[int]:
+    """
+    Downsampling factors of the levels coarser than the pipeline resolution,
+    from coarsest to finest, limited to levels that keep MIN_LEVEL_SIZE
+    pixels along both axes of every DSM.
+
+    Parameters
+    ----------
+    levels: int
+        Number of pyramid levels, including the pipeline resolution
+    shapes: list
+        Shapes of the DSMs
+
+    Returns
+    -------
+    factors: list
+        Powers of two, e.g. [4, 2] for three levels
+    """
+    smallest = min(min(shape[:2]) for shape in shapes)
+    factors = [2**level for level in range(1, levels)]
+    return [factor for factor in factors if smallest // factor >= MIN_LEVEL_SIZE][::-1]
+
+
+class PyramidLevel:
+    """
+    A class holding a downsampled copy of the prepared DSM products read by
+    the feature registration: normed, nodata_mask, infilled, transform, and
+    area_or_point. A downsampled pixel is valid only if all of its block is.
+
+    Parameters
+    ----------
+    geo_data: GeoData
+        Prepared data
+    factor: int
+        Downsampling factor
+    """
+
+    def __init__(self, geo_data: Any, factor: int) -> None:
+        self.factor = factor
+        self.area_or_point = geo_data.area_or_point
+        self.infilled = block_reduce(geo_data.infilled, factor, np.mean).astype(
+            geo_data.infilled.dtype, copy=False
+        )
+        self.nodata_mask = block_reduce(geo_data.nodata_mask, factor, np.min)
+
+        transform = geo_data.transform
+        if self.area_or_point != "Area":
+            # the origin is the center of the upper left pixel, which moves to
+            # the center of the upper left block
+            transform = transform * Affine.translation(
+                (factor - 1) / 2, (factor - 1) / 2
+            )
+        self.transform = transform * Affine.scale(factor)
+
+        # filter sizes in pixels are kept, so longer wavelengths pass
+        scale = np.sqrt(geo_data.transform[0] ** 2 + geo_data.transform[1] ** 2)
+        self.normed = normalize(
+            self.infilled, geo_data.weak_size / scale, geo_data.strong_size / scale
+        )
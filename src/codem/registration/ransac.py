@@ -0,0 +1,304 @@
+"""
+ransac.py
+Project: CRREL-NEGGS University of Houston Collaboration
+Date: October 2026
+
+This module contains a vectorized RANSAC engine for solving the 3D similarity
+transformation between matched feature locations. Hypotheses are drawn in
+batches: the minimal 3-point samples are screened for degenerate geometry and
+for side lengths that no transformation within the scale limits could map
+onto each other, the surviving samples are solved together with stacked
+Umeyama SVDs, and every hypothesis of a batch is scored against every match
+in a single array operation. Sampling stops once enough hypotheses have been
+drawn to find an all-inlier sample with the requested confidence. Samples can
+optionally be drawn progressively from the best ranked matches first (PROSAC).
+
+This module contains the following methods:
+
+* umeyama - batched least squares 3D similarity transformations
+* ransac_similarity - RANSAC estimation of a 3D similarity transformation
+"""
+import logging
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+RANSAC_ENGINES = ("batched", "skimage")
+MIN_SAMPLES = 3
+# hypotheses drawn per batch, fewer when there are many matches
+BATCH_SIZE = 256
+# maximum number of residuals computed at once
+MAX_BATCH_ELEMENTS = 2**21
+# samples whose triangle is thinner than this are degenerate
+MIN_TRIANGLE_SHAPE = 1e-3
+
+logger = logging.getLogger(__name__)
+
+
+def umeyama(
+    src: np.ndarray, dst: np.ndarray, estimate_scale: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Estimates 3D similarity transformations for stacks of point sets, see
+    Scaled3dSimilarityTransform._umeyama in codem.registration.dsm, which
+    solves a single point set with the same equations.
+
+    Parameters
+    ----------
+    src: np.array
+        (B, M, 3) source coordinates
+    dst: np.array
+        (B, M, 3) destination coordinates
+    estimate_scale: bool
+        Whether to estimate a scale factor
+
+    Returns
+    -------
+    T: np.array
+        (B, 4, 4) homogeneous transformation matrices
+    scale: np.array
+        (B,) scale factors, NaN where the problem is not well-conditioned
+    """
+    num, dim = src.shape[1], src.shape[2]
+    src_mean = src.mean(axis=1)
+    dst_mean = dst.mean(axis=1)
+    src_demean = src - src_mean[:, None, :]
+    dst_demean = dst - dst_mean[:, None, :]
+
+    # Eq. (38).
+    A = np.einsum("bmi,bmj->bij", dst_demean, src_demean) / num
+
+    # Eq. (39).
+    d = np.ones((A.shape[0], dim), dtype=np.double)
+    d[np.linalg.det(A) < 0, dim - 1] = -1
+
+    U, S, V = np.linalg.svd(A)
+
+    # Eq. (40) and (43), with the rank tolerance of np.linalg.matrix_rank
+    tol = S.max(axis=1) * dim * np.finfo(S.dtype).eps
+    rank = np.count_nonzero(S > tol[:, None], axis=1)
+    rotation_d = d.copy()
+    reduced = rank == dim - 1
+    rotation_d[reduced, dim - 1] = np.where(
+        np.linalg.det(U[reduced]) * np.linalg.det(V[reduced]) > 0, 1.0, -1.0
+    )
+    R = (U * rotation_d[:, None, :]) @ V
+
+    if estimate_scale:
+        # Eq. (41) and (42).
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.sum(S * d, axis=1) / src_demean.var(axis=1).sum(axis=1)
+    else:
+        scale = np.ones(A.shape[0], dtype=np.double)
+    scale[rank == 0] = np.nan
+
+    T = np.zeros((A.shape[0], dim + 1, dim + 1), dtype=np.double)
+    T[:, :dim, :dim] = scale[:, None, None] * R
+    T[:, :dim, dim] = dst_mean - np.einsum("bij,bj->bi", T[:, :dim, :dim], src_mean)
+    T[:, dim, dim] = 1.0
+    return T, scale
+
+
+def _draw_samples(
+    rng: np.random.Generator, pool: np.ndarray, num_matches: int, prosac: bool
+) -> np.ndarray:
+    """
+    Draws one sample of three distinct matches per hypothesis, uniformly from
+    the first pool[i] matches. For PROSAC, the last match of a pool that has
+    not yet grown to every match is always part of the sample.
+    """
+    growing = (pool < num_matches) if prosac else np.zeros(pool.shape, dtype=bool)
+    # the random members are drawn from the pool, without its last match
+    # when that is always part of the sample
+    size = np.where(growing, pool - 1, pool)
+    first = rng.integers(0, size)
+    second = rng.integers(0, size - 1)
+    second += second >= first
+    low = np.minimum(first, second)
+    high = np.maximum(first, second)
+    third = rng.integers(0, np.maximum(size - 2, 1))
+    third += third >= low
+    third += third >= high
+    return np.stack(
+        (
+            np.where(growing, pool - 1, first),
+            np.where(growing, first, second),
+            np.where(growing, second, third),
+        ),
+        axis=1,
+    )
+
+
+def _prosac_schedule(num_matches: int, max_trials: int) -> np.ndarray:
+    """
+    Hypothesis number after which each match joins the PROSAC sampling pool,
+    following Chum and Matas (2005). The pool starts with the best three
+    matches and grows to every match by max_trials.
+    """
+    m = MIN_SAMPLES
+    enter = np.zeros(num_matches, dtype=np.double)
+    t_n = float(max_trials)
+    for i in range(m):
+        t_n *= (m - i) / (num_matches - i)
+    t_prime = 1.0
+    for n in range(m, num_matches):
+        enter[n] = t_prime
+        t_next = t_n * (n + 1) / (n + 1 - m)
+        t_prime += np.ceil(t_next - t_n)
+        t_n = t_next
+    return enter
+
+
+def _screen_samples(
+    src: np.ndarray,
+    dst: np.ndarray,
+    residual_threshold: float,
+    solve_scale: bool,
+    scale_limits: Tuple[float, float],
+) -> np.ndarray:
+    """
+    Rejects samples before solving them: thin or collinear triangles, and
+    triangles whose side lengths cannot correspond under a transformation
+    within the scale limits, allowing for the residual threshold.
+    """
+    src_sides = np.linalg.norm(src - np.roll(src, 1, axis=1), axis=2)
+    dst_sides = np.linalg.norm(dst - np.roll(dst, 1, axis=1), axis=2)
+
+    valid = np.ones(src.shape[0], dtype=bool)
+    for points, sides in ((src, src_sides), (dst, dst_sides)):
+        twice_area = np.linalg.norm(
+            np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]),
+            axis=1,
+        )
+        longest = sides.max(axis=1)
+        valid &= twice_area > MIN_TRIANGLE_SHAPE * longest**2
+
+    # the sample points are inliers, so each side may change by 2 thresholds
+    slack = 2 * residual_threshold
+    low, high = scale_limits if solve_scale else (1.0, 1.0)
+    valid &= np.all(dst_sides >= low * src_sides - slack, axis=1)
+    valid &= np.all(dst_sides <= high * src_sides + slack, axis=1)
+    return valid
+
+
+def ransac_similarity(
+    src: np.ndarray,
+    dst: np.ndarray,
+    residual_threshold: float,
+    max_trials: int,
+    solve_scale: bool = True,
+    confidence: float = 0.999,
+    order: Optional[np.ndarray] = None,
+    scale_limits: Tuple[float, float] = (0.67, 1.5),
+    seed: Optional[int] = None,
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Robustly estimates the 3D similarity transformation from src to dst
+    points. As with scikit-image's ransac, the hypothesis with the most
+    inliers wins, ties are broken by the sum of squared residuals, and the
+    returned transformation is refit to all of its inliers.
+
+    Parameters
+    ----------
+    src: np.array
+        (N, 3) points to be transformed to the dst point locations
+    dst: np.array
+        (N, 3) fixed points ordered to correspond to the src points
+    residual_threshold: float
+        Maximum distance between a transformed src point and its dst point
+        for the pair to be an inlier
+    max_trials: int
+        Maximum number of hypotheses
+    solve_scale: bool
+        Whether to solve a scale factor
+    confidence: float
+        Probability of having drawn an all-inlier sample at which sampling
+        stops; 1 always draws max_trials hypotheses
+    order: np.array, optional
+        Indices of the matches from best to worst, e.g., by descriptor
+        distance; samples are drawn progressively from the best matches first
+    scale_limits: tuple
+        Smallest and largest acceptable scale factors when solving scale
+    seed: int, optional
+        Seed of the random number generator, for reproducible results
+
+    Returns
+    -------
+    T: np.array or None
+        The 4x4 homogeneous transformation, None if no hypothesis was valid
+    inliers: np.array or None
+        Boolean inlier mask of the best hypothesis
+    """
+    src = np.asarray(src, dtype=np.double)
+    dst = np.asarray(dst, dtype=np.double)
+    num_matches = src.shape[0]
+    if num_matches < MIN_SAMPLES:
+        return None, None
+
+    prosac = order is not None
+    ranked = np.asarray(order) if prosac else np.arange(num_matches)
+    growth = _prosac_schedule(num_matches, max_trials) if prosac else None
+    rng = np.random.default_rng(seed)
+    batch_size = int(np.clip(MAX_BATCH_ELEMENTS // num_matches, 1, BATCH_SIZE))
+    threshold_sq = residual_threshold**2
+
+    best_count = 0
+    best_residuals = np.inf
+    best_inliers: Optional[np.ndarray] = None
+    required = float(max_trials)
+    trials = 0
+    while trials < min(max_trials, required):
+        count = int(min(batch_size, max_trials - trials))
+        if growth is None:
+            pool = np.full(count, num_matches)
+        else:
+            # pool size for each trial: matches whose growth trial has passed
+            trial_numbers = np.arange(trials + 1, trials + count + 1)
+            pool = np.searchsorted(growth, trial_numbers, side="right")
+        samples = ranked[_draw_samples(rng, pool, num_matches, prosac)]
+        trials += count
+
+        sample_src, sample_dst = src[samples], dst[samples]
+        valid = _screen_samples(
+            sample_src, sample_dst, residual_threshold, solve_scale, scale_limits
+        )
+        if not np.any(valid):
+            continue
+        T, scale = umeyama(sample_src[valid], sample_dst[valid], solve_scale)
+        keep = np.isfinite(scale) & np.all(np.isfinite(T), axis=(1, 2))
+        if solve_scale:
+            keep &= (scale > scale_limits[0]) & (scale < scale_limits[1])
+        T = T[keep]
+        if T.shape[0] == 0:
+            continue
+
+        # residuals of every match under every hypothesis of the batch
+        transformed = np.einsum("bij,nj->bni", T[:, :3, :3], src) + T[:, None, :3, 3]
+        residuals_sq = np.sum((transformed - dst) ** 2, axis=2)
+        inliers = residuals_sq < threshold_sq
+        counts = np.count_nonzero(inliers, axis=1)
+        sums = residuals_sq.sum(axis=1)
+        best = np.lexsort((sums, -counts))[0]
+        if counts[best] > best_count or (
+            counts[best] == best_count and sums[best] < best_residuals
+        ):
+            best_count = int(counts[best])
+            best_residuals = float(sums[best])
+            best_inliers = inliers[best]
+            if confidence < 1:
+                inlier_ratio = best_count / num_matches
+                all_inliers = inlier_ratio**MIN_SAMPLES
+                if all_inliers >= 1:
+                    required = 0
+                elif all_inliers > 0:
+                    required = np.log(1 - confidence) / np.log(1 - all_inliers)
+
+    logger.debug(
+        f"RANSAC drew {trials} hypotheses, best has {best_count} of "
+        f"{num_matches} matches as inliers"
+    )
+    if best_inliers is None or best_count < MIN_SAMPLES:
+        return None, None
+    T, _ = umeyama(src[best_inliers][None], dst[best_inliers][None], solve_scale)
+    return T[0], best_inliers
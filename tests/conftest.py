@@ -1,6 +1,19 @@
+import dataclasses
+import itertools
+import json
 import os
+import pathlib
+import shutil
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Tuple
 
+import codem
+import numpy as np
+import pdal
 import pytest
+from codem.preprocessing.preprocess import GeoData
 
 
 @pytest.fixture(scope="session")
@@ -15,3 +28,53 @@ def tif_aoi() -> str:
     aoi_file = os.path.abspath("tests/data/1_smallAOI.tif")
     assert os.path.exists(aoi_file)
     return aoi_file
+
+
+@pytest.fixture
+def write_points(tmp_path: pathlib.Path) -> Callable[..., str]:
+    # writes synthetic X, Y, Z coordinates to a LAS, or COPC, file in the test
+    # directory
+    def write(name: str, xyz: np.ndarray, srs: str = "EPSG:32615") -> str:
+        points = np.zeros(len(xyz), dtype=[("X", float), ("Y", float), ("Z", float)])
+        points["X"], points["Y"], points["Z"] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+        path = str(tmp_path / name)
+        writer_type = "writers.copc" if name.endswith(".copc.laz") else "writers.las"
+        writer = {"type": writer_type, "filename": path, "a_srs": srs}
+        pipeline = pdal.Pipeline(json.dumps([writer]), arrays=[points])
+        pipeline.execute()
+        return path
+
+    return write
+
+
+@pytest.fixture
+def run_config(
+    tmp_path: pathlib.Path, tif_fnd: str, tif_aoi: str
+) -> Callable[..., Dict[str, Any]]:
+    # each configuration registers copies of the rasters in a directory of its
+    # own, so the output directories, named by the second, cannot collide
+    runs = itertools.count()
+
+    def make(**overrides: Any) -> Dict[str, Any]:
+        run_dir = tmp_path / f"run_{next(runs)}"
+        run_dir.mkdir()
+        fnd_file = shutil.copy(tif_fnd, run_dir)
+        aoi_file = shutil.copy(tif_aoi, run_dir)
+        overrides.setdefault("ICP_NORMALS", "grid")
+        return dataclasses.asdict(codem.CodemRunConfig(fnd_file, aoi_file, **overrides))
+
+    return make
+
+
+@pytest.fixture
+def prepared(
+    run_config: Callable[..., Dict[str, Any]]
+) -> Callable[..., Tuple[Dict[str, Any], GeoData, GeoData]]:
+    # the configuration and the foundation and AOI data prepared for registration
+    def make(**overrides: Any) -> Tuple[Dict[str, Any], GeoData, GeoData]:
+        config = run_config(**overrides)
+        fnd_obj, aoi_obj = codem.preprocess(config)
+        codem.prep(fnd_obj, aoi_obj, config)
+        return config, fnd_obj, aoi_obj
+
+    return make
@@ -0,0 +1,45 @@
+import os
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+import numpy as np
+import trimesh
+from codem.preprocessing.preprocess import GeoData
+from codem.preprocessing.preprocess import Mesh
+from codem.registration import ApplyRegistration
+
+
+def test_mesh_registration_keeps_aoi_mesh(
+    run_config: Callable[..., Dict[str, Any]], tmp_path: Any
+) -> None:
+    rng = np.random.default_rng(10)
+    mesh_file = str(tmp_path / "aoi.ply")
+    vertices = rng.uniform(0, 50, (300, 3))
+    trimesh.Trimesh(vertices, np.arange(300).reshape(-1, 3), process=False).export(
+        mesh_file
+    )
+    config = run_config(DSM_GRID_ENGINE="numpy")
+    config["AOI_FILE"] = mesh_file
+    aoi_obj = Mesh(config, fnd=False)
+    original = np.array(aoi_obj.load_mesh().vertices)
+
+    matrix = np.eye(4)
+    matrix[:3, 3] = [10.0, -5.0, 2.0]
+    app_reg = ApplyRegistration(
+        GeoData(config, fnd=True),
+        aoi_obj,
+        {"matrix": matrix},
+        np.empty((0, 0)),
+        np.empty((0, 0)),
+        config,
+        None,
+    )
+    app_reg.apply()
+
+    registered = trimesh.load_mesh(app_reg.out_name)
+    assert os.path.basename(app_reg.out_name) == "aoi_registered.ply"
+    assert np.allclose(registered.vertices, original + [10.0, -5.0, 2.0])
+    # the registration is applied to a copy of the parsed AOI mesh
+    assert np.array_equal(aoi_obj.load_mesh().vertices, original)
+    assert np.array_equal(aoi_obj.vertices, original)
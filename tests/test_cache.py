@@ -0,0 +1,96 @@
+import os
+import pathlib
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+import numpy as np
+import rasterio
+from codem.preprocessing.cache import PrepCache
+from codem.preprocessing.preprocess import instantiate
+from rasterio import Affine
+
+
+def test_prep_cache_roundtrip_and_eviction(
+    tmp_path: pathlib.Path, tif_fnd: str
+) -> None:
+    cache = PrepCache(os.path.join(tmp_path, "cache"), max_size=1e-3)
+    signature = {"resolution": 1.0, "weak_size": 1.0, "strong_size": 10.0}
+    key = cache.key(tif_fnd, signature)
+
+    # parameters are part of the key
+    assert key != cache.key(tif_fnd, {**signature, "resolution": 2.0})
+    assert cache.load(key) is None
+
+    arrays = {"dsm": np.arange(160000, dtype=np.float32).reshape(400, 400)}
+    cache.store(key, arrays, {"area_or_point": "Area"})
+    entry = cache.load(key)
+    assert entry is not None
+    cached_arrays, attributes = entry
+    assert isinstance(cached_arrays["dsm"], np.memmap)
+    assert np.array_equal(cached_arrays["dsm"], arrays["dsm"])
+    assert attributes["area_or_point"] == "Area"
+
+    # two 0.64 MB entries exceed the ~1 MB limit, the older one is evicted
+    other_key = cache.key(tif_fnd, {**signature, "resolution": 3.0})
+    cache.store(other_key, {"dsm": np.zeros((400, 400), np.float32)}, {})
+    assert cache.load(other_key) is not None
+    assert cache.load(key) is None
+
+
+def test_prep_cache_key_follows_directory_contents(
+    tmp_path: pathlib.Path, run_config: Callable[..., Dict[str, Any]]
+) -> None:
+    cache = PrepCache(os.path.join(tmp_path, "cache"), max_size=1.0)
+    signature = {"resolution": 1.0}
+
+    # a chunk edited in place, within a nested directory of a Zarr-like store
+    store = tmp_path / "fnd.zarr"
+    (store / "0").mkdir(parents=True)
+    (store / "0" / "0").write_bytes(b"chunk")
+    key = cache.key(str(store), signature)
+    directory_mtime = os.stat(store).st_mtime_ns
+    with open(store / "0" / "0", "r+b") as chunk:
+        chunk.write(b"CHUNK")
+    os.utime(store / "0" / "0", ns=(0, os.stat(store / "0" / "0").st_mtime_ns + 1))
+    assert os.stat(store).st_mtime_ns == directory_mtime
+    assert cache.key(str(store), signature) != key
+
+    # a tile of a catalog rewritten in place
+    tiles = tmp_path / "tiles"
+    tiles.mkdir()
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "count": 1,
+        "width": 50,
+        "height": 50,
+        "nodata": -9999.0,
+    }
+    for i in range(2):
+        transform = Affine(1.0, 0.0, 50.0 * i, 0.0, -1.0, 50.0)
+        with rasterio.open(
+            tiles / f"{i}.tif", "w", transform=transform, **profile
+        ) as tile:
+            tile.write(np.full((1, 50, 50), i, dtype=np.float32))
+    config = run_config(FND_CACHE_DIR=str(tmp_path / "cache"))
+    config["FND_FILE"] = str(tiles)
+
+    def catalog_key() -> str:
+        fnd_obj = instantiate(config, fnd=True)
+        assert fnd_obj.cache is not None
+        fnd_obj.resolution = 1.0
+        fnd_obj.window_bounds = (60.0, 10.0, 90.0, 40.0)
+        return fnd_obj.cache.key(
+            fnd_obj.file, fnd_obj._prep_signature(), fnd_obj._prep_source()
+        )
+
+    key = catalog_key()
+    assert catalog_key() == key
+    # tiles outside the window do not affect the entry
+    os.utime(tiles / "0.tif", ns=(0, os.stat(tiles / "0.tif").st_mtime_ns + 1))
+    assert catalog_key() == key
+    with rasterio.open(tiles / "1.tif", "r+") as tile:
+        tile.write(np.full((1, 50, 50), 5, dtype=np.float32))
+    os.utime(tiles / "1.tif", ns=(0, os.stat(tiles / "1.tif").st_mtime_ns + 1))
+    assert catalog_key() != key
@@ -0,0 +1,66 @@
+import os
+import pathlib
+from typing import Any
+from typing import Callable
+from typing import Tuple
+
+import cv2
+import numpy as np
+from codem.registration import DsmRegistration
+from codem.registration.feature_index import build_feature_index
+from codem.registration.feature_index import FeatureIndex
+from codem.registration.feature_index import index_signature
+
+
+def _sorted(
+    features: Tuple[Tuple[cv2.KeyPoint, ...], np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    kp, desc = features
+    points = np.array([point.pt for point in kp])
+    order = np.lexsort(points.T)
+    return points[order], desc[order]
+
+
+def test_feature_index_replaces_extraction(
+    tmp_path: pathlib.Path, prepared: Callable[..., Any]
+) -> None:
+    config, fnd_obj, aoi_obj = prepared()
+    index_dir = os.path.join(tmp_path, "index")
+    index = build_feature_index(fnd_obj, config, index_dir, tile_size=100.0)
+    assert len(index.tiles) > 1
+
+    # a query reads the tiles intersecting its extent
+    name, tile = sorted(index.tiles.items())[0]
+    assert index._tile_range(tuple(tile["bounds"])) == [name]
+    features = FeatureIndex(index_dir).query(tuple(tile["bounds"]))
+    assert features["desc"].shape[0] == tile["count"]
+
+    extracted = _sorted(DsmRegistration(fnd_obj, aoi_obj, config)._get_fnd_kp())
+    registration = DsmRegistration(fnd_obj, aoi_obj, config, index)
+    loaded = _sorted(registration._get_fnd_kp())
+
+    # only the features within FND_WINDOW_BUFFER of the AOI are loaded
+    left, bottom, right, top = registration._get_aoi_window()
+    offset = 0.5 if fnd_obj.area_or_point == "Area" else 0.0
+    x, y = fnd_obj.transform * (extracted[0].T + offset)
+    pad = fnd_obj.transform.a
+    near = (
+        (x >= left - pad) & (x <= right + pad) & (y >= bottom - pad) & (y <= top + pad)
+    )
+    # whole tiles are read, so the loaded features cover the window
+    assert 0 < len(loaded[0]) < len(extracted[0])
+    assert (
+        set(map(tuple, extracted[0][near].round(3)))
+        <= set(map(tuple, loaded[0].round(3)))
+        <= set(map(tuple, extracted[0].round(3)))
+    )
+
+    # a buffer covering the foundation loads every feature
+    config["FND_WINDOW_BUFFER"] = 1e4
+    loaded = _sorted(DsmRegistration(fnd_obj, aoi_obj, config, index)._get_fnd_kp())
+    assert np.allclose(extracted[0], loaded[0])
+    assert np.array_equal(extracted[1], loaded[1])
+
+    # an index built with other parameters is not used
+    config["DSM_AKAZE_THRESHOLD"] = 0.001
+    assert not index.compatible(index_signature(fnd_obj, config))
@@ -0,0 +1,29 @@
+import numpy as np
+from codem.registration.features import akaze_features
+from scipy.ndimage import gaussian_filter
+
+
+def test_tiled_akaze_matches_whole_image() -> None:
+    rng = np.random.default_rng(0)
+    img = gaussian_filter(rng.normal(size=(600, 700)), 3)
+    img = ((img - img.min()) / np.ptp(img) * 255).astype(np.uint8)
+    mask = np.ones(img.shape, dtype=np.uint8)
+    mask[100:250, 300:500] = 0
+
+    kp, desc = akaze_features(img, mask, 0.0001)
+    tiled_kp, tiled_desc = akaze_features(img, mask, 0.0001, 256, 64, workers=2)
+    assert len(tiled_kp) == tiled_desc.shape[0]
+    assert np.array_equal(
+        tiled_desc, akaze_features(img, mask, 0.0001, 256, 64, workers=1)[1]
+    )
+
+    for points in (kp, tiled_kp):
+        rows = np.array([int(round(p.pt[1])) for p in points])
+        cols = np.array([int(round(p.pt[0])) for p in points])
+        assert np.all(mask[rows, cols])
+
+    # keypoints found twice in the tile overlaps are kept once
+    whole = {np.round(p.pt, 2).tobytes() for p in kp}
+    tiled = [np.round(p.pt, 2).tobytes() for p in tiled_kp]
+    assert len(set(tiled)) > 0.99 * len(tiled)
+    assert len(whole.intersection(tiled)) > 0.8 * len(whole)
@@ -0,0 +1,31 @@
+from typing import Any
+from typing import Callable
+from typing import Tuple
+
+import codem
+import numpy as np
+from codem.preprocessing.preprocess import GeoData
+from codem.registration import IcpRegistration
+
+
+def test_float32_icp_matches_float64(prepared: Callable[..., Any]) -> None:
+    def register(float32: bool) -> Tuple[GeoData, IcpRegistration]:
+        config, fnd_obj, aoi_obj = prepared(
+            ICP_FLOAT32=float32, DSM_RANSAC_ENGINE="batched", DSM_RANSAC_SEED=0
+        )
+        dsm_reg = codem.coarse_registration(fnd_obj, aoi_obj, config)
+        return aoi_obj, codem.fine_registration(fnd_obj, aoi_obj, dsm_reg, config)
+
+    aoi_obj, double = register(False)
+    _, single = register(True)
+    assert single.fixed.dtype == np.float32
+
+    # both transformations move the AOI corners to the same place
+    rows, cols = aoi_obj.infilled.shape
+    corners = np.array(
+        [aoi_obj.transform * (c, r) for r in (0, rows) for c in (0, cols)]
+    )
+    corners = np.c_[corners, np.full(4, aoi_obj.infilled.mean()), np.ones(4)]
+    difference = corners @ (single.transformation - double.transformation).T
+    assert np.all(np.linalg.norm(difference[:, :3], axis=1) < 1e-3)
+    assert np.isclose(single.rmse_3d, double.rmse_3d, rtol=1e-3)
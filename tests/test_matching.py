@@ -0,0 +1,44 @@
+from typing import List
+from typing import Tuple
+
+import cv2
+import numpy as np
+from codem.registration.matching import guided_matches
+from codem.registration.matching import hamming_distance
+
+
+def _pairs(matches: List[cv2.DMatch]) -> List[Tuple[int, int, float]]:
+    return [(m.queryIdx, m.trainIdx, m.distance) for m in matches]
+
+
+def test_guided_matches_agree_with_brute_force() -> None:
+    rng = np.random.default_rng(0)
+    fnd_desc = rng.integers(0, 256, (400, 61), dtype=np.uint8)
+    fnd_xy = rng.uniform(0, 1000, (400, 2))
+    # noisy copies of half of the foundation features, offset by a few meters
+    aoi_desc = fnd_desc[:200].copy()
+    flips = rng.random(aoi_desc.shape) < 0.05
+    aoi_desc[flips] ^= rng.integers(1, 256, flips.sum(), dtype=np.uint8)
+    aoi_xy = fnd_xy[:200] + rng.normal(0, 5, (200, 2))
+
+    matcher = cv2.DescriptorMatcher_create(cv2.DescriptorMatcher_BRUTEFORCE_HAMMING)
+    knn_matches = matcher.knnMatch(aoi_desc, fnd_desc, k=2)
+    nearest = [m for m, _ in knn_matches]
+    assert np.array_equal(
+        [m.distance for m in nearest],
+        hamming_distance(aoi_desc, fnd_desc[[m.trainIdx for m in nearest]]),
+    )
+
+    # a radius covering every keypoint matches globally
+    everything = guided_matches(aoi_xy, aoi_desc, fnd_xy, fnd_desc, 1e4, 0.9)
+    assert _pairs(everything) == _pairs(
+        [m for m, n in knn_matches if m.distance < 0.9 * n.distance]
+    )
+
+    nearby = guided_matches(aoi_xy, aoi_desc, fnd_xy, fnd_desc, 50.0, 0.9)
+    # sparse keypoints may have fewer than two candidates within the radius
+    assert len(nearby) > 180
+    assert all(m.queryIdx == m.trainIdx for m in nearby)
+    assert all(
+        np.hypot(*(aoi_xy[m.queryIdx] - fnd_xy[m.trainIdx])) <= 50.0 for m in nearby
+    )
@@ -0,0 +1,35 @@
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+import codem
+import numpy as np
+from codem.lib.memory import MemoryBudget
+from codem.lib.memory import peak_rss
+from codem.registration import DsmRegistration
+from codem.registration import IcpRegistration
+
+
+def test_memory_budget_releases_and_offloads(
+    run_config: Callable[..., Dict[str, Any]]
+) -> None:
+    config = run_config()
+    fnd_obj, aoi_obj = codem.preprocess(config)
+    fnd_obj.prep()
+    point_cloud = np.array(fnd_obj.point_cloud)
+
+    # a budget too small for any product moves all of them to scratch files
+    budget = MemoryBudget(1e-9)
+    budget.fit([fnd_obj], [DsmRegistration.CONSUMES, IcpRegistration.CONSUMES])
+    assert fnd_obj.dsm.size == 0
+    for name in ("normed", "nodata_mask", "infilled", "normal_vectors"):
+        assert isinstance(getattr(fnd_obj, name), np.memmap)
+    assert isinstance(fnd_obj.point_cloud, np.memmap)
+    assert np.array_equal(fnd_obj.point_cloud, point_cloud)
+
+    # products of completed stages are released
+    budget.fit([fnd_obj], [IcpRegistration.CONSUMES])
+    assert fnd_obj.normed.size == 0
+    assert fnd_obj.point_cloud.size > 0
+
+    assert peak_rss() is None or peak_rss() > 0
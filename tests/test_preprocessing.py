@@ -0,0 +1,504 @@
+import json
+import logging
+import os
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+import numpy as np
+import pytest
+import rasterio
+import trimesh
+from codem.preprocessing.arrays import ArrayDataset
+from codem.preprocessing.catalog import build_vrt
+from codem.preprocessing.catalog import TileCatalog
+from codem.preprocessing.filters import gaussian_blur
+from codem.preprocessing.filters import normalize
+from codem.preprocessing.filters import normalize_tiled
+from codem.preprocessing.gridding import GRID_REDUCERS
+from codem.preprocessing.gridding import GridAccumulator
+from codem.preprocessing.infill import infill
+from codem.preprocessing.infill import INFILL_METHODS
+from codem.preprocessing.normals import grid_normals
+from codem.preprocessing.overviews import overview_factors
+from codem.preprocessing.overviews import select_overview
+from codem.preprocessing.preprocess import DSM
+from codem.preprocessing.preprocess import GeoData
+from codem.preprocessing.preprocess import instantiate
+from codem.preprocessing.preprocess import Mesh
+from codem.preprocessing.preprocess import PointCloud
+from rasterio import Affine
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+
+@pytest.mark.parametrize("method", INFILL_METHODS)
+def test_infill_sparse_dsm(method: str) -> None:
+    nodata = -9999.0
+    rng = np.random.default_rng(0)
+    v, u = np.mgrid[0:200, 0:300].astype(np.float32)
+    truth = 0.05 * u + 0.02 * v + np.sin(u / 20)
+    mask = (rng.random(truth.shape) < 0.05).astype(np.uint8)
+    mask[50:120, 100:200] = 0
+    dsm = np.where(mask == 1, truth, nodata).astype(np.float32)
+
+    infilled = infill(dsm.copy(), mask, nodata, method)
+
+    assert infilled.shape == dsm.shape
+    assert np.all(np.isfinite(infilled)) and not np.any(infilled == nodata)
+    assert np.array_equal(infilled[mask == 1], dsm[mask == 1])
+    assert np.sqrt(np.mean((infilled - truth)[mask == 0] ** 2)) < 1.0
+
+
+def test_infill_rejects_empty_dsm_without_nodata(
+    run_config: Callable[..., Dict[str, Any]]
+) -> None:
+    geo_data = GeoData(run_config(), fnd=True)
+    geo_data.dsm = np.full((20, 30), np.nan)
+    with pytest.raises(AssertionError, match="DSM array is empty"):
+        geo_data._infill()
+
+    geo_data.dsm = np.where(np.eye(20, 30) == 1, np.nan, 5.0)
+    geo_data._infill()
+    assert np.allclose(geo_data.infilled, 5.0)
+    assert np.count_nonzero(geo_data.nodata_mask == 0) == 20
+
+
+def test_pyramid_normalization_matches_direct() -> None:
+    # 0.25 m pixels with the default 1 m weak and 10 m strong filters
+    rng = np.random.default_rng(1)
+    v, u = np.mgrid[0:600, 0:500].astype(np.float32)
+    terrain = 50 * np.sin(u / 300) + 0.1 * v
+    buildings = 8.0 * ((u // 40 + v // 40) % 3 == 0)
+    dsm = (terrain + buildings + rng.normal(0, 0.2, u.shape)).astype(np.float32)
+
+    direct = normalize(dsm, 4.0, 40.0, pyramid_sigma=np.inf)
+    pyramid = normalize(dsm, 4.0, 40.0)
+
+    difference = np.abs(direct.astype(int) - pyramid.astype(int))
+    assert np.mean(difference) < 1.0
+    assert np.percentile(difference, 99) <= 3
+
+
+def test_tiled_normalization_matches_whole() -> None:
+    rng = np.random.default_rng(2)
+    v, u = np.mgrid[0:450, 0:380].astype(np.float32)
+    buildings = 8.0 * ((u // 40 + v // 40) % 3 == 0)
+    dsm = (0.1 * v + buildings + rng.normal(0, 0.2, u.shape)).astype(np.float32)
+
+    whole = normalize(dsm, 1.0, 6.0)
+    tiled = normalize_tiled(dsm, 1.0, 6.0, tile_size=128)
+    assert np.array_equal(whole, tiled)
+
+    # sampled percentiles shift the quantization by at most one level
+    out = np.zeros(dsm.shape, dtype=np.uint8)
+    sampled = normalize_tiled(dsm, 1.0, 6.0, tile_size=128, out=out, sample_size=5000)
+    assert sampled is out
+    assert np.abs(whole.astype(int) - sampled.astype(int)).max() <= 1
+
+
+def test_grid_normals_of_plane_with_voids() -> None:
+    # rotated, anisotropic pixels on the plane z = 0.3 x - 0.1 y
+    transform = Affine.translation(500000, 4000000) * Affine.rotation(30)
+    transform *= Affine.scale(0.5, -2.0)
+    v, u = np.mgrid[0:60, 0:80] + 0.5
+    x, y = transform * (u, v)
+    mask = np.ones(u.shape, dtype=np.uint8)
+    mask[20:30, 30:50] = 0
+    mask[::7, ::5] = 0
+    dsm = np.where(mask == 1, 0.3 * (x - 500000) - 0.1 * (y - 4000000), -9999.0)
+
+    normals = grid_normals(dsm, mask, transform)
+
+    expected = np.array([-0.3, 0.1, 1.0]) / np.linalg.norm([-0.3, 0.1, 1.0])
+    assert normals.shape == (np.count_nonzero(mask), 3)
+    assert np.allclose(normals, expected)
+
+
+@pytest.mark.parametrize("reducer", GRID_REDUCERS)
+def test_grid_accumulator_matches_brute_force(reducer: str) -> None:
+    rng = np.random.default_rng(3)
+    x = rng.uniform(0, 40, 3000)
+    y = rng.uniform(0, 30, 3000)
+    z = rng.normal(size=3000)
+    grid = GridAccumulator((x.min(), y.min(), x.max(), y.max()), 1.0, reducer)
+    grid.add(x[:1000], y[:1000], z[:1000])
+    grid.add(x[1000:], y[1000:], z[1000:])
+    dsm = grid.result()
+
+    expected = np.full(dsm.shape, -9999.0)
+    for row, col in np.ndindex(*dsm.shape):
+        center_x, center_y = grid.transform * (col + 0.5, row + 0.5)
+        distance = np.hypot(x - center_x, y - center_y)
+        near = distance <= np.sqrt(2)
+        if not near.any():
+            continue
+        if reducer == "max":
+            expected[row, col] = z[near].max()
+        elif reducer == "min":
+            expected[row, col] = z[near].min()
+        elif reducer == "mean":
+            expected[row, col] = z[near].mean()
+        else:
+            weights = 1 / distance[near]
+            expected[row, col] = np.sum(weights * z[near]) / np.sum(weights)
+    assert np.allclose(dsm, expected)
+
+
+def test_overview_selection() -> None:
+    factors = overview_factors(5000, 3000)
+    assert factors == [2, 4, 8, 16]
+    # the coarsest overview no coarser than the target resolution is selected
+    assert select_overview(factors, 1.5) is None
+    assert select_overview(factors, 2.0) == 0
+    assert select_overview(factors, 7.9) == 1
+    assert select_overview(factors, 100.0) == 3
+    assert select_overview([], 4.0) is None
+
+
+def test_triangle_rasterization_of_plane() -> None:
+    # two triangles covering a 10 m square, sampled at every pixel center
+    vertices = np.array(
+        [[0.0, 0.0, 0.0], [10.0, 0.0, 5.0], [10.0, 10.0, 15.0], [0.0, 10.0, 10.0]]
+    )
+    faces = np.array([[0, 1, 2], [0, 2, 3]])
+    grid = GridAccumulator((0.0, 0.0, 10.0, 10.0), 1.0, "max")
+    grid.add_triangles(vertices, faces, chunk_size=7)
+    dsm = grid.result()
+
+    rows, cols = np.mgrid[0 : grid.shape[0], 0 : grid.shape[1]]
+    x, y = grid.transform * (cols + 0.5, rows + 0.5)
+    inside = (x <= 10.0) & (y <= 10.0)
+    assert np.allclose(dsm[inside], 0.5 * x[inside] + y[inside])
+    # cells beyond the mesh only hold the vertices they contain
+    assert np.count_nonzero(dsm[~inside] != grid.nodata) == 3
+
+
+def test_tile_catalog_query_and_update(tmp_path: Any) -> None:
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "count": 1,
+        "width": 10,
+        "height": 10,
+        "nodata": -9999.0,
+    }
+    for i, j in [(0, 0), (0, 1), (1, 0), (1, 1)]:
+        transform = Affine(1.0, 0.0, 10.0 * i, 0.0, -1.0, 10.0 * (j + 1))
+        with rasterio.open(
+            tmp_path / f"{i}_{j}.tif", "w", transform=transform, **profile
+        ) as tile:
+            tile.write(np.full((1, 10, 10), i + 2 * j, dtype=np.float32))
+
+    catalog = TileCatalog(str(tmp_path))
+    assert catalog.type == "dsm"
+    assert catalog.bounds == (0.0, 0.0, 20.0, 20.0)
+    hits = catalog.query((12.0, 2.0, 15.0, 8.0))
+    assert [os.path.basename(path) for path in hits] == ["1_0.tif"]
+    assert len(catalog.query((5.0, 5.0, 15.0, 15.0))) == 4
+
+    mosaic = str(tmp_path / "mosaic.vrt")
+    build_vrt(catalog.select((0.0, 1.0, 20.0, 9.0)), catalog.crs, mosaic)
+    with rasterio.open(mosaic) as data:
+        assert (data.width, data.height) == (20, 10)
+        assert np.array_equal(np.unique(data.read(1)), [0.0, 1.0])
+
+    # unchanged tiles keep their index entries, removed tiles are dropped
+    os.remove(tmp_path / "1_1.tif")
+    catalog.tiles["0_0.tif"]["bounds"] = [100.0, 100.0, 110.0, 110.0]
+    catalog.update()
+    reloaded = TileCatalog(str(tmp_path))
+    assert sorted(reloaded.tiles) == ["0_0.tif", "0_1.tif", "1_0.tif"]
+    assert reloaded.tiles["0_0.tif"]["bounds"] == [100.0, 100.0, 110.0, 110.0]
+
+
+def test_array_dataset_reads_like_raster(tif_fnd: str, tmp_path: Any) -> None:
+    with rasterio.open(tif_fnd) as raster:
+        array_path = str(tmp_path / "fnd.npy")
+        np.save(array_path, raster.read(1))
+        georeference = {
+            "transform": list(raster.transform)[:6],
+            "crs": raster.crs.to_wkt() if raster.crs else None,
+            "nodata": raster.nodata,
+        }
+        with open(f"{array_path}.json", "w") as f:
+            json.dump(georeference, f)
+
+        with ArrayDataset(array_path) as dataset:
+            assert dataset.bounds == raster.bounds
+            assert dataset.crs == raster.crs
+            window = Window(37, 21, 160, 90)
+            assert dataset.window(*raster.window_bounds(window)) == window
+            assert np.array_equal(
+                dataset.read(1, window=window), raster.read(1, window=window)
+            )
+            for method in (Resampling.cubic, Resampling.average):
+                assert np.array_equal(
+                    dataset.read(
+                        1, window=window, out_shape=(45, 80), resampling=method
+                    ),
+                    raster.read(
+                        1, window=window, out_shape=(45, 80), resampling=method
+                    ),
+                )
+
+
+def test_dsm2pc_generates_valid_pixels_around_origin(
+    run_config: Callable[..., Dict[str, Any]]
+) -> None:
+    geo_data = GeoData(run_config(ICP_FLOAT32=True), fnd=True)
+    geo_data.transform = Affine(0.5, 0.0, 500000.0, 0.0, -0.5, 4000000.0)
+    geo_data.area_or_point = "Area"
+    rows, cols = np.mgrid[0:40, 0:60]
+    geo_data.dsm = 100.0 + 0.1 * cols + 0.2 * rows
+    geo_data.nodata_mask = np.ones(geo_data.dsm.shape, dtype=np.uint8)
+    geo_data.nodata_mask[10:20, 5:30] = 0
+    geo_data.nodata_mask[::3, ::4] = 0
+
+    geo_data._dsm2pc()
+
+    valid = geo_data.nodata_mask == 1
+    x, y = geo_data.transform * (cols[valid] + 0.5, rows[valid] + 0.5)
+    expected = np.c_[x, y, geo_data.dsm[valid]]
+    assert geo_data.point_cloud.dtype == np.float32
+    assert geo_data.point_cloud.shape == (np.count_nonzero(valid), 3)
+    # the origin lies near the center of the data, in absolute coordinates
+    assert np.allclose(geo_data.point_origin, [500015.0, 3999990.0, 107.0], atol=1)
+    absolute = geo_data.point_cloud + geo_data.point_origin
+    assert np.allclose(absolute, expected, rtol=0, atol=1e-4)
+
+
+@pytest.mark.parametrize("srs", ["EPSG:32615", "EPSG:2229"])
+def test_streamed_gridding_matches_in_memory(
+    run_config: Callable[..., Dict[str, Any]],
+    write_points: Callable[..., str],
+    monkeypatch: Any,
+    srs: str,
+) -> None:
+    rng = np.random.default_rng(5)
+    xyz = np.c_[rng.uniform(0, 60, 3500), rng.uniform(0, 40, 3500), np.zeros(3500)]
+    xyz[:, 2] = 0.2 * xyz[:, 0] + rng.normal(0, 0.1, 3500)
+    las_file = write_points("cloud.las", xyz + [500000, 4000000, 100], srs)
+
+    chunks = []
+    add = GridAccumulator.add
+
+    def record(grid: GridAccumulator, x: Any, y: Any, z: Any) -> None:
+        chunks.append(len(x))
+        add(grid, x, y, z)
+
+    monkeypatch.setattr(GridAccumulator, "add", record)
+
+    def grid(streaming: bool) -> PointCloud:
+        config = run_config(
+            DSM_GRID_ENGINE="numpy", DSM_GRID_CHUNK_SIZE=1000, PC_STREAMING=streaming
+        )
+        config["FND_FILE"] = las_file
+        pcloud = PointCloud(config, fnd=True)
+        pcloud.resolution = 2.0
+        pcloud._create_dsm()
+        return pcloud
+
+    in_memory = grid(False)
+    chunks.clear()
+    # streaming never holds all points in a single array
+    monkeypatch.delattr(GeoData, "_grid_points")
+    streamed = grid(True)
+
+    # the points are read in chunks of at most DSM_GRID_CHUNK_SIZE, the
+    # last one partial, and every point is gridded once
+    assert chunks == [1000, 1000, 1000, 500]
+    assert streamed.transform == in_memory.transform
+    assert np.allclose(streamed.dsm, in_memory.dsm)
+    # the header bounds are scaled to meters like the points
+    x, _ = streamed.transform * (0, 0)
+    assert np.isclose(x, 500000 * streamed.units_factor, atol=2.0)
+
+
+def test_copc_reader_level_of_detail(
+    run_config: Callable[..., Dict[str, Any]], write_points: Callable[..., str]
+) -> None:
+    # a square ring of points, in US survey feet, without points near its center
+    rng = np.random.default_rng(6)
+    xyz = rng.uniform(0, 400, (40000, 3))
+    ring = np.max(np.abs(xyz[:, :2] - 200), axis=1) > 150
+    copc_file = write_points("cloud.copc.laz", xyz[ring], "EPSG:2229")
+
+    config = run_config(
+        COPC_RESOLUTION_FACTOR=0.5,
+        RESOLUTION_ESTIMATE="fast",
+        RESOLUTION_SAMPLE_SIZE=1000,
+    )
+    config["FND_FILE"] = copc_file
+    pcloud = instantiate(config, fnd=True)
+    assert isinstance(pcloud, PointCloud) and pcloud.copc
+
+    # the central tile sampled by the fast estimate is empty, so the exact
+    # spacing is used instead
+    assert pcloud._estimate_spacing() is None
+    spacing, _ = pcloud._exact_spacing()
+    assert np.isclose(pcloud.native_resolution, spacing * pcloud.units_factor)
+
+    # the reader resolution is in the file's native units
+    pcloud.resolution = 2.0
+    assert pcloud._copc_reader() == {
+        "type": "readers.copc",
+        "filename": copc_file,
+        "resolution": 1.0 / pcloud.units_factor,
+    }
+    assert np.isclose(pcloud.units_factor, 0.3048006)
+
+    # the window is read by the COPC reader rather than cropped afterwards
+    pcloud.window_bounds = (10.0, 20.0, 30.0, 40.0)
+    assert pcloud._copc_reader()["bounds"] == "([10.0, 30.0], [20.0, 40.0])"
+    assert pcloud._readers() == [pcloud._copc_reader()]
+
+
+def test_fast_spacing_estimate_matches_exact(
+    run_config: Callable[..., Dict[str, Any]], write_points: Callable[..., str]
+) -> None:
+    def pcloud(name: str, xyz: np.ndarray) -> PointCloud:
+        config = run_config(RESOLUTION_ESTIMATE="fast", RESOLUTION_SAMPLE_SIZE=5000)
+        config["FND_FILE"] = write_points(name, xyz)
+        return PointCloud(config, fnd=True)
+
+    rng = np.random.default_rng(7)
+    uniform = rng.uniform(0, 200, (60000, 3))
+    # two overlapping flightlines stored one after the other, so the first
+    # points of the file only come from the first strip
+    strips = np.r_[
+        rng.uniform([0, 0, 0], [120, 200, 10], (30000, 3)),
+        rng.uniform([80, 0, 0], [200, 200, 10], (30000, 3)),
+    ]
+    for name, xyz in [("uniform.las", uniform), ("strips.las", strips)]:
+        cloud = pcloud(name, xyz)
+        estimate = cloud._estimate_spacing()
+        assert estimate is not None
+        exact, _ = cloud._exact_spacing()
+        assert np.isclose(estimate[0], exact, rtol=0.1)
+
+    # points covering a sixth of their bounds disagree with the header
+    # spacing, and the exact spacing is used
+    cluster = np.r_[rng.uniform(0, 80, (59999, 3)), [[200.0, 200.0, 0.0]]]
+    cloud = pcloud("cluster.las", cluster)
+    assert cloud._estimate_spacing() is None
+    assert np.isclose(cloud.native_resolution, cloud._exact_spacing()[0])
+
+    # a random sample of mesh vertices is scaled like the point sample
+    config = run_config(RESOLUTION_ESTIMATE="fast", RESOLUTION_SAMPLE_SIZE=5000)
+    config["FND_FILE"] = os.path.join(os.path.dirname(cloud.file), "strips.ply")
+    faces = np.arange(len(strips)).reshape(-1, 3)
+    trimesh.Trimesh(strips, faces, process=False).export(config["FND_FILE"])
+    mesh = Mesh(config, fnd=True)
+    assert len(mesh.vertices) == len(strips)
+    exact = mesh._vertex_spacing(mesh.vertices, len(mesh.vertices))
+    assert np.isclose(mesh.native_resolution, exact, rtol=0.1)
+
+
+def test_windowed_dsm_read_matches_cropped_full_read(
+    run_config: Callable[..., Dict[str, Any]], tmp_path: Any, caplog: Any
+) -> None:
+    # 2 ft pixels in US survey feet, with average overviews
+    dsm_file = str(tmp_path / "fnd_feet.tif")
+    v, u = np.mgrid[0:300, 0:400]
+    profile = {
+        "driver": "GTiff",
+        "dtype": "float32",
+        "count": 1,
+        "width": 400,
+        "height": 300,
+        "nodata": -9999.0,
+        "crs": "EPSG:2229",
+        "transform": Affine(2.0, 0.0, 6000000.0, 0.0, -2.0, 2000000.0),
+    }
+    with rasterio.open(dsm_file, "w", **profile) as raster:
+        noise = np.random.default_rng(8).normal(0, 1, u.shape)
+        raster.write((100 + 0.3 * u + noise).astype(np.float32), 1)
+    with rasterio.open(dsm_file, "r+") as raster:
+        raster.build_overviews([2, 4, 8], Resampling.average)
+
+    config = run_config(DSM_OVERVIEWS=True)
+    config["FND_FILE"] = dsm_file
+    fnd_obj = DSM(config, fnd=True)
+    aoi_obj = GeoData(config, fnd=False)
+    aoi_obj.crs = fnd_obj.crs
+    # pixels 50 to 190 by 70 to 170, i.e., 40 to 200 by 60 to 180 with the
+    # buffer of 20 ft
+    aoi_obj.bounds = (6000100.0, 1999660.0, 6000380.0, 1999860.0)
+    fnd_obj.set_window(aoi_obj, 20 * fnd_obj.units_factor)
+    assert fnd_obj.window_bounds is not None
+    assert np.allclose(
+        fnd_obj.window_bounds,
+        (6000080.0, 1999640.0, 6000400.0, 1999880.0),
+        rtol=0,
+        atol=1e-6,
+    )
+
+    def expected(overview_level: Any) -> Any:
+        scale = 2 ** (overview_level + 1) if overview_level is not None else 1
+        with rasterio.open(dsm_file, overview_level=overview_level) as raster:
+            window = Window(40 // scale, 60 // scale, 160 // scale, 120 // scale)
+            dsm = raster.read(1)[window.toslices()] * fnd_obj.units_factor
+            units = Affine.scale(fnd_obj.units_factor)
+            return dsm, units * raster.window_transform(window)
+
+    fnd_obj.resolution = fnd_obj.native_resolution
+    fnd_obj._create_dsm()
+    dsm, transform = expected(None)
+    assert fnd_obj.dsm.shape == (120, 160)
+    assert fnd_obj.transform.almost_equals(transform)
+    assert np.allclose(fnd_obj.dsm, dsm)
+
+    # a quarter of the resolution is read from the 4x overview
+    fnd_obj.resolution = 4 * fnd_obj.native_resolution
+    with caplog.at_level(logging.INFO):
+        fnd_obj._create_dsm()
+    assert "from overview level 1 (100 x 75 pixels)" in caplog.text
+    dsm, transform = expected(1)
+    assert fnd_obj.dsm.shape == (30, 40)
+    assert fnd_obj.transform.almost_equals(transform)
+    assert np.allclose(fnd_obj.dsm, dsm)
+
+
+def test_mesh_parsed_once_and_sidecar_roundtrip(
+    run_config: Callable[..., Dict[str, Any]], monkeypatch: Any, tmp_path: Any
+) -> None:
+    rng = np.random.default_rng(9)
+    mesh_file = str(tmp_path / "aoi.ply")
+    vertices = rng.uniform(0, 50, (300, 3))
+    trimesh.Trimesh(vertices, np.arange(300).reshape(-1, 3), process=False).export(
+        mesh_file
+    )
+
+    parsed = []
+    load_mesh = trimesh.load_mesh
+
+    def counted(*args: Any, **kwargs: Any) -> trimesh.Trimesh:
+        parsed.append(args[0])
+        return load_mesh(*args, **kwargs)
+
+    monkeypatch.setattr(trimesh, "load_mesh", counted)
+    config = run_config(MESH_SIDECAR=True, DSM_GRID_ENGINE="numpy")
+    config["AOI_FILE"] = mesh_file
+
+    # the resolution, DSM and registration share a single parse of the file
+    mesh = Mesh(config, fnd=False)
+    mesh.resolution = 1.0
+    mesh._create_dsm()
+    assert mesh.load_mesh() is mesh.load_mesh()
+    assert parsed == [mesh_file]
+    assert os.path.exists(f"{mesh_file}.codem.npz")
+
+    # later runs read the geometry from the sidecar
+    cached = Mesh(config, fnd=False)
+    assert parsed == [mesh_file]
+    assert np.array_equal(cached.vertices, mesh.vertices)
+    assert np.array_equal(cached.faces, mesh.faces)
+    assert cached.units == mesh.units
+    assert cached.native_resolution == mesh.native_resolution
+
+    # a changed mesh file is parsed again
+    stat = os.stat(mesh_file)
+    os.utime(mesh_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    Mesh(config, fnd=False)
+    assert parsed == [mesh_file, mesh_file]
@@ -0,0 +1,70 @@
+from typing import Any
+from typing import Callable
+
+import numpy as np
+from codem.registration import DsmRegistration
+from codem.registration.pyramid import block_reduce
+from codem.registration.pyramid import pyramid_factors
+from codem.registration.pyramid import PyramidLevel
+
+
+def test_pyramid_level_geometry(prepared: Callable[..., Any]) -> None:
+    array = np.arange(30, dtype=np.float64).reshape(5, 6)
+    assert np.array_equal(
+        block_reduce(array, 2, np.mean), [[3.5, 5.5, 7.5], [15.5, 17.5, 19.5]]
+    )
+    assert pyramid_factors(3, [(300, 500), (256, 300)]) == [4, 2]
+    assert pyramid_factors(4, [(300, 500), (200, 300)]) == [2]
+
+    _, fnd_obj, _ = prepared()
+    level = PyramidLevel(fnd_obj, 2)
+    assert level.normed.shape == level.nodata_mask.shape == level.infilled.shape
+    assert level.infilled.shape == (
+        fnd_obj.infilled.shape[0] // 2,
+        fnd_obj.infilled.shape[1] // 2,
+    )
+    # a level pixel covers its block of pipeline resolution pixels
+    offset = 0.5 if fnd_obj.area_or_point == "Area" else 0.0
+    block = [
+        fnd_obj.transform * (c + offset, r + offset) for r in (2, 3) for c in (4, 5)
+    ]
+    assert np.allclose(
+        level.transform * (2 + offset, 1 + offset), np.mean(block, axis=0)
+    )
+
+
+def test_pyramid_registration(prepared: Callable[..., Any]) -> None:
+    def register(levels: int) -> DsmRegistration:
+        config, fnd_obj, aoi_obj = prepared(
+            MIN_RESOLUTION=0.5,
+            DSM_PYRAMID_LEVELS=levels,
+            DSM_RANSAC_ENGINE="batched",
+            DSM_RANSAC_SEED=0,
+        )
+        registration = DsmRegistration(fnd_obj, aoi_obj, config)
+        registration.register()
+        return registration
+
+    single = register(1)
+    # the fixtures are too small for a third level, which is skipped
+    pyramid = register(3)
+    assert single.prior is None
+    assert pyramid.prior is not None
+    assert pyramid.registration_parameters["n_pairs"] >= (
+        single.registration_parameters["n_pairs"]
+    )
+
+    # both transformations agree on the AOI within the RANSAC threshold
+    rows, cols = pyramid.aoi_obj.infilled.shape
+    corners = np.array(
+        [pyramid.aoi_obj.transform * (c, r) for r in (0, rows) for c in (0, cols)]
+    )
+    corners = np.c_[corners, np.full(4, pyramid.aoi_obj.infilled.mean()), np.ones(4)]
+    difference = (
+        corners
+        @ (
+            pyramid.registration_parameters["matrix"]
+            - single.registration_parameters["matrix"]
+        ).T
+    )
+    assert np.all(np.linalg.norm(difference[:, :3], axis=1) < 10.0)
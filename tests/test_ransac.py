@@ -0,0 +1,103 @@
+from typing import Tuple
+
+import numpy as np
+import pytest
+from codem.registration.dsm import Scaled3dSimilarityTransform
+from codem.registration.dsm import Unscaled3dSimilarityTransform
+from codem.registration.ransac import ransac_similarity
+from codem.registration.ransac import umeyama
+from skimage.measure import ransac
+
+
+def _similarity(scale: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    q, _ = np.linalg.qr(rng.normal(size=(3, 3)))
+    if np.linalg.det(q) < 0:
+        q[:, 0] *= -1
+    T = np.eye(4)
+    T[:3, :3] = scale * q
+    T[:3, 3] = rng.uniform(-500, 500, 3)
+    return T
+
+
+def _matches(
+    T: np.ndarray, n: int, outlier_ratio: float, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    src = rng.uniform(0, 1000, (n, 3)) * [1, 1, 0.1]
+    dst = src @ T[:3, :3].T + T[:3, 3] + rng.normal(0, 0.5, (n, 3))
+    outliers = rng.random(n) < outlier_ratio
+    dst[outliers] = rng.uniform(0, 1000, (outliers.sum(), 3))
+    return src, dst, ~outliers
+
+
+@pytest.mark.parametrize("estimate_scale", [True, False])
+def test_batched_umeyama_matches_single(estimate_scale: bool) -> None:
+    single = (
+        Scaled3dSimilarityTransform()
+        if estimate_scale
+        else Unscaled3dSimilarityTransform()
+    )
+    src, dst, _ = _matches(_similarity(1.2), 60, 0.0)
+    samples = np.random.default_rng(1).integers(0, 60, (20, 3))
+    samples = np.vstack((samples, np.arange(60)[None, :3]))
+    batched, _ = umeyama(src[samples], dst[samples], estimate_scale)
+    for T, sample in zip(batched, samples):
+        expected = single._umeyama(src[sample], dst[sample], estimate_scale)
+        if np.all(np.isfinite(expected)):
+            assert np.allclose(T, expected)
+    full, _ = umeyama(src[None], dst[None], estimate_scale)
+    assert np.allclose(full[0], single._umeyama(src, dst, estimate_scale))
+
+
+@pytest.mark.parametrize("prosac", [False, True])
+def test_ransac_recovers_similarity(prosac: bool) -> None:
+    T = _similarity(1.1)
+    src, dst, truth = _matches(T, 2000, 0.6)
+    # ranked so that the inliers mostly come first
+    quality = truth + np.random.default_rng(2).random(truth.size)
+    order = np.argsort(-quality) if prosac else None
+
+    solved, inliers = ransac_similarity(
+        src, dst, 3.0, 10000, solve_scale=True, order=order, seed=3
+    )
+    assert solved is not None and inliers is not None
+    assert np.count_nonzero(inliers & ~truth) <= 2
+    assert np.count_nonzero(inliers) > 0.95 * np.count_nonzero(truth)
+    assert np.allclose(solved[:3, :3], T[:3, :3], atol=1e-3)
+    assert np.allclose(solved[:3, 3], T[:3, 3], atol=0.5)
+
+    # seeded runs are reproducible
+    again, again_inliers = ransac_similarity(
+        src, dst, 3.0, 10000, solve_scale=True, order=order, seed=3
+    )
+    assert np.array_equal(again, solved) and np.array_equal(again_inliers, inliers)
+
+
+def test_ransac_rejects_out_of_scale_data() -> None:
+    src, dst, _ = _matches(_similarity(3.0), 200, 0.0)
+    solved, inliers = ransac_similarity(src, dst, 3.0, 2000, seed=0)
+    assert solved is None and inliers is None
+
+
+@pytest.mark.parametrize("solve_scale", [True, False])
+def test_ransac_engines_agree(solve_scale: bool) -> None:
+    T = _similarity(1.1 if solve_scale else 1.0, seed=4)
+    src, dst, truth = _matches(T, 500, 0.3, seed=4)
+
+    batched, batched_inliers = ransac_similarity(
+        src, dst, 3.0, 1000, solve_scale=solve_scale, seed=5
+    )
+    model, skimage_inliers = ransac(
+        (src, dst),
+        Scaled3dSimilarityTransform if solve_scale else Unscaled3dSimilarityTransform,
+        min_samples=3,
+        residual_threshold=3.0,
+        max_trials=1000,
+    )
+    assert batched is not None and model is not None
+    # both engines find the inliers and the transformation they support
+    assert np.count_nonzero(batched_inliers != skimage_inliers) <= 2
+    assert np.count_nonzero(skimage_inliers & ~truth) <= 2
+    assert np.allclose(batched[:3, :3], model.transform[:3, :3], atol=1e-3)
+    assert np.allclose(batched[:3, 3], model.transform[:3, 3], atol=0.5)
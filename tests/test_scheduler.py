@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import List
+
+import codem
+import numpy as np
+import pytest
+from codem.lib.scheduler import TaskGraph
+from codem.registration import features
+
+
+def test_task_graph_respects_dependencies() -> None:
+    order: List[str] = []
+    started = threading.Barrier(2, timeout=5)
+
+    def task(name: str, wait: bool = False) -> str:
+        if wait:
+            # both independent tasks must be running at the same time
+            started.wait()
+        time.sleep(0.01)
+        order.append(name)
+        return name.upper()
+
+    graph = TaskGraph(workers=2)
+    graph.add("a", task, "a", wait=True)
+    graph.add("b", task, "b", wait=True)
+    graph.add("c", task, "c", after=("a", "b"))
+    results = graph.run()
+
+    assert results == {"a": "A", "b": "B", "c": "C"}
+    assert order[-1] == "c"
+    with pytest.raises(ValueError):
+        graph.add("d", task, "d", after=("missing",))
+
+
+def test_task_graph_stops_on_error() -> None:
+    ran: List[str] = []
+
+    def fail() -> None:
+        raise RuntimeError("failed")
+
+    graph = TaskGraph(workers=2)
+    graph.add("fail", fail)
+    graph.add("after", ran.append, "after", after=("fail",))
+    with pytest.raises(RuntimeError):
+        graph.run()
+    assert ran == []
+
+
+def test_concurrent_run_matches_sequential(prepared: Callable[..., Any]) -> None:
+    registrations = []
+    for workers in (1, 2):
+        config, fnd_obj, aoi_obj = prepared(WORKERS=workers)
+        assert fnd_obj.normal_vectors.size == 0
+        dsm_reg = codem.coarse_registration(fnd_obj, aoi_obj, config)
+        assert fnd_obj.normal_vectors.shape == fnd_obj.point_cloud.shape
+        registrations.append((fnd_obj, aoi_obj, dsm_reg))
+
+    (fnd_1, aoi_1, reg_1), (fnd_2, aoi_2, reg_2) = registrations
+    for name in ("normed", "point_cloud", "normal_vectors"):
+        assert np.array_equal(getattr(fnd_1, name), getattr(fnd_2, name))
+        assert np.array_equal(getattr(aoi_1, name), getattr(aoi_2, name))
+    assert np.array_equal(reg_1.fnd_desc, reg_2.fnd_desc)
+    assert np.array_equal(reg_1.aoi_desc, reg_2.aoi_desc)
+    # RANSAC is randomized, the matches it is given are not
+    assert [(m.queryIdx, m.trainIdx) for m in reg_1.putative_matches] == [
+        (m.queryIdx, m.trainIdx) for m in reg_2.putative_matches
+    ]
+
+
+def test_registration_stays_within_workers(
+    prepared: Callable[..., Any], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config, fnd_obj, aoi_obj = prepared(WORKERS=3, DSM_AKAZE_TILE_SIZE=64)
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+    detect_tile = features._detect_tile
+
+    def counted(*args: Any) -> Any:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        try:
+            time.sleep(0.01)
+            return detect_tile(*args)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    monkeypatch.setattr(features, "_detect_tile", counted)
+    codem.coarse_registration(fnd_obj, aoi_obj, config)
+    # one of the workers generates the foundation normal vectors
+    assert peak[0] <= config["WORKERS"] - 1
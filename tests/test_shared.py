@@ -0,0 +1,42 @@
+import multiprocessing
+import pickle
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+import codem
+import numpy as np
+from codem.lib.shared import SharedGeoData
+
+
+def _summarize(handle: SharedGeoData) -> Tuple[float, bool, float]:
+    geo_data = handle.attach()
+    return (
+        float(geo_data.point_cloud.sum()),
+        geo_data.point_cloud.flags.writeable,
+        geo_data.resolution,
+    )
+
+
+def test_shared_geodata_attaches_in_workers(
+    run_config: Callable[..., Dict[str, Any]]
+) -> None:
+    config = run_config()
+    fnd_obj, _ = codem.preprocess(config)
+    fnd_obj.prep()
+
+    with fnd_obj.share() as handle:
+        # the handle is pickled without the arrays
+        assert len(pickle.dumps(handle)) < fnd_obj.point_cloud.nbytes / 10
+        attached = pickle.loads(pickle.dumps(handle)).attach()
+        for name in fnd_obj.cached_arrays:
+            assert np.array_equal(getattr(attached, name), getattr(fnd_obj, name))
+        assert attached.transform == fnd_obj.transform
+        assert attached.cache is None
+        del attached
+
+        with multiprocessing.Pool(2) as pool:
+            summaries = pool.map(_summarize, [handle, handle])
+    expected = (float(fnd_obj.point_cloud.sum()), False, fnd_obj.resolution)
+    assert summaries == [expected, expected]